@@ -7,13 +7,94 @@ class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = "sqlite+aiosqlite:///./blog.db"
 
+    # SQLite engine profile — pragmas applied on every new connection, and the
+    # connection pools: one serialized writer plus a separate read-only pool
+    DB_JOURNAL_MODE: str = "WAL"
+    DB_SYNCHRONOUS: str = "NORMAL"      # durable at checkpoints; safe with WAL
+    DB_BUSY_TIMEOUT_MS: int = 5000
+    DB_CACHE_SIZE_KB: int = 64 * 1024   # page cache per connection
+    DB_MMAP_SIZE: int = 256 * 1024 * 1024
+    DB_FOREIGN_KEYS: bool = True
+    DB_WRITE_POOL_SIZE: int = 1
+    DB_READ_POOL_SIZE: int = 4          # 0 = reads share the writer pool
+
     # JWT
     JWT_SECRET_KEY: str = "super-secret-change-me-in-production"
     JWT_ALGORITHM: str = "HS256"
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
+    AUTH_TOKEN_CACHE_MAX_ENTRIES: int = 4096  # verified tokens kept until they expire
+
+    # Password hashing — bcrypt cost, and the dedicated pool it runs in off the event loop
+    BCRYPT_ROUNDS: int = 12            # changing it rehashes each password on its next login
+    BCRYPT_WORKERS: int = 2
+    BCRYPT_MAX_QUEUE: int = 64         # hashes waiting beyond this are rejected with 503
+    BCRYPT_USE_PROCESSES: bool = False  # bcrypt releases the GIL, so threads already use all cores
+
+    # Write-behind autosave buffer (single-worker deployments only)
+    WRITE_BEHIND_ENABLED: bool = False
+    WRITE_BEHIND_FLUSH_INTERVAL_MS: int = 500
+    WRITE_BEHIND_MAX_PENDING: int = 100
+
+    # Read-through cache of serialized GET /api/posts/{id} bodies
+    POST_CACHE_MAX_ENTRIES: int = 1024
+    POST_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    POST_CACHE_TTL_SECONDS: float = 300
+
+    # Server-side Lexical → HTML rendering, cached per top-level block
+    HTML_RENDER_CACHE_MAX_ENTRIES: int = 16_384
+    HTML_RENDER_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+
+    # posts.content_json / content_html are stored as zlib BLOBs (0 = store uncompressed)
+    CONTENT_COMPRESSION_LEVEL: int = 6
+
+    # Post revision history — snapshots plus diffs against them, thinned out with age
+    REVISION_SNAPSHOT_RATIO: float = 0.5  # store a snapshot instead once a diff is this large relative to the state
+    REVISION_KEEP_ALL_HOURS: float = 24   # every revision younger than this is kept
+    REVISION_HOURLY_DAYS: float = 30      # then the last one per hour up to this age, then one per day
+    REVISION_THIN_EVERY: int = 50         # thin a post's history every N versions
+
+    # POST /api/posts/bulk — ids per request
+    BULK_MAX_IDS: int = 500
+
+    # Bulk NDJSON export / import (GET /api/posts/export, POST /api/posts/import)
+    TRANSFER_BATCH_SIZE: int = 500     # rows per streamed export chunk / per import transaction
+    IMPORT_MAX_LINE_BYTES: int = 8 * 1024 * 1024
+    IMPORT_MAX_ERRORS: int = 100       # per-line errors listed in the response (all are counted)
 
     # AI (Groq)
     GROQ_API_KEY: str = ""
+    GROQ_MODEL: str = "llama-3.3-70b-versatile"
+    GROQ_BASE_URL: str = ""  # empty = SDK default; point at a stub/proxy for tests
+
+    # AI client — shared connection pool, concurrency cap, per-attempt timeout, retries
+    AI_MAX_CONCURRENCY: int = 8
+    AI_TIMEOUT_SECONDS: float = 30
+    AI_MAX_RETRIES: int = 2
+    AI_RETRY_BACKOFF_SECONDS: float = 0.5
+    AI_RETRY_BACKOFF_MAX_SECONDS: float = 8
+
+    # Map-reduce for long summarize / fix_grammar inputs
+    AI_CHUNK_TOKENS: int = 1500
+    AI_CHUNK_PARALLELISM: int = 4
+
+    # Local "fast" engine (and offline fallbacks) — threads running it off the event loop
+    AI_LOCAL_WORKERS: int = 2
+
+    # POST /api/ai/batch — items per request and how many run at once
+    AI_BATCH_MAX_ITEMS: int = 100
+    AI_BATCH_CONCURRENCY: int = 4
+
+    # Background AI jobs (POST /api/ai/jobs) — worker pool, per-owner backlog cap, retention
+    AI_JOB_WORKERS: int = 2
+    AI_JOB_MAX_PENDING_PER_OWNER: int = 200
+    AI_JOB_RETENTION_HOURS: float = 24
+
+    # AI result cache — in-memory LRU, plus an optional SQLite tier that survives restarts
+    AI_CACHE_MAX_ENTRIES: int = 512
+    AI_CACHE_MAX_BYTES: int = 16 * 1024 * 1024
+    AI_CACHE_TTL_SECONDS: float = 7 * 24 * 3600
+    AI_CACHE_PERSISTENT: bool = False
+    AI_CACHE_PERSISTENT_MAX_ENTRIES: int = 10_000
 
     # CORS
     CORS_ORIGINS: list[str] = ["*"]
@@ -1,13 +1,71 @@
-"""Async SQLAlchemy engine & session factory."""
+"""Async SQLAlchemy engines & session factories.
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+Writes go through ``engine`` — for SQLite a pool of ``DB_WRITE_POOL_SIZE``
+(default one) connection, so writers queue in the pool instead of failing
+with "database is locked". Read-only endpoints use ``read_engine``, a
+separate pool of ``query_only`` connections that, under WAL, read
+concurrently with the writer. Both apply the ``DB_*`` pragmas on connect.
+"""
+
+import logging
+
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from app.config import settings
 
-engine = create_async_engine(settings.DATABASE_URL, echo=False)
+logger = logging.getLogger(__name__)
+
+_url = make_url(settings.DATABASE_URL)
+_sqlite = _url.get_backend_name() == "sqlite"
+_sqlite_file = _sqlite and _url.database not in (None, "", ":memory:")
+
+
+def _apply_pragmas(dbapi_connection, read_only: bool) -> None:
+    cursor = dbapi_connection.cursor()
+    pragmas = [
+        f"journal_mode={settings.DB_JOURNAL_MODE}",
+        f"synchronous={settings.DB_SYNCHRONOUS}",
+        f"busy_timeout={settings.DB_BUSY_TIMEOUT_MS}",
+        f"cache_size=-{settings.DB_CACHE_SIZE_KB}",
+        f"mmap_size={settings.DB_MMAP_SIZE}",
+        f"foreign_keys={'ON' if settings.DB_FOREIGN_KEYS else 'OFF'}",
+    ]
+    if read_only:
+        pragmas.append("query_only=ON")
+    for pragma in pragmas:
+        cursor.execute(f"PRAGMA {pragma}")
+    cursor.close()
+
+
+def _create_engine(pool_size: int, read_only: bool = False) -> AsyncEngine:
+    if not _sqlite_file:
+        return create_async_engine(settings.DATABASE_URL, echo=False)
+
+    # aiosqlite defaults to NullPool (a new connection, and pragma round, per checkout)
+    new_engine = create_async_engine(
+        settings.DATABASE_URL, echo=False,
+        poolclass=AsyncAdaptedQueuePool, pool_size=pool_size, max_overflow=0,
+    )
+    event.listen(
+        new_engine.sync_engine, "connect",
+        lambda dbapi_connection, _: _apply_pragmas(dbapi_connection, read_only),
+    )
+    return new_engine
+
+
+engine = _create_engine(settings.DB_WRITE_POOL_SIZE)
+read_engine = (
+    _create_engine(settings.DB_READ_POOL_SIZE, read_only=True)
+    if _sqlite_file and settings.DB_READ_POOL_SIZE > 0
+    else engine
+)
 
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+read_session = async_sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False)
 
 
 class Base(DeclarativeBase):
@@ -16,13 +74,66 @@ class Base(DeclarativeBase):
 
 
 async def init_db() -> None:
-    """Create all tables (dev convenience — production uses migrations)."""
+    """
+    Create all tables (dev convenience — production uses migrations).
+
+    ``create_all`` never alters a table that already exists, so columns and
+    indexes added to the models since the database was created are added
+    here too. Their values are back-filled by the services (e.g.
+    ``post_service.backfill_derived_columns``).
+    """
     async with engine.begin() as conn:
-        from app.models import Post, User  # noqa: F401 — ensure models registered
+        from app.models import AiCacheEntry, AiJob, Post, PostCounter, PostRevision, User  # noqa: F401 — ensure models registered
         await conn.run_sync(Base.metadata.create_all)
+        added = await conn.run_sync(_add_missing_columns)
+    if added:
+        logger.info(f"Added columns: {', '.join(added)}")
+
+
+def _add_missing_columns(conn) -> list[str]:
+    """``ALTER TABLE ... ADD COLUMN`` for model columns an older database lacks, then any missing indexes."""
+    inspector = inspect(conn)
+    added = []
+    for table in Base.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = f"{column.name} {column.type.compile(conn.dialect)}"
+            # NOT NULL columns need a constant default to be added to existing rows
+            if column.default is not None and column.default.is_scalar:
+                ddl += f" DEFAULT {column.default.arg!r}"
+            if not column.nullable:
+                ddl += " NOT NULL"
+            conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {ddl}")
+            added.append(f"{table.name}.{column.name}")
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+    return added
+
+
+async def close_db() -> None:
+    """Close pooled connections (the last writer to close checkpoints the WAL)."""
+    if read_engine is not engine:
+        await read_engine.dispose()
+    await engine.dispose()
+
+
+def pool_stats() -> dict:
+    def _pool(e: AsyncEngine) -> dict:
+        pool = e.pool
+        return {"size": pool.size(), "checked_out": pool.checkedout()} if hasattr(pool, "checkedout") else {}
+
+    return {"writer": _pool(engine), "reader": _pool(read_engine) if read_engine is not engine else None}
 
 
 async def get_db():
-    """FastAPI dependency — yields an async session, auto-closes."""
+    """FastAPI dependency — yields an async session on the writer, auto-closes."""
     async with async_session() as session:
         yield session
+
+
+async def get_read_db():
+    """FastAPI dependency — yields a session on the read-only pool (GET endpoints)."""
+    async with read_session() as session:
+        yield session
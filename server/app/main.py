@@ -6,15 +6,34 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
-from app.database import init_db
+from app.database import async_session, close_db, init_db, pool_stats
 from app.routers import ai, auth, posts
+from app.services import ai_service, counter_service, post_service
+from app.services.ai_cache import ai_cache
+from app.services.ai_jobs import job_queue
+from app.services.password_hasher import password_hasher
+from app.services.write_buffer import write_buffer
+from app.utils.auth import token_cache
+from app.utils.lexical_html import render_cache
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Startup: create DB tables. Shutdown: nothing special."""
+    """Startup: create DB tables, start background workers. Shutdown: flush pending writes."""
     await init_db()
-    yield
+    async with async_session() as db:
+        await post_service.backfill_derived_columns(db)
+        await counter_service.backfill(db)
+    write_buffer.start()
+    await job_queue.start()
+    try:
+        yield
+    finally:
+        await job_queue.stop()
+        await write_buffer.stop()
+        await ai_service.close_client()
+        password_hasher.close()
+        await close_db()
 
 
 app = FastAPI(
@@ -47,3 +66,20 @@ async def root():
 @app.get("/health", tags=["Health"])
 async def health():
     return {"status": "healthy"}
+
+
+@app.get("/metrics", tags=["Health"])
+async def metrics():
+    """In-process counters for sizing caches and buffers."""
+    return {
+        "db_pools": pool_stats(),
+        "write_behind": write_buffer.stats(),
+        "post_cache": post_service.post_cache.stats(),
+        "ai_cache": ai_cache.stats(),
+        "ai_client": ai_service.client_stats(),
+        "ai_inflight": ai_service.inflight_stats(),
+        "ai_jobs": job_queue.stats(),
+        "password_hasher": password_hasher.stats(),
+        "auth_tokens": token_cache.stats(),
+        "html_render_cache": render_cache.stats(),
+    }
@@ -0,0 +1,111 @@
+"""Maintenance commands.
+
+Run from ``server/``::
+
+    python -m app.manage backfill-posts
+    python -m app.manage rebuild-search
+    python -m app.manage compress-content
+    python -m app.manage thin-revisions
+    python -m app.manage reconcile-counters
+    python -m app.manage claim-posts user@example.com
+"""
+
+import argparse
+import asyncio
+
+from sqlalchemy import select, text
+
+from app.database import async_session, close_db, engine, init_db
+from app.models.user import User
+from app.services import counter_service, post_service, revision_service, search_service
+
+
+async def backfill_posts() -> None:
+    """Add columns newer than the database and compute posts' derived columns (also done on startup)."""
+    async with async_session() as db:
+        count = await post_service.backfill_derived_columns(db)
+    print(f"Filled in {count} posts")
+
+
+async def rebuild_search() -> None:
+    """Re-index every post for full-text search (back-fills existing databases)."""
+    async with async_session() as db:
+        count = await search_service.rebuild_index(db)
+    print(f"Indexed {count} posts")
+
+
+async def compress_content() -> None:
+    """Compress post content stored before compressed columns, then VACUUM to reclaim space."""
+    async with async_session() as db:
+        count = await post_service.compress_legacy_content(db)
+    print(f"Compressed {count} posts")
+    if count:
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.execute(text("VACUUM"))
+
+
+async def thin_revisions() -> None:
+    """Thin every post's revision history to hourly / daily checkpoints and drop unused states."""
+    async with async_session() as db:
+        revisions = await revision_service.thin_revisions(db)
+        states = await revision_service.collect_garbage(db)
+        await db.commit()
+    print(f"Removed {revisions} revisions and {states} stored states")
+
+
+async def reconcile_counters() -> None:
+    """Recompute the per-author / per-status post counts and report any drift."""
+    async with async_session() as db:
+        drift = await counter_service.reconcile(db)
+    for author_id, status, stored, actual in drift:
+        print(f"{author_id or '(anonymous)'} {status}: {stored} -> {actual}")
+    print(f"Fixed {len(drift)} counters" if drift else "Counters are consistent")
+
+
+async def claim_posts(email: str) -> None:
+    """Assign every post without an author (written before accounts, or logged out) to one user."""
+    async with async_session() as db:
+        user_id = (await db.execute(select(User.id).where(User.email == email))).scalar()
+        if user_id is None:
+            raise SystemExit(f"No user with email {email}")
+        count = await post_service.claim_anonymous_posts(db, user_id)
+    print(f"Assigned {count} posts to {email}")
+
+
+COMMANDS = {
+    "backfill-posts": backfill_posts,
+    "rebuild-search": rebuild_search,
+    "compress-content": compress_content,
+    "thin-revisions": thin_revisions,
+    "reconcile-counters": reconcile_counters,
+    "claim-posts": claim_posts,
+}
+
+# Positional arguments of the commands that take any
+ARGUMENTS = {
+    "claim-posts": ("email",),
+}
+
+
+async def _run(command, *args: str) -> None:
+    await init_db()
+    try:
+        await command(*args)
+    finally:
+        await close_db()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.manage", description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, command in COMMANDS.items():
+        subparser = subparsers.add_parser(name, help=command.__doc__)
+        for argument in ARGUMENTS.get(name, ()):
+            subparser.add_argument(argument)
+    args = parser.parse_args(argv)
+    asyncio.run(_run(COMMANDS[args.command], *(getattr(args, a) for a in ARGUMENTS.get(args.command, ()))))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,9 @@
+from app.models.ai_cache import AiCacheEntry
+from app.models.ai_job import AiJob
 from app.models.post import Post
+from app.models.post_counter import PostCounter
+from app.models import post_search  # noqa: F401 — registers the FTS5 table DDL
+from app.models.revision import PostRevision, RevisionBlob
 from app.models.user import User
 
-__all__ = ["Post", "User"]
+__all__ = ["AiCacheEntry", "AiJob", "Post", "PostCounter", "PostRevision", "RevisionBlob", "User"]
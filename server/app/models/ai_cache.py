@@ -0,0 +1,26 @@
+"""AI result cache ORM model — persistent tier of the content-addressed AI cache."""
+
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, DateTime, Index, String, Text
+
+from app.database import Base
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class AiCacheEntry(Base):
+    __tablename__ = "ai_cache"
+
+    key = Column(String, primary_key=True)            # sha256(action, model, prompt, text)
+    action = Column(String, nullable=False)
+    model = Column(String, nullable=False)
+    result = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=_utcnow)
+    expires_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_ai_cache_created_at", "created_at"),  # oldest-first eviction
+    )
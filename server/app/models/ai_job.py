@@ -0,0 +1,38 @@
+"""AI job ORM model — queued / running / finished background AI requests."""
+
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import Boolean, Column, DateTime, Index, Integer, String, Text
+
+from app.database import Base
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _new_uuid() -> str:
+    return str(uuid.uuid4())
+
+
+class AiJob(Base):
+    __tablename__ = "ai_jobs"
+
+    id = Column(String, primary_key=True, default=_new_uuid)
+    owner = Column(String, nullable=False)             # user id, or client address when anonymous
+    action = Column(String, nullable=False)
+    engine = Column(String, nullable=False, default="llm")
+    force = Column(Boolean, nullable=False, default=False)
+    text = Column(Text, nullable=False)
+    priority = Column(Integer, nullable=False)         # lower runs first (see ai_jobs.PRIORITIES)
+    status = Column(String, nullable=False, default="queued")  # queued | running | done | failed
+    result = Column(Text, nullable=True)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=_utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_ai_jobs_status_created_at", "status", "created_at"),  # restart recovery, pruning
+    )
@@ -3,10 +3,10 @@
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import Column, DateTime, ForeignKey, String, Text
-from sqlalchemy import JSON
+from sqlalchemy import JSON, Column, DateTime, ForeignKey, Index, Integer, String
 
 from app.database import Base
+from app.models.types import CompressedJSON, CompressedText
 
 
 def _utcnow() -> datetime:
@@ -22,9 +22,23 @@ class Post(Base):
 
     id = Column(String, primary_key=True, default=_new_uuid)
     title = Column(String, nullable=False, default="Untitled")
-    content_json = Column(JSON, nullable=True)       # Lexical editor state (lossless)
-    content_html = Column(Text, nullable=True)        # Rendered HTML (read-only / SEO)
+    content_json = Column(CompressedJSON, nullable=True)  # Lexical editor state (lossless)
+    content_html = Column(CompressedText, nullable=True)  # Rendered HTML (read-only / SEO)
+    excerpt = Column(String, nullable=True)           # Plain-text preview for list views
+    # Derived from content_json on write (utils.lexical.analyze); recomputed only when content_hash changes
+    word_count = Column(Integer, nullable=False, default=0)
+    char_count = Column(Integer, nullable=False, default=0)
+    reading_minutes = Column(Integer, nullable=False, default=0)
+    outline = Column(JSON, nullable=True)             # [{"level": 2, "text": "..."}] of headings
+    content_hash = Column(String, nullable=True)
     status = Column(String, nullable=False, default="draft")  # "draft" | "published"
     author_id = Column(String, ForeignKey("users.id"), nullable=True)
+    version = Column(Integer, nullable=False, default=1)  # bumped on every write (If-Match)
     created_at = Column(DateTime, default=_utcnow)
     updated_at = Column(DateTime, default=_utcnow, onupdate=_utcnow)
+
+    __table_args__ = (
+        # Keyset pagination within one author's posts: status filter + (updated_at, id) seek
+        Index("ix_posts_author_status_updated_at_id", "author_id", "status", "updated_at", "id"),
+        Index("ix_posts_author_updated_at_id", "author_id", "updated_at", "id"),  # all statuses
+    )
@@ -0,0 +1,13 @@
+"""Post counter ORM model — posts per (author, status), kept in step by every writer."""
+
+from sqlalchemy import Column, Integer, String
+
+from app.database import Base
+
+
+class PostCounter(Base):
+    __tablename__ = "post_counters"
+
+    author_key = Column(String, primary_key=True)  # author_id, or "" for anonymous posts
+    status = Column(String, primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,19 @@
+"""Full-text index over posts — an SQLite FTS5 table, kept in sync by services.search_service.
+
+``post_id`` is stored unindexed for the join back to ``posts``; the FTS rowid
+is derived from the post id (see ``search_service.fts_rowid``) so a post's
+entry can be replaced without scanning the index.
+"""
+
+from sqlalchemy import DDL, event
+
+from app.database import Base
+
+POSTS_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts "
+    "USING fts5(post_id UNINDEXED, title, body, tokenize = 'porter unicode61')"
+)
+
+# create_all / drop_all manage the virtual table alongside the ORM tables
+event.listen(Base.metadata, "after_create", DDL(POSTS_FTS_DDL).execute_if(dialect="sqlite"))
+event.listen(Base.metadata, "after_drop", DDL("DROP TABLE IF EXISTS posts_fts").execute_if(dialect="sqlite"))
@@ -0,0 +1,45 @@
+"""Post revision ORM models — history rows plus the content-addressed states they point at."""
+
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String
+
+from app.database import Base
+from app.models.types import CompressedJSON
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class RevisionBlob(Base):
+    """
+    One distinct Lexical state, keyed by its ``content_hash``.
+
+    Every revision (of any post) in the same state shares the row. With no
+    ``base_hash`` the row is a snapshot and ``data`` is the full state;
+    otherwise ``data`` is a JSON Patch from the snapshot ``base_hash`` to this
+    state, so any state is at most one patch away from a snapshot.
+    """
+
+    __tablename__ = "revision_blobs"
+
+    hash = Column(String, primary_key=True)
+    base_hash = Column(String, nullable=True, index=True)  # None = snapshot
+    data = Column(CompressedJSON, nullable=False)
+    created_at = Column(DateTime, default=_utcnow)
+
+
+class PostRevision(Base):
+    __tablename__ = "post_revisions"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    post_id = Column(String, ForeignKey("posts.id", ondelete="CASCADE"), nullable=False)
+    version = Column(Integer, nullable=False)          # post version this revision recorded
+    title = Column(String, nullable=False)
+    content_hash = Column(String, nullable=True, index=True)  # revision_blobs.hash; None = no content
+    created_at = Column(DateTime, default=_utcnow)
+
+    __table_args__ = (
+        Index("ix_post_revisions_post_id_id", "post_id", "id"),
+    )
@@ -0,0 +1,128 @@
+"""Compressed column types for large post content.
+
+Values are stored as BLOBs with a 3-byte header::
+
+    byte 0  format version (1)
+    byte 1  codec: 0 = stored as-is, 1 = zlib
+    byte 2  preset dictionary id (0 = none, see DICTIONARIES)
+
+Lexical JSON and rendered HTML repeat the same keys and tags in every node,
+so zlib with a preset dictionary of those fragments compresses even short
+posts well. Readers dispatch on the header, so new codecs or dictionaries can
+be added without rewriting old rows. Rows written before compression (plain
+TEXT) are still read as-is; ``python -m app.manage compress-content`` rewrites
+them.
+"""
+
+import json
+import zlib
+from typing import Any, Optional
+
+from sqlalchemy.types import LargeBinary, TypeDecorator
+
+from app.config import settings
+
+FORMAT_VERSION = 1
+CODEC_STORED, CODEC_ZLIB = 0, 1
+MIN_COMPRESS_BYTES = 64  # smaller values are stored uncompressed
+
+# Preset dictionaries, most frequent fragments last (zlib favours short distances).
+# Never change a published id's bytes — add a new id instead.
+DICTIONARIES: dict[int, bytes] = {
+    1: (  # Lexical editor state JSON (compact separators)
+        b'"type":"link","version":1,"rel":"noreferrer","target":null,"title":null,"url":"https://'
+        b'"type":"code","version":1,"language":"javascript"}'
+        b'{"children":[],"direction":null,"format":"","indent":0,"type":"paragraph","version":1,"textFormat":0,"textStyle":""}'
+        b'"type":"quote","version":1}'
+        b'"type":"heading","version":1,"tag":"h1"}"tag":"h2"}"tag":"h3"}'
+        b'"type":"list","version":1,"listType":"number","start":1,"tag":"ol"}'
+        b'"type":"list","version":1,"listType":"bullet","start":1,"tag":"ul"}'
+        b'"type":"listitem","version":1,"value":1}'
+        b'{"detail":0,"format":0,"mode":"normal","style":"","text":"","type":"linebreak","version":1}'
+        b'{"root":{"children":[{"children":[{"detail":0,"format":1,"mode":"normal","style":"","text":"'
+        b'","type":"text","version":1}],"direction":"ltr","format":"","indent":0,"type":"root","version":1}}'
+        b'","type":"text","version":1},{"detail":0,"format":0,"mode":"normal","style":"","text":"'
+        b'","type":"text","version":1}],"direction":"ltr","format":"","indent":0,"type":"paragraph",'
+        b'"version":1,"textFormat":0,"textStyle":""},{"children":[{"detail":0,"format":0,"mode":"normal","style":"","text":"'
+    ),
+    2: (  # Rendered HTML (see utils.lexical_html)
+        b'<a href="https://" rel="noopener noreferrer"></a><pre><code></code></pre><sub></sub><sup></sup>'
+        b'<h1></h1><h3></h3><blockquote></blockquote><ol><li></li></ol><s></s><code></code>'
+        b' style="text-align: center"<br><u></u><em></em><strong></strong><h2></h2><ul><li></li></ul>'
+        b'</p><p></p><p><strong></strong></p><p><em></em> the and of to a in is that for it with as on'
+    ),
+}
+JSON_DICTIONARY, HTML_DICTIONARY = 1, 2
+
+
+def compress(data: bytes, dictionary_id: int = 0) -> bytes:
+    """Frame ``data`` with a header, zlib-compressing it when that pays off."""
+    level = settings.CONTENT_COMPRESSION_LEVEL
+    if level > 0 and len(data) >= MIN_COMPRESS_BYTES:
+        if dictionary_id:
+            compressor = zlib.compressobj(level, zdict=DICTIONARIES[dictionary_id])
+        else:
+            compressor = zlib.compressobj(level)
+        packed = compressor.compress(data) + compressor.flush()
+        if len(packed) < len(data):
+            return bytes((FORMAT_VERSION, CODEC_ZLIB, dictionary_id)) + packed
+    return bytes((FORMAT_VERSION, CODEC_STORED, 0)) + data
+
+
+def decompress(blob: bytes) -> bytes:
+    """Inverse of :func:`compress`."""
+    version, codec, dictionary_id = blob[0], blob[1], blob[2]
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported compressed column format {version}")
+    if codec == CODEC_STORED:
+        return blob[3:]
+    if codec == CODEC_ZLIB:
+        if dictionary_id:
+            decompressor = zlib.decompressobj(zdict=DICTIONARIES[dictionary_id])
+        else:
+            decompressor = zlib.decompressobj()
+        return decompressor.decompress(blob[3:]) + decompressor.flush()
+    raise ValueError(f"Unknown compression codec {codec}")
+
+
+def encode_json(value: Any) -> Optional[bytes]:
+    if value is None:
+        return None
+    data = json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return compress(data, JSON_DICTIONARY)
+
+
+def encode_text(value: Optional[str]) -> Optional[bytes]:
+    return compress(value.encode("utf-8"), HTML_DICTIONARY) if value is not None else None
+
+
+class CompressedJSON(TypeDecorator):
+    """JSON value stored as a compressed BLOB (reads legacy JSON text too)."""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value: Any, dialect) -> Optional[bytes]:
+        return encode_json(value)
+
+    def process_result_value(self, value: Any, dialect) -> Any:
+        if value is None:
+            return None
+        if isinstance(value, str):  # written before compression
+            return json.loads(value)
+        return json.loads(decompress(value))
+
+
+class CompressedText(TypeDecorator):
+    """Text stored as a compressed BLOB (reads legacy TEXT too)."""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value: Optional[str], dialect) -> Optional[bytes]:
+        return encode_text(value)
+
+    def process_result_value(self, value: Any, dialect) -> Optional[str]:
+        if value is None or isinstance(value, str):
+            return value
+        return decompress(value).decode("utf-8")
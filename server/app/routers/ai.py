@@ -1,9 +1,19 @@
 """AI API router — text generation endpoints."""
 
+import asyncio
+import json
+from contextlib import aclosing
+from datetime import datetime
+from typing import Optional
+
 from pydantic import BaseModel, Field
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 
-from app.services.ai_service import generate_ai_content
+from app.config import settings
+from app.services.ai_jobs import FINISHED, QueueFull, job_queue
+from app.services.ai_service import FAST_ACTIONS, generate_ai_content, generate_batch, stream_ai_content
+from app.utils.auth import CurrentUser, require_user
 
 router = APIRouter(prefix="/api/ai", tags=["AI"])
 
@@ -14,6 +24,12 @@ class AiRequest(BaseModel):
         description="One of: summarize, fix_grammar, expand, title",
         pattern="^(summarize|fix_grammar|expand|title)$",
     )
+    force: bool = Field(default=False, description="Bypass the result cache and regenerate")
+    engine: str = Field(
+        default="llm",
+        description="llm (Groq) or fast (local extractive summaries/titles, no network)",
+        pattern="^(llm|fast)$",
+    )
 
 
 class AiResponse(BaseModel):
@@ -21,8 +37,183 @@ class AiResponse(BaseModel):
     action: str
 
 
+class AiBatchRequest(BaseModel):
+    items: list[AiRequest] = Field(min_length=1, max_length=settings.AI_BATCH_MAX_ITEMS)
+
+
+class AiBatchItemResult(BaseModel):
+    index: int                    # position in the request's ``items``
+    action: str
+    result: Optional[str] = None
+    error: Optional[str] = None
+
+
+class AiBatchResponse(BaseModel):
+    results: list[AiBatchItemResult]
+
+
+class AiJobResponse(BaseModel):
+    id: str
+    action: str
+    status: str                   # queued | running | done | failed
+    priority: int
+    result: Optional[str] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    model_config = {"from_attributes": True}
+
+
+def _check_engine(*items: AiRequest) -> None:
+    """400 for actions the requested engine cannot do, before anything runs."""
+    if any(item.engine == "fast" and item.action not in FAST_ACTIONS for item in items):
+        raise HTTPException(status_code=400, detail="fast engine supports summarize/title only")
+
+
 @router.post("/generate", response_model=AiResponse)
 async def generate(data: AiRequest):
     """Generate AI content (summarize, fix grammar, expand, suggest title)."""
-    result = await generate_ai_content(data.text, data.action)
+    _check_engine(data)
+    result = await generate_ai_content(data.text, data.action, force=data.force, engine=data.engine)
     return AiResponse(result=result or "", action=data.action)
+
+
+def _sse(event: str, payload: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+@router.post("/generate/stream")
+async def generate_stream(data: AiRequest, request: Request):
+    """
+    Stream AI content as Server-Sent Events.
+
+    Emits ``delta`` events (``{"text": ...}``) as tokens arrive, then a single
+    ``done`` event, or ``error`` if generation fails part-way. If the client
+    disconnects, the upstream generation is cancelled.
+    """
+    _check_engine(data)
+
+    async def events():
+        async with aclosing(stream_ai_content(data.text, data.action, force=data.force, engine=data.engine)) as deltas:
+            try:
+                async for delta in deltas:
+                    if await request.is_disconnected():
+                        return
+                    yield _sse("delta", {"text": delta})
+            except Exception:
+                yield _sse("error", {"detail": "AI generation failed"})
+                return
+        yield _sse("done", {"action": data.action})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/batch", response_model=AiBatchResponse)
+async def batch(data: AiBatchRequest, stream: bool = False):
+    """
+    Run several AI requests concurrently in one round trip.
+
+    Returns per-item results (in request order) or, with ``stream=true``,
+    NDJSON lines in completion order as each item finishes. Items that fail
+    carry ``error`` instead of ``result``; the rest of the batch still runs.
+    """
+    _check_engine(*data.items)
+    jobs = [(item.text, item.action, item.force, item.engine) for item in data.items]
+
+    def _item(index: int, result: Optional[str], error: Optional[str]) -> AiBatchItemResult:
+        return AiBatchItemResult(
+            index=index, action=data.items[index].action,
+            result=None if error else (result or ""), error=error,
+        )
+
+    if stream:
+        async def lines():
+            async with aclosing(generate_batch(jobs)) as finished:
+                async for index, result, error in finished:
+                    yield _item(index, result, error).model_dump_json() + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    results = []
+    async with aclosing(generate_batch(jobs)) as finished:
+        async for index, result, error in finished:
+            results.append(_item(index, result, error))
+    return AiBatchResponse(results=sorted(results, key=lambda r: r.index))
+
+
+# Seconds between keep-alive comments while an SSE client waits on a job
+JOB_WAIT_KEEPALIVE = 15
+
+
+@router.post("/jobs", response_model=AiJobResponse, status_code=202)
+async def create_job(data: AiRequest, user: CurrentUser = Depends(require_user)):
+    """
+    Queue an AI request and return its job id immediately. Jobs need a login:
+    the user id is both the fair-scheduling key and the only reader.
+
+    Poll ``GET /jobs/{id}`` or wait on ``GET /jobs/{id}/events`` for the
+    result. Titles run ahead of summaries and expansions, and each user's
+    jobs take turns with everyone else's.
+    """
+    _check_engine(data)
+    try:
+        job = await job_queue.submit(
+            user.id, data.text, data.action, force=data.force, engine=data.engine
+        )
+    except QueueFull:
+        raise HTTPException(status_code=429, detail="Too many unfinished AI jobs")
+    return job
+
+
+async def _own_job(job_id: str, user: CurrentUser):
+    """The caller's job, or 404 — other owners' jobs look missing."""
+    job = await job_queue.get(job_id)
+    if not job or job.owner != user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=AiJobResponse)
+async def get_job(job_id: str, user: CurrentUser = Depends(require_user)):
+    """Status of one of the caller's AI jobs, with its result once done."""
+    return await _own_job(job_id, user)
+
+
+@router.get("/jobs/{job_id}/events")
+async def wait_job(job_id: str, request: Request, user: CurrentUser = Depends(require_user)):
+    """
+    Wait for one of the caller's jobs over Server-Sent Events.
+
+    Emits a single ``done`` event carrying the job (status ``done`` or
+    ``failed``) as soon as it finishes; keep-alive comments are sent while it
+    is still queued or running.
+    """
+    await _own_job(job_id, user)
+
+    async def events():
+        finished = job_queue.watch(job_id)  # before reading, so the wakeup can't be missed
+        try:
+            while not await request.is_disconnected():
+                job = await job_queue.get(job_id)
+                if job is None or job.status in FINISHED:
+                    payload = AiJobResponse.model_validate(job).model_dump(mode="json") if job else {}
+                    yield _sse("done", payload)
+                    return
+                try:
+                    await asyncio.wait_for(finished.wait(), timeout=JOB_WAIT_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+        finally:
+            job_queue.unwatch(job_id, finished)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,40 +1,77 @@
 """Auth API router — signup and login (bonus feature)."""
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.user import User
 from app.schemas.user import TokenResponse, UserLogin, UserResponse, UserSignup
-from app.utils.auth import create_access_token, hash_password, verify_password
+from app.services.password_hasher import HasherOverloaded, password_hasher
+from app.utils.auth import create_access_token
 
 router = APIRouter(prefix="/api/auth", tags=["Auth"])
 
 
+def _overloaded() -> HTTPException:
+    return HTTPException(status_code=503, detail="Server busy, try again", headers={"Retry-After": "1"})
+
+
 @router.post("/signup", response_model=UserResponse, status_code=201)
-async def signup(data: UserSignup, db: AsyncSession = Depends(get_db)):
+async def signup(
+    data: UserSignup,
+    db: AsyncSession = Depends(get_db),
+    read_db: AsyncSession = Depends(get_read_db),
+):
     """Register a new user."""
-    # Check if email exists
-    existing = await db.execute(select(User).where(User.email == data.email))
-    if existing.scalar_one_or_none():
+    # Check if email exists (on the read pool, so the writer isn't held while hashing)
+    existing = (await read_db.execute(select(User.id).where(User.email == data.email))).scalar_one_or_none()
+    await read_db.close()  # with DB_READ_POOL_SIZE=0 its connection is the writer the commit needs
+    if existing:
         raise HTTPException(status_code=409, detail="Email already registered")
 
-    user = User(email=data.email, password_hash=hash_password(data.password))
+    try:
+        password_hash = await password_hasher.hash(data.password)
+    except HasherOverloaded:
+        raise _overloaded()
+
+    user = User(email=data.email, password_hash=password_hash)
     db.add(user)
-    await db.commit()
+    try:
+        await db.commit()
+    except IntegrityError:  # registered concurrently since the check above
+        raise HTTPException(status_code=409, detail="Email already registered")
     await db.refresh(user)
     return user
 
 
 @router.post("/login", response_model=TokenResponse)
-async def login(data: UserLogin, db: AsyncSession = Depends(get_db)):
+async def login(
+    data: UserLogin,
+    db: AsyncSession = Depends(get_db),
+    read_db: AsyncSession = Depends(get_read_db),
+):
     """Login and receive a JWT access token."""
-    result = await db.execute(select(User).where(User.email == data.email))
+    result = await read_db.execute(select(User).where(User.email == data.email))
     user = result.scalar_one_or_none()
+    await read_db.close()  # as in signup: the rehash below may need this connection as the writer
 
-    if not user or not verify_password(data.password, user.password_hash):
+    try:
+        valid = user is not None and await password_hasher.verify(data.password, user.password_hash)
+    except HasherOverloaded:
+        raise _overloaded()
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
+    if password_hasher.needs_rehash(user.password_hash):
+        # BCRYPT_ROUNDS changed since this password was stored; upgrade it now we know it
+        try:
+            password_hash = await password_hasher.hash(data.password)
+            await db.execute(update(User).where(User.id == user.id).values(password_hash=password_hash))
+            await db.commit()
+        except HasherOverloaded:
+            pass  # retried on a later login
+
     token = create_access_token({"sub": user.id, "email": user.email})
     return TokenResponse(access_token=token)
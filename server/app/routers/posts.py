@@ -1,66 +1,342 @@
-"""Posts API router — CRUD + publish endpoints."""
+"""Posts API router — CRUD, publish, bulk, search, revision and export/import endpoints."""
 
-from typing import Optional
+from typing import Literal, Optional, Union
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
-from app.schemas.post import PostCreate, PostListResponse, PostResponse, PostUpdate
-from app.services import post_service
+from app.database import get_db, get_read_db
+from app.schemas.post import (
+    PostBulkRequest,
+    PostBulkResponse,
+    PostBulkResult,
+    PostCreate,
+    PostImportResponse,
+    PostListResponse,
+    PostResponse,
+    PostSearchResponse,
+    PostSummaryListResponse,
+    PostUpdate,
+    RenderedPostResponse,
+    RevisionListResponse,
+    RevisionResponse,
+)
+from app.services import post_service, post_transfer, revision_service, search_service
+from app.utils.auth import CurrentUser, get_current_user
+from app.utils.etag import etag_matches, make_etag, version_etag
+from app.utils.json_patch import JsonPatchError, JsonPatchTestFailed
+from app.utils.pagination import InvalidCursor
 
 router = APIRouter(prefix="/api/posts", tags=["Posts"])
 
 
+def _parse_if_match(value: Optional[str]) -> Optional[int]:
+    """Read a post version from ``If-Match`` (``3``, ``"3"`` or ``W/"3"``; ``*`` = any)."""
+    if value is None or value.strip() == "*":
+        return None
+    tag = value.strip().removeprefix("W/").strip('"')
+    if not tag.isdigit():
+        raise HTTPException(status_code=400, detail="If-Match must carry a post version")
+    return int(tag)
+
+
 @router.post("/", response_model=PostResponse, status_code=201)
-async def create_post(data: PostCreate, db: AsyncSession = Depends(get_db)):
-    """Create a new draft post."""
-    post = await post_service.create_post(db, data)
+async def create_post(
+    data: PostCreate,
+    response: Response,
+    user: Optional[CurrentUser] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Create a new draft post owned by the caller."""
+    post = await post_service.create_post(db, data, author_id=user.id if user else None)
+    response.headers["ETag"] = version_etag(post.version)
     return post
 
 
-@router.get("/", response_model=PostListResponse)
+@router.get("/", response_model=Union[PostListResponse, PostSummaryListResponse])
 async def list_posts(
+    response: Response,
     status: Optional[str] = None,
-    skip: int = 0,
-    limit: int = 50,
+    skip: int = Query(default=0, ge=0),
+    limit: int = Query(default=50, ge=1),
+    after: Optional[str] = None,
+    include_total: Optional[bool] = None,
+    fields: Literal["full", "summary"] = "full",
+    if_none_match: Optional[str] = Header(default=None),
+    user: Optional[CurrentUser] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    List the caller's posts (anonymous callers see anonymous posts), optionally filtered by status.
+
+    Pass the returned ``next_cursor`` as ``after`` for keyset pagination; in that
+    mode ``total`` is only computed when ``include_total=true``.
+    ``fields=summary`` returns excerpts instead of the full Lexical/HTML content.
+    Responses carry an ``ETag``; a matching ``If-None-Match`` gets 304, decided
+    from the page's ids/versions alone.
+    """
+    if include_total is None:
+        include_total = after is None
+    author_id = user.id if user else None
+    params = (author_id, status, skip, limit, after, include_total, fields)
+    try:
+        if if_none_match:
+            keys, total, _ = await post_service.list_posts(
+                db, status=status, skip=skip, limit=limit, after=after,
+                include_total=include_total, projection="keys", author_id=author_id,
+            )
+            etag = make_etag(*params, post_service.page_fingerprint(keys, total))
+            if etag_matches(if_none_match, etag):
+                return Response(status_code=304, headers={"ETag": etag})
+
+        posts, total, next_cursor = await post_service.list_posts(
+            db, status=status, skip=skip, limit=limit, after=after,
+            include_total=include_total, projection=fields, author_id=author_id,
+        )
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+    response.headers["ETag"] = make_etag(*params, post_service.page_fingerprint(posts, total))
+    if fields == "summary":
+        return PostSummaryListResponse(posts=posts, total=total, next_cursor=next_cursor)
+    return PostListResponse(posts=posts, total=total, next_cursor=next_cursor)
+
+
+@router.post("/bulk", response_model=PostBulkResponse)
+async def bulk_update(
+    data: PostBulkRequest,
+    user: Optional[CurrentUser] = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """List all posts, optionally filtered by status."""
-    posts, total = await post_service.list_posts(db, status=status, skip=skip, limit=limit)
-    return PostListResponse(posts=posts, total=total)
+    """
+    Publish, unpublish or delete many of the caller's posts in one transaction.
 
+    Returns a result per distinct id; ids that do not exist or belong to
+    someone else are reported as ``not_found`` and left alone. Posts that
+    already have the requested status are ``ok`` with an unchanged version.
+    """
+    changed = await post_service.bulk_update(
+        db, data.ids, data.operation, author_id=user.id if user else None
+    )
+    return PostBulkResponse(results=[
+        PostBulkResult(id=post_id, status="ok", version=changed[post_id])
+        if post_id in changed else PostBulkResult(id=post_id, status="not_found")
+        for post_id in dict.fromkeys(data.ids)
+    ])
 
-@router.get("/{post_id}", response_model=PostResponse)
-async def get_post(post_id: str, db: AsyncSession = Depends(get_db)):
-    """Get a single post by ID."""
-    post = await post_service.get_post(db, post_id)
-    if not post:
+
+@router.get("/search", response_model=PostSearchResponse)
+async def search_posts(
+    q: str = Query(min_length=1, max_length=200),
+    limit: int = Query(default=20, ge=1, le=100),
+    after: Optional[str] = None,
+    user: Optional[CurrentUser] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Full-text search over the caller's post titles and content.
+
+    Every term must match (the last one as a prefix); hits are ranked by BM25
+    with title matches weighted above body matches. Pass ``next_cursor`` as
+    ``after`` for the next page.
+    """
+    try:
+        hits, next_cursor = await search_service.search_posts(
+            db, q, author_id=user.id if user else None, limit=limit, after=after,
+        )
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+    return PostSearchResponse(hits=hits, next_cursor=next_cursor)
+
+
+@router.get("/export")
+async def export_posts(user: Optional[CurrentUser] = Depends(get_current_user)):
+    """
+    Stream all of the caller's posts as NDJSON (one ``PostExport`` per line, oldest first).
+
+    Rows come from a server-side cursor, so memory use does not grow with the
+    number of posts. The output can be fed back to ``POST /api/posts/import``.
+    """
+    return StreamingResponse(
+        post_transfer.export_posts(user.id if user else None),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="posts.ndjson"'},
+    )
+
+
+@router.post("/import", response_model=PostImportResponse)
+async def import_posts(request: Request, user: Optional[CurrentUser] = Depends(get_current_user)):
+    """
+    Create posts owned by the caller from an NDJSON body (one ``PostImport`` per line).
+
+    The body is parsed as it arrives and written in batched transactions.
+    Invalid lines and ids that already exist are skipped and reported by line
+    number; everything else is imported.
+    """
+    return await post_transfer.import_posts(request.stream(), user.id if user else None)
+
+
+@router.get("/{post_id}", response_model=RenderedPostResponse)
+async def get_post(
+    post_id: str,
+    if_none_match: Optional[str] = Header(default=None),
+    user: Optional[CurrentUser] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Get a single post by ID (served from the read-through cache when warm).
+
+    Only the caller's own posts are found (anonymous posts when not logged
+    in). A matching ``If-None-Match`` gets 304 after a version-only lookup.
+    """
+    author_id = user.id if user else None
+    if if_none_match:
+        version = await post_service.get_post_version(db, post_id, author_id)
+        if version is not None and etag_matches(if_none_match, version_etag(version)):
+            return Response(status_code=304, headers={"ETag": version_etag(version)})
+
+    cached = await post_service.get_post_cached(db, post_id, author_id)
+    if not cached:
         raise HTTPException(status_code=404, detail="Post not found")
-    return post
+    return Response(
+        content=cached.body,
+        media_type="application/json",
+        headers={"ETag": version_etag(cached.version)},
+    )
 
 
 @router.patch("/{post_id}", response_model=PostResponse)
-async def update_post(post_id: str, data: PostUpdate, db: AsyncSession = Depends(get_db)):
-    """Update a post (used by auto-save)."""
-    post = await post_service.update_post(db, post_id, data)
+async def update_post(
+    post_id: str,
+    data: PostUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(default=None),
+    user: Optional[CurrentUser] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Update a post (used by auto-save).
+
+    Send either the full ``content_json`` or a JSON-Patch ``content_patch``.
+    ``If-Match: <version>`` makes the write conditional; stale clients get 409.
+    """
+    expected_version = _parse_if_match(if_match)
+    try:
+        post = await post_service.update_post(
+            db, post_id, data, expected_version=expected_version, author_id=user.id if user else None
+        )
+    except post_service.VersionConflict as e:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Post was modified (current version {e.current_version})",
+        )
+    except JsonPatchTestFailed as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except JsonPatchError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
+    response.headers["ETag"] = version_etag(post.version)
+    return post
+
+
+@router.get("/{post_id}/revisions", response_model=RevisionListResponse)
+async def list_revisions(
+    post_id: str,
+    limit: int = Query(default=50, ge=1, le=200),
+    after: Optional[str] = None,
+    user: Optional[CurrentUser] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    A post's revision history, newest first (content not included).
+
+    Autosaves older than a day are thinned to hourly, then daily, checkpoints.
+    Pass ``next_cursor`` as ``after`` for the next page.
+    """
+    if await post_service.get_post_version(db, post_id, user.id if user else None) is None:
+        raise HTTPException(status_code=404, detail="Post not found")
+    try:
+        revisions, next_cursor = await revision_service.list_revisions(db, post_id, limit=limit, after=after)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+    return RevisionListResponse(revisions=revisions, next_cursor=next_cursor)
+
+
+@router.get("/{post_id}/revisions/{revision_id}", response_model=RevisionResponse)
+async def get_revision(
+    post_id: str,
+    revision_id: int,
+    user: Optional[CurrentUser] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """One revision with its reconstructed content."""
+    if await post_service.get_post_version(db, post_id, user.id if user else None) is None:
+        raise HTTPException(status_code=404, detail="Post not found")
+    found = await revision_service.get_revision(db, post_id, revision_id)
+    if not found:
+        raise HTTPException(status_code=404, detail="Revision not found")
+    revision, content_json = found
+    return RevisionResponse(**revision._asdict(), content_json=content_json)
+
+
+@router.post("/{post_id}/revisions/{revision_id}/restore", response_model=PostResponse)
+async def restore_revision(
+    post_id: str,
+    revision_id: int,
+    response: Response,
+    if_match: Optional[str] = Header(default=None),
+    user: Optional[CurrentUser] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Make a revision's title and content current again.
+
+    The restore is a normal update: it bumps the version, is itself recorded
+    as a revision, and honours ``If-Match`` like PATCH.
+    """
+    author_id = user.id if user else None
+    if await post_service.get_post_version(db, post_id, author_id) is None:
+        raise HTTPException(status_code=404, detail="Post not found")
+    expected_version = _parse_if_match(if_match)
+    try:
+        post = await post_service.restore_revision(
+            db, post_id, revision_id, expected_version=expected_version, author_id=author_id
+        )
+    except post_service.VersionConflict as e:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Post was modified (current version {e.current_version})",
+        )
+    if not post:
+        raise HTTPException(status_code=404, detail="Revision not found")
+    response.headers["ETag"] = version_etag(post.version)
     return post
 
 
 @router.post("/{post_id}/publish", response_model=PostResponse)
-async def publish_post(post_id: str, db: AsyncSession = Depends(get_db)):
+async def publish_post(
+    post_id: str,
+    response: Response,
+    user: Optional[CurrentUser] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
     """Publish a draft post."""
-    post = await post_service.publish_post(db, post_id)
+    post = await post_service.publish_post(db, post_id, user.id if user else None)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
+    response.headers["ETag"] = version_etag(post.version)
     return post
 
 
 @router.delete("/{post_id}", status_code=204)
-async def delete_post(post_id: str, db: AsyncSession = Depends(get_db)):
+async def delete_post(
+    post_id: str,
+    user: Optional[CurrentUser] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
     """Delete a post."""
-    deleted = await post_service.delete_post(db, post_id)
+    deleted = await post_service.delete_post(db, post_id, user.id if user else None)
     if not deleted:
         raise HTTPException(status_code=404, detail="Post not found")
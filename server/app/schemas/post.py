@@ -1,9 +1,12 @@
 """Pydantic schemas for Post API requests/responses."""
 
 from datetime import datetime
-from typing import Any, Optional
+from typing import Any, Literal, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
+
+from app.config import settings
+from app.utils.lexical_html import render_html
 
 
 # ---------- Request schemas ----------
@@ -11,30 +14,164 @@ from pydantic import BaseModel, Field
 class PostCreate(BaseModel):
     title: str = Field(default="Untitled", max_length=500)
     content_json: Optional[dict[str, Any]] = None
-    content_html: Optional[str] = None
+    content_html: Optional[str] = Field(default=None, description="Ignored — rendered from content_json")
+
+
+class PatchOperation(BaseModel):
+    """A single RFC 6902 operation applied to the stored ``content_json``."""
+    op: Literal["add", "remove", "replace", "move", "copy", "test"]
+    path: str
+    value: Any = None
+    from_: Optional[str] = Field(default=None, alias="from")
+
+    model_config = {"populate_by_name": True}
 
 
 class PostUpdate(BaseModel):
     title: Optional[str] = Field(default=None, max_length=500)
     content_json: Optional[dict[str, Any]] = None
-    content_html: Optional[str] = None
+    content_html: Optional[str] = Field(default=None, description="Ignored — rendered from content_json")
+    content_patch: Optional[list[PatchOperation]] = None  # delta alternative to content_json
+
+    @model_validator(mode="after")
+    def _json_or_patch(self) -> "PostUpdate":
+        if self.content_json is not None and self.content_patch is not None:
+            raise ValueError("Send either content_json or content_patch, not both")
+        return self
+
+
+class PostBulkRequest(BaseModel):
+    ids: list[str] = Field(min_length=1, max_length=settings.BULK_MAX_IDS)
+    operation: Literal["publish", "unpublish", "delete"]
+
+
+class PostImport(BaseModel):
+    """One NDJSON line of ``POST /api/posts/import`` (the shape ``/export`` writes)."""
+    id: Optional[str] = Field(default=None, min_length=1, max_length=64)  # generated when omitted
+    title: str = Field(default="Untitled", max_length=500)
+    content_json: Optional[dict[str, Any]] = None
+    status: Literal["draft", "published"] = "draft"
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
 
 
 # ---------- Response schemas ----------
 
-class PostResponse(BaseModel):
+class OutlineEntry(BaseModel):
+    level: int                    # 1-6, from the heading tag
+    text: str
+
+
+class PostSummary(BaseModel):
+    """List-view projection — everything except the heavy content columns."""
     id: str
     title: str
-    content_json: Optional[dict[str, Any]] = None
-    content_html: Optional[str] = None
+    excerpt: Optional[str] = None
+    word_count: int = 0
+    char_count: int = 0
+    reading_minutes: int = 0
+    outline: Optional[list[OutlineEntry]] = None
     status: str
     author_id: Optional[str] = None
+    version: int = 1
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
 
     model_config = {"from_attributes": True}
 
 
+class PostResponse(PostSummary):
+    content_json: Optional[dict[str, Any]] = None
+    content_html: Optional[str] = None  # as stored: None for drafts edited since their last render
+
+
+class RenderedPostResponse(PostResponse):
+    """A post as read (GET / full list), with HTML rendered for drafts."""
+
+    @model_validator(mode="after")
+    def _render_html(self) -> "RenderedPostResponse":
+        # Drafts store no HTML (autosaves skip rendering); render on read instead
+        if self.content_html is None and self.content_json:
+            self.content_html = render_html(self.content_json)
+        return self
+
+
 class PostListResponse(BaseModel):
-    posts: list[PostResponse]
-    total: int
+    posts: list[RenderedPostResponse]
+    total: Optional[int] = None         # omitted in cursor mode unless include_total=true
+    next_cursor: Optional[str] = None   # pass as ?after= to fetch the next page
+
+
+class PostSummaryListResponse(BaseModel):
+    posts: list[PostSummary]
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
+
+
+class PostSearchHit(BaseModel):
+    id: str
+    title: str                    # matched terms wrapped in <mark>…</mark>
+    snippet: str                  # best-matching fragment of the body, highlighted the same way
+    status: str
+    updated_at: Optional[datetime] = None
+    score: float                  # BM25 relevance, higher is better
+
+
+class PostSearchResponse(BaseModel):
+    hits: list[PostSearchHit]
+    next_cursor: Optional[str] = None
+
+
+class RevisionSummary(BaseModel):
+    id: int
+    version: int                  # post version the revision recorded
+    title: str
+    content_hash: Optional[str] = None
+    kind: Optional[str] = None    # how the content is stored: "snapshot" | "diff"
+    created_at: Optional[datetime] = None
+
+    model_config = {"from_attributes": True}
+
+
+class RevisionResponse(RevisionSummary):
+    content_json: Optional[dict[str, Any]] = None
+
+
+class RevisionListResponse(BaseModel):
+    revisions: list[RevisionSummary]
+    next_cursor: Optional[str] = None
+
+
+class PostExport(BaseModel):
+    """One NDJSON line of ``GET /api/posts/export`` — the stored fields; derived ones are recomputed on import."""
+    id: str
+    title: str
+    content_json: Optional[dict[str, Any]] = None
+    status: str
+    author_id: Optional[str] = None
+    version: int = 1
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    model_config = {"from_attributes": True}
+
+
+class PostImportError(BaseModel):
+    line: int                     # 1-based line number in the request body
+    error: str
+
+
+class PostImportResponse(BaseModel):
+    imported: int
+    failed: int
+    errors: list[PostImportError]  # up to IMPORT_MAX_ERRORS failures, sorted by line
+
+
+class PostBulkResult(BaseModel):
+    id: str
+    status: Literal["ok", "not_found"]  # not_found also covers other authors' posts
+    version: Optional[int] = None       # current version, bumped only if changed (None after delete)
+
+
+class PostBulkResponse(BaseModel):
+    results: list[PostBulkResult]       # one per distinct id, in request order
@@ -0,0 +1,123 @@
+"""Content-addressed cache for AI results.
+
+Keys are a hash of (action, model, prompt template, input text), so any change
+to the text, the model or the prompt wording produces a fresh generation. A
+memory LRU serves hot keys; with ``AI_CACHE_PERSISTENT`` a SQLite table keeps
+results across restarts, bounded by TTL and ``AI_CACHE_PERSISTENT_MAX_ENTRIES``.
+"""
+
+import hashlib
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from sqlalchemy import delete, func, select
+
+from app.config import settings
+from app.database import async_session
+from app.models.ai_cache import AiCacheEntry
+from app.utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key(action: str, model: str, template: str, text: str) -> str:
+    digest = hashlib.sha256()
+    for part in (action, model, template, text):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+class AiResultCache:
+    def __init__(self, session_factory, persistent: bool, ttl: float, max_rows: int):
+        self._session_factory = session_factory
+        self.persistent = persistent
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self.memory: LRUCache[str, str] = LRUCache(
+            max_entries=settings.AI_CACHE_MAX_ENTRIES,
+            max_bytes=settings.AI_CACHE_MAX_BYTES,
+            ttl=ttl,
+            sizeof=lambda result: len(result.encode("utf-8")),
+        )
+        self.persistent_hits = 0
+        self.persistent_errors = 0
+
+    async def get(self, key: str) -> Optional[str]:
+        result = self.memory.get(key)
+        if result is not None or not self.persistent:
+            return result
+
+        try:
+            async with self._session_factory() as db:
+                row = (
+                    await db.execute(
+                        select(AiCacheEntry.result, AiCacheEntry.expires_at).where(AiCacheEntry.key == key)
+                    )
+                ).one_or_none()
+        except Exception as e:
+            self.persistent_errors += 1
+            logger.warning(f"AI cache read failed: {e}")
+            return None
+
+        if row is None or row.expires_at <= _utcnow_naive():
+            return None
+        self.persistent_hits += 1
+        self.memory.set(key, row.result)
+        return row.result
+
+    async def set(self, key: str, action: str, model: str, result: str) -> None:
+        self.memory.set(key, result)
+        if not self.persistent:
+            return
+
+        try:
+            async with self._session_factory() as db:
+                await db.merge(
+                    AiCacheEntry(
+                        key=key,
+                        action=action,
+                        model=model,
+                        result=result,
+                        expires_at=datetime.now(timezone.utc) + timedelta(seconds=self.ttl),
+                    )
+                )
+                await self._evict(db)
+                await db.commit()
+        except Exception as e:
+            self.persistent_errors += 1
+            logger.warning(f"AI cache write failed: {e}")
+
+    async def _evict(self, db) -> None:
+        """Drop expired rows, then the oldest rows beyond ``max_rows``."""
+        await db.execute(delete(AiCacheEntry).where(AiCacheEntry.expires_at <= _utcnow_naive()))
+        count = (await db.execute(select(func.count()).select_from(AiCacheEntry))).scalar() or 0
+        if count > self.max_rows:
+            oldest = (
+                select(AiCacheEntry.key)
+                .order_by(AiCacheEntry.created_at)
+                .limit(count - self.max_rows)
+            )
+            await db.execute(delete(AiCacheEntry).where(AiCacheEntry.key.in_(oldest)))
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            **self.memory.stats(),
+            "persistent": self.persistent,
+            "persistent_hits": self.persistent_hits,
+            "persistent_errors": self.persistent_errors,
+        }
+
+
+def _utcnow_naive() -> datetime:
+    # SQLite DATETIME columns round-trip without tzinfo
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+ai_cache = AiResultCache(
+    async_session,
+    persistent=settings.AI_CACHE_PERSISTENT,
+    ttl=settings.AI_CACHE_TTL_SECONDS,
+    max_rows=settings.AI_CACHE_PERSISTENT_MAX_ENTRIES,
+)
@@ -0,0 +1,74 @@
+"""Split long AI inputs into prompt-sized chunks for map-reduce processing.
+
+Chunks are contiguous slices of the input, so concatenating them gives the
+original text back (whitespace included). Boundaries fall on paragraph ends,
+then sentence ends, and only as a last resort mid-sentence. Chunk edges are
+also content-defined: a paragraph whose hash hits an anchor value closes its
+chunk, so an edit only shifts boundaries up to the next anchor. Unchanged
+chunks then keep hitting the AI cache.
+"""
+
+import hashlib
+import re
+
+CHARS_PER_TOKEN = 4   # rough average for English prose with Llama tokenizers
+ANCHOR_MODULUS = 4    # ~1 in 4 paragraphs closes a chunk early
+ANCHOR_MIN_CHARS = 80  # headings and one-liners never anchor (avoids tiny chunks)
+
+_PARAGRAPHS = re.compile(r".*?(?:\n[ \t]*\n\s*|\Z)", re.S)
+_SENTENCES = re.compile(r".*?(?:[.!?][\"')\]]*\s+|\Z)", re.S)
+
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def _pieces(pattern: re.Pattern, text: str) -> list[str]:
+    return [m.group(0) for m in pattern.finditer(text) if m.group(0)]
+
+
+def _units(text: str, limit: int) -> list[str]:
+    """Paragraphs, with any paragraph longer than ``limit`` chars split further."""
+    units: list[str] = []
+    for paragraph in _pieces(_PARAGRAPHS, text):
+        if len(paragraph) <= limit:
+            units.append(paragraph)
+            continue
+        for sentence in _pieces(_SENTENCES, paragraph):
+            units.extend(sentence[i:i + limit] for i in range(0, len(sentence), limit))
+    return units
+
+
+def _is_anchor(unit: str) -> bool:
+    # Must depend on the unit alone, so boundaries resync right after an edit
+    if len(unit) < ANCHOR_MIN_CHARS:
+        return False
+    digest = hashlib.blake2b(unit.strip().encode("utf-8"), digest_size=4).digest()
+    return int.from_bytes(digest, "big") % ANCHOR_MODULUS == 0
+
+
+def split_text(text: str, max_tokens: int) -> list[str]:
+    """Split ``text`` into chunks of at most ~``max_tokens`` tokens each."""
+    limit = max_tokens * CHARS_PER_TOKEN
+
+    chunks: list[str] = []
+    current = ""
+    for unit in _units(text, limit):
+        if current and len(current) + len(unit) > limit:
+            chunks.append(current)
+            current = ""
+        current += unit
+        if _is_anchor(unit):
+            chunks.append(current)
+            current = ""
+    if current:
+        chunks.append(current)
+
+    # Whitespace-only leftovers ride along with the previous chunk
+    merged: list[str] = []
+    for chunk in chunks:
+        if merged and not chunk.strip():
+            merged[-1] += chunk
+        else:
+            merged.append(chunk)
+    return merged
@@ -0,0 +1,165 @@
+"""Shared async Groq client — pooled HTTP, bounded concurrency, timeouts and retries.
+
+Replaces running the sync SDK on the default thread pool: one ``AsyncGroq``
+instance owns a single pooled ``httpx.AsyncClient``, a semaphore caps how many
+completions run at once (callers queue for a slot, and the wait is measured),
+every attempt has its own timeout, and transient failures are retried with
+full-jitter exponential backoff.
+"""
+
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional
+
+import httpx
+from groq import APIConnectionError, APIStatusError, AsyncGroq
+
+from app.config import settings
+
+
+def _is_retryable(exc: Exception) -> bool:
+    """Connection problems, timeouts, rate limits and 5xx are worth retrying."""
+    if isinstance(exc, (APIConnectionError, asyncio.TimeoutError)):  # incl. APITimeoutError
+        return True
+    if isinstance(exc, APIStatusError):
+        return exc.status_code == 429 or exc.status_code >= 500
+    return False
+
+
+class AiClient:
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        model: str = settings.GROQ_MODEL,
+        max_concurrency: int = settings.AI_MAX_CONCURRENCY,
+        timeout: float = settings.AI_TIMEOUT_SECONDS,
+        max_retries: int = settings.AI_MAX_RETRIES,
+        backoff: float = settings.AI_RETRY_BACKOFF_SECONDS,
+        backoff_max: float = settings.AI_RETRY_BACKOFF_MAX_SECONDS,
+        http_client: Optional[httpx.AsyncClient] = None,
+    ):
+        self.model = model
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.max_concurrency = max_concurrency
+
+        self._http = http_client or httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_concurrency,
+                max_keepalive_connections=max_concurrency,
+            ),
+        )
+        # Retries are ours (so they are counted and jittered); the SDK's are disabled
+        self._sdk = AsyncGroq(
+            api_key=api_key,
+            base_url=base_url or None,
+            max_retries=0,
+            timeout=timeout,
+            http_client=self._http,
+        )
+        self._slots = asyncio.Semaphore(max_concurrency)
+
+        self.waiting = 0
+        self.in_flight = 0
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.queue_time_total = 0.0
+        self.queue_time_max = 0.0
+
+    @asynccontextmanager
+    async def _slot(self):
+        """Wait for a concurrency slot, recording how long the caller queued."""
+        self.waiting += 1
+        started = time.perf_counter()
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        waited = time.perf_counter() - started
+        self.queue_time_total += waited
+        self.queue_time_max = max(self.queue_time_max, waited)
+
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+    def _delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff: uniform(0, min(cap, base * 2^attempt))."""
+        return random.uniform(0, min(self.backoff_max, self.backoff * 2 ** attempt))
+
+    def _request(self, prompt: str, **params: Any) -> dict[str, Any]:
+        return {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": 0.7,
+            "max_tokens": 1024,
+            **params,
+        }
+
+    async def _with_retries(self, call):
+        """Await ``call()`` under the per-attempt timeout, retrying transient failures."""
+        attempt = 0
+        while True:
+            try:
+                return await asyncio.wait_for(call(), timeout=self.timeout)
+            except Exception as e:
+                if attempt >= self.max_retries or not _is_retryable(e):
+                    self.failures += 1
+                    raise
+                self.retries += 1
+                await asyncio.sleep(self._delay(attempt))
+                attempt += 1
+
+    async def complete(self, prompt: str, **params: Any) -> str:
+        """Run one chat completion and return the message text."""
+        self.calls += 1
+        async with self._slot():
+            response = await self._with_retries(
+                lambda: self._sdk.chat.completions.create(**self._request(prompt, **params))
+            )
+        return response.choices[0].message.content
+
+    async def stream(self, prompt: str, **params: Any) -> AsyncIterator[str]:
+        """
+        Stream a chat completion as text deltas.
+
+        Opening the stream is retried like :meth:`complete`; once tokens have
+        been yielded a failure is raised to the caller. Closing the iterator
+        closes the upstream HTTP response immediately.
+        """
+        self.calls += 1
+        async with self._slot():
+            upstream = await self._with_retries(
+                lambda: self._sdk.chat.completions.create(**self._request(prompt, stream=True, **params))
+            )
+            try:
+                async for chunk in upstream:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        yield delta
+            finally:
+                await upstream.close()
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "calls": self.calls,
+            "retries": self.retries,
+            "failures": self.failures,
+            "queue_time_avg_ms": round(1000 * self.queue_time_total / self.calls, 2) if self.calls else 0.0,
+            "queue_time_max_ms": round(1000 * self.queue_time_max, 2),
+        }
@@ -0,0 +1,233 @@
+"""Background AI job queue — persisted jobs, priority classes, per-owner fairness.
+
+Jobs are rows in ``ai_jobs``; the scheduling state lives in memory and is
+rebuilt from the table on start, so queued jobs (and jobs interrupted by a
+shutdown) survive restarts. Workers always take the cheapest non-empty
+priority class first ("title" before "expand"); inside a class, owners are
+served round-robin, so one user's bulk submission interleaves with everyone
+else's requests instead of running ahead of them. Like the write-behind
+buffer, scheduling is per process.
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, NamedTuple, Optional
+
+from sqlalchemy import delete, select, update
+
+from app.config import settings
+from app.database import async_session
+from app.models.ai_job import AiJob
+from app.services import ai_service
+
+logger = logging.getLogger(__name__)
+
+# Lower runs first; unknown actions go last
+PRIORITIES = {"title": 0, "summarize": 1, "fix_grammar": 1, "expand": 2}
+FINISHED = ("done", "failed")
+
+
+class QueueFull(Exception):
+    """The owner already has the maximum number of unfinished jobs."""
+
+
+class _Pending(NamedTuple):
+    id: str
+    owner: str
+    text: str
+    action: str
+    force: bool
+    engine: str
+
+
+class AiJobQueue:
+    def __init__(self, session_factory, workers: int, max_pending_per_owner: int, retention_hours: float):
+        self._session_factory = session_factory
+        self.workers = workers
+        self.max_pending_per_owner = max_pending_per_owner
+        self.retention = timedelta(hours=retention_hours)
+
+        # priority -> owner -> that owner's jobs; owner order is the round-robin order
+        self._classes: dict[int, OrderedDict[str, deque[_Pending]]] = {}
+        self._unfinished: dict[str, int] = {}          # owner -> queued + running jobs
+        self._watchers: dict[str, set[asyncio.Event]] = {}  # job id -> events set when it finishes
+        self._available: Optional[asyncio.Semaphore] = None  # counts queued jobs once started
+        self._tasks: list[asyncio.Task] = []
+        self.running = 0
+
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.recovered = 0
+
+    # ---------- Submitting / reading ----------
+
+    async def submit(self, owner: str, text: str, action: str, force: bool = False, engine: str = "llm") -> AiJob:
+        """Persist a job and queue it.
+
+        Raises:
+            QueueFull: if ``owner`` already has ``max_pending_per_owner`` unfinished jobs.
+        """
+        if self._unfinished.get(owner, 0) >= self.max_pending_per_owner:
+            raise QueueFull(owner)
+
+        job = AiJob(
+            owner=owner, text=text, action=action, force=force, engine=engine,
+            priority=PRIORITIES.get(action, max(PRIORITIES.values()) + 1),
+        )
+        async with self._session_factory() as db:
+            db.add(job)
+            await db.commit()
+            await db.refresh(job)
+
+        self.submitted += 1
+        self._enqueue(job)
+        return job
+
+    async def get(self, job_id: str) -> Optional[AiJob]:
+        async with self._session_factory() as db:
+            return await db.get(AiJob, job_id)
+
+    def watch(self, job_id: str) -> asyncio.Event:
+        """A new event set when ``job_id`` finishes. Register it *before* reading the job's status."""
+        event = asyncio.Event()
+        self._watchers.setdefault(job_id, set()).add(event)
+        return event
+
+    def unwatch(self, job_id: str, event: asyncio.Event) -> None:
+        """Drop one watcher's event; other watchers of the job keep theirs."""
+        events = self._watchers.get(job_id)
+        if events is not None:
+            events.discard(event)
+            if not events:
+                del self._watchers[job_id]
+
+    # ---------- Scheduling ----------
+
+    def _enqueue(self, job: AiJob) -> None:
+        owners = self._classes.setdefault(job.priority, OrderedDict())
+        owners.setdefault(job.owner, deque()).append(
+            _Pending(job.id, job.owner, job.text, job.action, job.force, job.engine)
+        )
+        self._unfinished[job.owner] = self._unfinished.get(job.owner, 0) + 1
+        if self._available is not None:
+            self._available.release()
+
+    def _next(self) -> _Pending:
+        """Oldest job of the next owner in line, from the cheapest non-empty class."""
+        priority = min(self._classes)
+        owners = self._classes[priority]
+        owner, jobs = next(iter(owners.items()))
+        job = jobs.popleft()
+        if jobs:
+            owners.move_to_end(owner)
+        else:
+            del owners[owner]
+            if not owners:
+                del self._classes[priority]
+        return job
+
+    def _release(self, owner: str) -> None:
+        remaining = self._unfinished.get(owner, 1) - 1
+        if remaining > 0:
+            self._unfinished[owner] = remaining
+        else:
+            self._unfinished.pop(owner, None)
+
+    # ---------- Workers ----------
+
+    async def _set(self, job_id: str, **values: Any) -> None:
+        async with self._session_factory() as db:
+            await db.execute(update(AiJob).where(AiJob.id == job_id).values(**values))
+            await db.commit()
+
+    async def _process(self, job: _Pending) -> None:
+        await self._set(job.id, status="running", started_at=datetime.now(timezone.utc))
+        try:
+            result = await ai_service.generate_ai_content(
+                job.text, job.action, force=job.force, engine=job.engine
+            )
+            values = {"status": "done", "result": result or ""}
+            self.completed += 1
+        except Exception as e:
+            logger.error(f"AI job {job.id} failed: {e}")
+            values = {"status": "failed", "error": "AI generation failed"}
+            self.failed += 1
+        await self._set(job.id, **values, finished_at=datetime.now(timezone.utc))
+
+        for event in self._watchers.pop(job.id, ()):
+            event.set()
+
+    async def _work(self) -> None:
+        while True:
+            await self._available.acquire()
+            job = self._next()
+            self.running += 1
+            try:
+                await self._process(job)
+            except Exception as e:
+                # DB unavailable: the row stays queued/running and is retried on the next start
+                logger.error(f"AI job {job.id} could not be recorded: {e}")
+            finally:
+                self.running -= 1
+                self._release(job.owner)
+
+    # ---------- Lifecycle ----------
+
+    async def start(self) -> None:
+        """Prune old jobs, requeue unfinished ones, and start the workers."""
+        if self._tasks:
+            return
+        # Rebuilt from the table, which also holds anything submitted while stopped
+        self._classes.clear()
+        self._unfinished.clear()
+
+        async with self._session_factory() as db:
+            cutoff = datetime.now(timezone.utc) - self.retention
+            await db.execute(delete(AiJob).where(AiJob.status.in_(FINISHED), AiJob.finished_at < cutoff))
+            interrupted = await db.execute(
+                update(AiJob).where(AiJob.status == "running").values(status="queued", started_at=None)
+            )
+            self.recovered += interrupted.rowcount
+            queued = await db.execute(
+                select(AiJob).where(AiJob.status == "queued").order_by(AiJob.created_at)
+            )
+            jobs = queued.scalars().all()
+            await db.commit()
+
+        self._available = asyncio.Semaphore(0)
+        for job in jobs:
+            self._enqueue(job)
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Cancel the workers; unfinished jobs stay in the table and are requeued on the next start."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._available = None
+        self._classes.clear()
+        self._unfinished.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "workers": len(self._tasks),
+            "queued": sum(len(jobs) for owners in self._classes.values() for jobs in owners.values()),
+            "running": self.running,
+            "owners": len(self._unfinished),
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "recovered": self.recovered,
+        }
+
+
+job_queue = AiJobQueue(
+    async_session,
+    workers=settings.AI_JOB_WORKERS,
+    max_pending_per_owner=settings.AI_JOB_MAX_PENDING_PER_OWNER,
+    retention_hours=settings.AI_JOB_RETENTION_HOURS,
+)
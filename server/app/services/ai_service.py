@@ -1,16 +1,67 @@
 """AI service — wraps Groq API for text generation."""
 
+import asyncio
 import logging
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Callable, Optional
 
 from app.config import settings
+from app.services import local_ai
+from app.services.ai_cache import ai_cache, cache_key
+from app.services.ai_chunking import estimate_tokens, split_text
+from app.services.ai_client import AiClient
+from app.utils.singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
 _client = None
+_inflight = SingleFlight()
+_local_pool: Optional[ThreadPoolExecutor] = None  # created on first use
 
+PROMPTS = {
+    "summarize": (
+        "You are an expert blog editor. Summarize the following blog post content "
+        "into 2-3 concise sentences that capture the key points:\n\n"
+        "{text}"
+    ),
+    "fix_grammar": (
+        "You are an expert editor. Fix the grammar, spelling, and punctuation in the "
+        "following text. Return ONLY the corrected text, nothing else:\n\n"
+        "{text}"
+    ),
+    "expand": (
+        "You are an expert blog writer. Expand on the following text, adding more detail, "
+        "examples, and depth. Keep the same tone and style:\n\n"
+        "{text}"
+    ),
+    "title": (
+        "You are an expert blog editor. Suggest 3 compelling blog post titles for the "
+        "following content. Return them as a numbered list:\n\n"
+        "{text}"
+    ),
+    # Internal map-reduce steps for inputs longer than AI_CHUNK_TOKENS
+    "summarize_section": (
+        "You are an expert blog editor. The following is one section of a longer blog "
+        "post. Summarize it in 1-2 concise sentences that capture its key points:\n\n"
+        "{text}"
+    ),
+    "summarize_sections": (
+        "You are an expert blog editor. The following are summaries of consecutive "
+        "sections of one blog post. Combine them into 2-3 concise sentences that "
+        "capture the key points of the whole post:\n\n"
+        "{text}"
+    ),
+}
 
-def _get_client():
+# Actions whose long inputs are split, processed per chunk, then reduced
+CHUNKED_ACTIONS = {"summarize", "fix_grammar"}
+
+# Actions the local "fast" engine can do; the rest need the LLM
+FAST_ACTIONS = {"summarize", "title"}
+
+
+def _get_client() -> Optional[AiClient]:
     global _client
     if _client is not None:
         return _client
@@ -19,92 +70,257 @@ def _get_client():
         return None
 
     try:
-        from groq import Groq
-        _client = Groq(api_key=settings.GROQ_API_KEY)
+        _client = AiClient(api_key=settings.GROQ_API_KEY, base_url=settings.GROQ_BASE_URL)
         return _client
     except Exception as e:
         logger.warning(f"Groq API init failed: {e}")
         return None
 
 
-async def generate_ai_content(text: str, action: str) -> Optional[str]:
+async def generate_ai_content(
+    text: str,
+    action: str,
+    force: bool = False,
+    engine: str = "llm",
+) -> Optional[str]:
     """
     Generate AI content based on the action type.
 
+    Results are cached by (action, model, prompt template, text); identical
+    requests are answered from the cache unless ``force`` is set, and
+    identical requests that arrive while one is still running await it
+    instead of calling Groq again. Long summarize / fix_grammar inputs are
+    processed chunk by chunk (see :func:`_generate_chunked`).
+
     Args:
         text: The input text from the blog post.
         action: One of "summarize", "fix_grammar", "expand", "title".
+        force: Skip the cache lookup and regenerate (the new result is cached).
+        engine: "llm" (Groq) or "fast" (local extractive engine, no network;
+            only the :data:`FAST_ACTIONS`).
 
     Returns:
         The generated text, or a fallback message if API is unavailable.
+
+    Raises:
+        ValueError: if the fast engine is asked for an action it cannot do.
     """
+    if engine == "fast":
+        return await _run_local(_local_response, text, action)
+
     client = _get_client()
 
     if client is None:
-        return _fallback_response(text, action)
-
-    prompts = {
-        "summarize": (
-            "You are an expert blog editor. Summarize the following blog post content "
-            "into 2-3 concise sentences that capture the key points:\n\n"
-            f"{text}"
-        ),
-        "fix_grammar": (
-            "You are an expert editor. Fix the grammar, spelling, and punctuation in the "
-            "following text. Return ONLY the corrected text, nothing else:\n\n"
-            f"{text}"
-        ),
-        "expand": (
-            "You are an expert blog writer. Expand on the following text, adding more detail, "
-            "examples, and depth. Keep the same tone and style:\n\n"
-            f"{text}"
-        ),
-        "title": (
-            "You are an expert blog editor. Suggest 3 compelling blog post titles for the "
-            "following content. Return them as a numbered list:\n\n"
-            f"{text}"
-        ),
-    }
-
-    prompt = prompts.get(action)
-    if not prompt:
+        return await _run_local(_fallback_response, text, action)
+
+    if action not in PROMPTS:
         return f"Unknown action: {action}"
 
     try:
-        response = await _async_generate(client, prompt)
-        return response
+        if action in CHUNKED_ACTIONS and estimate_tokens(text) > settings.AI_CHUNK_TOKENS:
+            return await _generate_chunked(client, text, action, force)
+        return await _generate(client, text, action, force)
     except Exception as e:
         logger.error(f"Groq API error: {e}")
-        return _fallback_response(text, action)
+        return await _run_local(_fallback_response, text, action)
+
+
+async def _generate(client: AiClient, text: str, action: str, force: bool) -> str:
+    """One prompt through the cache and single-flight layers; raises on upstream failure."""
+    template = PROMPTS[action]
+    key = cache_key(action, settings.GROQ_MODEL, template, text)
+    if not force:
+        cached = await ai_cache.get(key)
+        if cached is not None:
+            return cached
+
+    async def _generate_and_cache() -> str:
+        response = await _async_generate(client, template.format(text=text))
+        if response:
+            await ai_cache.set(key, action, settings.GROQ_MODEL, response)
+        return response
+
+    # Identical requests already in flight share one upstream call
+    return await _inflight.do(key, _generate_and_cache)
+
+
+async def _generate_chunked(client: AiClient, text: str, action: str, force: bool) -> str:
+    """
+    Map-reduce over prompt-sized chunks of ``text``.
+
+    Chunks run in parallel (up to ``AI_CHUNK_PARALLELISM``) and each is cached
+    on its own, so re-running on a lightly edited post only regenerates the
+    chunks that changed. fix_grammar concatenates the corrected chunks in
+    order; summarize combines the section summaries in one final reduce, or
+    map-reduces them again if they are still too long for one prompt.
+    """
+    slots = asyncio.Semaphore(settings.AI_CHUNK_PARALLELISM)
+    map_action = "summarize_section" if action == "summarize" else action
+
+    async def _map(chunk: str) -> str:
+        body = chunk.strip()
+        if not body:
+            return chunk
+        async with slots:
+            result = await _generate(client, body, map_action, force)
+        # Keep the whitespace that separated this chunk from its neighbours
+        lead = chunk[: len(chunk) - len(chunk.lstrip())]
+        trail = chunk[len(chunk.rstrip()):]
+        return f"{lead}{result.strip()}{trail}"
 
+    parts = await asyncio.gather(*(_map(c) for c in split_text(text, settings.AI_CHUNK_TOKENS)))
+    if action == "fix_grammar":
+        return "".join(parts)
 
-async def _async_generate(client, prompt: str) -> str:
-    """Run the Groq API call in a thread to avoid blocking."""
-    import asyncio
-    loop = asyncio.get_event_loop()
+    combined = "\n\n".join(p.strip() for p in parts if p.strip())
+    if estimate_tokens(combined) > settings.AI_CHUNK_TOKENS and len(parts) > 1:
+        return await _generate_chunked(client, combined, "summarize", force)  # ends in the one final reduce
+    return await _generate(client, combined, "summarize_sections", force)
 
-    def _call():
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7,
-            max_tokens=1024,
-        )
-        return response.choices[0].message.content
 
-    return await loop.run_in_executor(None, _call)
+async def generate_batch(
+    jobs: list[tuple[str, str, bool, str]],
+    concurrency: int = settings.AI_BATCH_CONCURRENCY,
+) -> AsyncIterator[tuple[int, Optional[str], Optional[str]]]:
+    """
+    Run many ``(text, action, force, engine)`` jobs through :func:`generate_ai_content`.
+
+    At most ``concurrency`` jobs run at once. Yields ``(index, result, error)``
+    in completion order; closing the iterator early cancels unfinished jobs.
+    """
+    slots = asyncio.Semaphore(concurrency)
+
+    async def _run(index: int, text: str, action: str, force: bool, engine: str):
+        async with slots:
+            try:
+                return index, await generate_ai_content(text, action, force=force, engine=engine), None
+            except Exception as e:
+                logger.error(f"Batch item {index} failed: {e}")
+                return index, None, "AI generation failed"
+
+    tasks = [asyncio.create_task(_run(i, *job)) for i, job in enumerate(jobs)]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def stream_ai_content(
+    text: str,
+    action: str,
+    force: bool = False,
+    engine: str = "llm",
+) -> AsyncIterator[str]:
+    """
+    Streaming variant of :func:`generate_ai_content` — yields text deltas as they arrive.
+
+    Cache hits, the fast engine and offline fallbacks are yielded as a single
+    chunk. The full streamed result is cached once the model finishes. Closing
+    the generator early (client disconnect) stops the upstream generation.
+    """
+    if engine == "fast":
+        yield await _run_local(_local_response, text, action)
+        return
+
+    client = _get_client()
+
+    if client is None:
+        yield await _run_local(_fallback_response, text, action)
+        return
+
+    template = PROMPTS.get(action)
+    if not template:
+        yield f"Unknown action: {action}"
+        return
+
+    key = cache_key(action, settings.GROQ_MODEL, template, text)
+    if not force:
+        cached = await ai_cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+
+    parts: list[str] = []
+    try:
+        async with aclosing(_async_stream(client, template.format(text=text))) as deltas:
+            async for delta in deltas:
+                parts.append(delta)
+                yield delta
+    except Exception as e:
+        logger.error(f"Groq API streaming error: {e}")
+        if parts:
+            raise
+        yield await _run_local(_fallback_response, text, action)
+        return
+
+    if parts:
+        await ai_cache.set(key, action, settings.GROQ_MODEL, "".join(parts))
+
+
+async def _async_stream(client: AiClient, prompt: str) -> AsyncIterator[str]:
+    """Stream deltas from the shared async client (closing it cancels the upstream call)."""
+    async with aclosing(client.stream(prompt)) as deltas:
+        async for delta in deltas:
+            yield delta
+
+
+async def _async_generate(client: AiClient, prompt: str) -> str:
+    """Run one completion on the shared async client (pooled, bounded, retried)."""
+    return await client.complete(prompt)
+
+
+async def close_client() -> None:
+    """Release the pooled HTTP connections and the local engine's threads (called on shutdown)."""
+    global _client, _local_pool
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+    if _local_pool is not None:
+        _local_pool.shutdown(wait=False)
+        _local_pool = None
+
+
+def client_stats() -> Optional[dict]:
+    return _client.stats() if _client is not None else None
+
+
+def inflight_stats() -> dict:
+    return _inflight.stats()
+
+
+async def _run_local(fn: Callable[..., Any], *args: Any) -> Any:
+    """
+    Run local-engine work off the event loop, like password hashing.
+
+    TextRank and keyphrase extraction take milliseconds of CPU per call;
+    inline, a batch of fast-engine items would stall every other request.
+    At most ``AI_LOCAL_WORKERS`` run at once; the rest wait their turn.
+    """
+    global _local_pool
+    if _local_pool is None:
+        _local_pool = ThreadPoolExecutor(max_workers=settings.AI_LOCAL_WORKERS, thread_name_prefix="local-ai")
+    return await asyncio.get_running_loop().run_in_executor(_local_pool, fn, *args)
+
+
+def _local_response(text: str, action: str) -> str:
+    """The "fast" tier: local extractive summary / keyphrase titles, no network."""
+    if action == "summarize":
+        return local_ai.summarize(text)
+    if action == "title":
+        return local_ai.suggest_titles(text) or _fallback_response(text, action)
+    raise ValueError("fast engine supports summarize/title only")
 
 
 def _fallback_response(text: str, action: str) -> str:
     """Provide a fallback when Groq API is not available."""
     if action == "summarize":
-        words = text.split()
-        summary = " ".join(words[:30])
-        return f"Summary (offline): {summary}{'...' if len(words) > 30 else ''}"
+        return f"Summary (offline): {local_ai.summarize(text)}"
     elif action == "fix_grammar":
         return text
     elif action == "expand":
         return f"{text}\n\n[AI expansion unavailable — configure GROQ_API_KEY in .env]"
     elif action == "title":
-        return "1. [AI titles unavailable — configure GROQ_API_KEY in .env]"
+        return local_ai.suggest_titles(text) or "1. [AI titles unavailable — configure GROQ_API_KEY in .env]"
     return text
@@ -0,0 +1,92 @@
+"""Per-author, per-status post counts, so list totals are a lookup instead of COUNT(*).
+
+Every writer that creates or deletes posts or changes their status calls
+:func:`adjust` inside its own transaction, so counts commit (or roll back)
+together with the posts. :func:`reconcile` recomputes them from the posts
+table and reports any drift (``python -m app.manage reconcile-counters``).
+"""
+
+import logging
+from typing import Mapping, NamedTuple, Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.post import Post
+from app.models.post_counter import PostCounter
+
+logger = logging.getLogger(__name__)
+
+ANONYMOUS = ""  # author_key of posts without an author (NULL cannot be part of the key)
+
+
+class Drift(NamedTuple):
+    author_id: Optional[str]
+    status: str
+    stored: int
+    actual: int
+
+
+def _key(author_id: Optional[str]) -> str:
+    return author_id if author_id is not None else ANONYMOUS
+
+
+async def adjust(db: AsyncSession, author_id: Optional[str], deltas: Mapping[str, int]) -> None:
+    """Add ``{status: delta}`` to one author's counts (the caller commits)."""
+    values = [
+        {"author_key": _key(author_id), "status": status, "total": delta}
+        for status, delta in deltas.items() if delta
+    ]
+    if not values:
+        return
+    stmt = insert(PostCounter).values(values)
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=["author_key", "status"],
+        set_={"total": PostCounter.total + stmt.excluded.total},
+    ))
+
+
+async def count_posts(db: AsyncSession, author_id: Optional[str], status: Optional[str] = None) -> int:
+    """Number of one author's posts, optionally with one status."""
+    query = select(func.coalesce(func.sum(PostCounter.total), 0)).where(PostCounter.author_key == _key(author_id))
+    if status:
+        query = query.where(PostCounter.status == status)
+    return (await db.execute(query)).scalar()
+
+
+async def reconcile(db: AsyncSession) -> list[Drift]:
+    """Recompute every count from the posts table; returns the counts that were wrong."""
+    stored = {
+        (row.author_key, row.status): row.total
+        for row in (await db.execute(select(PostCounter))).scalars()
+    }
+    await db.execute(delete(PostCounter))  # takes the write lock before counting
+    actual = {
+        (_key(row.author_id), row.status): row.total
+        for row in (await db.execute(
+            select(Post.author_id, Post.status, func.count().label("total")).group_by(Post.author_id, Post.status)
+        )).all()
+    }
+    if actual:
+        await db.execute(insert(PostCounter).values([
+            {"author_key": author_key, "status": status, "total": total}
+            for (author_key, status), total in actual.items()
+        ]))
+    await db.commit()
+
+    drift = []
+    for author_key, status in sorted(stored.keys() | actual.keys()):
+        was, now = stored.get((author_key, status), 0), actual.get((author_key, status), 0)
+        if was != now:
+            drift.append(Drift(author_key if author_key != ANONYMOUS else None, status, was, now))
+    return drift
+
+
+async def backfill(db: AsyncSession) -> None:
+    """Build the counts once for a database created before they existed (called on startup)."""
+    if (await db.execute(select(PostCounter.author_key).limit(1))).first() is not None:
+        return
+    drift = await reconcile(db)
+    if drift:
+        logger.info(f"Counted posts for {len(drift)} author/status pairs")
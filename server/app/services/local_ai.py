@@ -0,0 +1,187 @@
+"""Local AI engine — extractive summaries and keyphrase titles, no network.
+
+Sentences are ranked with TextRank over a TF-IDF sentence graph built with
+NumPy; titles are assembled from the highest-scoring keyphrases (runs of
+non-stopwords, RAKE-style). Quality is below an LLM, but a 50k-character
+post is processed in a few milliseconds, which suits bulk back-fills.
+"""
+
+import re
+from typing import Optional
+
+import numpy as np
+
+SUMMARY_SENTENCES = 3
+MAX_FEATURES = 1024     # vocabulary cap keeps the similarity matmul cheap
+MAX_SENTENCES = 400     # longer posts are ranked on the first N sentences by TF-IDF mass
+DAMPING = 0.85
+ITERATIONS = 30
+RANK_HEAD = 10          # keyphrase candidates ranked per phrase wanted, before falling back to all
+
+_SENTENCE = re.compile(r"[^.!?\n]+(?:[.!?]+[\"')\]]*|\n|$)")
+_WORD = re.compile(r"[a-z0-9][a-z0-9'\-]*")
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9'\-]*|[,;:.!?()\[\]\"\n]")  # a word, or a phrase break
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before
+being below between both but by can could did do does doing down during each few for from
+further had has have having he her here hers herself him himself his how i if in into is it
+its itself just like make made many may me might more most much must my myself no nor not now
+of off on once one only or other our ours ourselves out over own same she should so some such
+than that the their theirs them themselves then there these they this those through to too
+under until up us use used using very was we were what when where which while who whom why
+will with would you your yours yourself yourselves get got new way well even still really
+""".split())
+
+
+def split_sentences(text: str) -> list[str]:
+    return [s.strip() for s in _SENTENCE.findall(text) if len(s.split()) >= 3]
+
+
+def _tfidf(sentences: list[str]) -> tuple[np.ndarray, list[str]]:
+    """Row-normalized TF-IDF matrix (sentences x terms) and its vocabulary."""
+    tokenized = [[w for w in _WORD.findall(s.lower()) if w not in STOPWORDS] for s in sentences]
+
+    vocab: dict[str, int] = {}
+    rows: list[int] = []
+    cols: list[int] = []
+    for i, words in enumerate(tokenized):
+        for w in words:
+            rows.append(i)
+            cols.append(vocab.setdefault(w, len(vocab)))
+    if not vocab:
+        return np.zeros((len(sentences), 0), dtype=np.float32), []
+
+    counts = np.zeros((len(sentences), len(vocab)), dtype=np.float32)
+    np.add.at(counts, (np.asarray(rows), np.asarray(cols)), 1.0)
+
+    df = np.count_nonzero(counts, axis=0)
+    idf = np.log((1 + len(sentences)) / (1 + df)).astype(np.float32) + 1.0
+    weights = counts * idf
+
+    terms = list(vocab)
+    if len(terms) > MAX_FEATURES:
+        keep = np.argsort(-weights.sum(axis=0))[:MAX_FEATURES]
+        weights = weights[:, keep]
+        terms = [terms[k] for k in keep]
+
+    norms = np.linalg.norm(weights, axis=1, keepdims=True)
+    return weights / np.maximum(norms, 1e-9), terms
+
+
+def _textrank(matrix: np.ndarray) -> np.ndarray:
+    """PageRank scores over the cosine-similarity graph of the rows of ``matrix``."""
+    n = matrix.shape[0]
+    similarity = matrix @ matrix.T
+    np.fill_diagonal(similarity, 0.0)
+    out_weight = similarity.sum(axis=1, keepdims=True)
+    transition = np.divide(similarity, out_weight, out=np.full_like(similarity, 1.0 / n), where=out_weight > 0)
+
+    scores = np.full(n, 1.0 / n, dtype=np.float32)
+    teleport = (1.0 - DAMPING) / n
+    for _ in range(ITERATIONS):
+        updated = teleport + DAMPING * (transition.T @ scores)
+        if np.abs(updated - scores).sum() < 1e-6:
+            return updated
+        scores = updated
+    return scores
+
+
+def summarize(text: str, max_sentences: int = SUMMARY_SENTENCES) -> str:
+    """Extractive summary: the top-ranked sentences, in their original order."""
+    sentences = split_sentences(text)
+    if len(sentences) <= max_sentences:
+        return " ".join(sentences) or " ".join(text.split()[:30])
+
+    matrix, _ = _tfidf(sentences)
+    if matrix.shape[1] == 0:
+        return " ".join(sentences[:max_sentences])
+
+    if len(sentences) > MAX_SENTENCES:
+        # Pre-select by TF-IDF mass so the n x n graph stays small
+        candidates = np.sort(np.argsort(-matrix.sum(axis=1))[:MAX_SENTENCES])
+        scores = np.zeros(len(sentences), dtype=np.float32)
+        scores[candidates] = _textrank(matrix[candidates])
+    else:
+        scores = _textrank(matrix)
+
+    chosen = np.sort(np.argsort(-scores, kind="stable")[:max_sentences])
+    return " ".join(sentences[i] for i in chosen)
+
+
+def keyphrases(text: str, limit: int = 5) -> list[str]:
+    """Top candidate phrases (1-3 non-stopword runs) scored by summed term weight."""
+    # Words and phrase breaks in one pass; stopwords, numbers and breaks end a run (id -1)
+    tokens = _TOKEN.findall(text.lower())
+    distinct = set(tokens)
+    terms = sorted(t for t in distinct if t[0].isalnum() and t not in STOPWORDS and not t.isdigit())
+    if not terms:
+        return []
+    index = dict.fromkeys(distinct, -1)
+    index.update((t, i) for i, t in enumerate(terms))
+    ids = np.fromiter(map(index.__getitem__, tokens), dtype=np.int64, count=len(tokens))
+    valid = ids >= 0
+    size = len(terms)
+
+    # Every 1-3 term n-gram inside a run, encoded base ``size`` (fits int64 below ~2M terms)
+    # and counted with np.unique.
+    # Repeated phrases of frequent terms win; longer phrases get a small bonus.
+    counts = np.bincount(ids[valid], minlength=size)
+    weight = np.log1p(counts)
+    grams = [np.arange(size)[:, None]]
+    scores = [counts * weight]
+    for n in (2, 3):
+        m = len(ids) - n + 1
+        if m <= 0:
+            break
+        inside = valid[:m].copy()
+        code = ids[:m].copy()
+        for k in range(1, n):
+            inside &= valid[k:k + m]
+            code = code * size + ids[k:k + m]
+        code, count = np.unique(code[inside], return_counts=True)
+        gram = np.stack([code // size ** (n - 1 - k) % size for k in range(n)], axis=1)
+        grams.append(gram)
+        scores.append(count * weight[gram].sum(axis=1) / n * (1 + 0.3 * (n - 1)))
+    gram_of = np.concatenate([np.arange(len(g)) for g in grams])
+    group_of = np.concatenate([np.full(len(g), i) for i, g in enumerate(grams)])
+    score = np.concatenate(scores)
+
+    def phrase(i: int) -> str:
+        return " ".join(terms[t] for t in grams[group_of[i]][gram_of[i]])
+
+    # Only the head of the ranking needs names; rank everything only if overlaps use it all up
+    head = limit * RANK_HEAD
+    passes = [np.arange(len(score))]
+    if len(score) > head:
+        passes.insert(0, np.flatnonzero(score >= np.partition(score, -head)[-head]))  # ties included
+    for candidates in passes:
+        ranked = sorted((-score[i], phrase(i)) for i in candidates)
+        picked: list[str] = []
+        for _, name in ranked:
+            if any(name in p or p in name for p in picked):
+                continue  # skip overlapping variants of an already chosen phrase
+            picked.append(name)
+            if len(picked) == limit:
+                return picked
+    return picked
+
+
+def _title_case(phrase: str) -> str:
+    return " ".join(w if w.isupper() else w.capitalize() for w in phrase.split())
+
+
+def suggest_titles(text: str, count: int = 3) -> Optional[str]:
+    """Numbered list of keyphrase-based title candidates (same shape as the LLM output)."""
+    phrases = [_title_case(p) for p in keyphrases(text)]
+    if not phrases:
+        return None
+
+    candidates = [phrases[0]]
+    if len(phrases) > 1:
+        candidates.append(f"{phrases[0]}: {phrases[1]}")
+    if len(phrases) > 2:
+        candidates.append(f"{phrases[1]} and {phrases[2]}")
+    if len(phrases) > 3:
+        candidates.append(f"What to Know About {phrases[3]}")
+    return "\n".join(f"{i}. {title}" for i, title in enumerate(candidates[:count], start=1))
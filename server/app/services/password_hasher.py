@@ -0,0 +1,107 @@
+"""Password hashing pool — runs bcrypt off the event loop with admission control.
+
+bcrypt deliberately burns 100–300 ms of CPU per call; done inline it stalls
+every other request on the worker. Calls here run in a dedicated executor of
+``BCRYPT_WORKERS`` threads (or processes), at most ``BCRYPT_MAX_QUEUE`` more
+wait behind them, and anything beyond that is rejected so a login storm
+degrades into 503s instead of a frozen server.
+"""
+
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from app.config import settings
+from app.utils.auth import hash_password, hash_rounds, verify_password
+
+
+class HasherOverloaded(Exception):
+    """Too many hashes are already running or queued."""
+
+
+class PasswordHasher:
+    def __init__(self, workers: int, max_queue: int, rounds: int, use_processes: bool = False):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.rounds = rounds
+        self.use_processes = use_processes
+        self._executor: Optional[Executor] = None  # created on first use
+        self.in_flight = 0
+
+        self.hashes = 0
+        self.verifies = 0
+        self.rejected = 0
+        self.completed = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def _pool(self) -> Executor:
+        if self._executor is None:
+            pool = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+            self._executor = pool(max_workers=self.workers)
+        return self._executor
+
+    async def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if self.in_flight >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise HasherOverloaded()
+
+        self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool(), fn, *args)
+        finally:
+            self.in_flight -= 1
+            elapsed = time.perf_counter() - start  # queue wait + hashing
+            self.completed += 1
+            self.latency_total += elapsed
+            self.latency_max = max(self.latency_max, elapsed)
+
+    async def hash(self, plain: str) -> str:
+        """bcrypt hash at the configured work factor.
+
+        Raises:
+            HasherOverloaded: if the pool and its queue are full.
+        """
+        self.hashes += 1
+        return await self._run(hash_password, plain, self.rounds)
+
+    async def verify(self, plain: str, hashed: str) -> bool:
+        """Check a password against its hash.
+
+        Raises:
+            HasherOverloaded: if the pool and its queue are full.
+        """
+        self.verifies += 1
+        return await self._run(verify_password, plain, hashed)
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """True if ``hashed`` was made with a different work factor than configured."""
+        return hash_rounds(hashed) != self.rounds
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "rounds": self.rounds,
+            "in_flight": self.in_flight,
+            "queued": max(0, self.in_flight - self.workers),
+            "hashes": self.hashes,
+            "verifies": self.verifies,
+            "rejected": self.rejected,
+            "latency_ms_avg": round(self.latency_total / self.completed * 1000, 1) if self.completed else None,
+            "latency_ms_max": round(self.latency_max * 1000, 1),
+        }
+
+
+password_hasher = PasswordHasher(
+    workers=settings.BCRYPT_WORKERS,
+    max_queue=settings.BCRYPT_MAX_QUEUE,
+    rounds=settings.BCRYPT_ROUNDS,
+    use_processes=settings.BCRYPT_USE_PROCESSES,
+)
@@ -1,29 +1,138 @@
 """Post business logic — CRUD operations."""
 
-from typing import Optional
+import json
+from collections import Counter
+from datetime import datetime, timezone
+from typing import NamedTuple, Optional
 
-from sqlalchemy import select, func
+from sqlalchemy import bindparam, delete, select, text, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
 
+from app.config import settings
 from app.models.post import Post
-from app.schemas.post import PostCreate, PostUpdate
+from app.models.types import encode_json, encode_text
+from app.schemas.post import PostCreate, PostUpdate, RenderedPostResponse
+from app.services import counter_service, revision_service, search_service
+from app.services.write_buffer import POST_COLUMNS, write_buffer
+from app.utils.cache import LRUCache
+from app.utils.json_patch import apply_patch
+from app.utils.lexical import analyze, content_hash
+from app.utils.lexical_html import render_html
+from app.utils.pagination import decode_cursor, encode_cursor
+
+# Columns loaded per list projection; content_json/content_html only for "full"
+PROJECTIONS = {
+    "summary": (
+        Post.id, Post.title, Post.excerpt, Post.word_count, Post.char_count,
+        Post.reading_minutes, Post.outline, Post.status,
+        Post.author_id, Post.version, Post.created_at, Post.updated_at,
+    ),
+    "keys": (Post.id, Post.version, Post.updated_at),  # enough to build a list ETag
+}
+
+
+class CachedPost(NamedTuple):
+    version: int
+    author_id: Optional[str]  # checked on every hit: the cache is shared by all callers
+    body: bytes  # serialized RenderedPostResponse
+
+
+post_cache: LRUCache[str, CachedPost] = LRUCache(
+    max_entries=settings.POST_CACHE_MAX_ENTRIES,
+    max_bytes=settings.POST_CACHE_MAX_BYTES,
+    ttl=settings.POST_CACHE_TTL_SECONDS,
+    sizeof=lambda entry: len(entry.body),
+)
+
+# Bumped on every invalidation; a read that overlapped a write must not repopulate
+_cache_epoch = 0
+
+
+def invalidate_cached_posts(*post_ids: str) -> None:
+    global _cache_epoch
+    _cache_epoch += 1
+    for post_id in post_ids:
+        post_cache.pop(post_id)
+
+
+def _scope(author_id: Optional[str]):
+    """WHERE clause for one author's posts (``author_id=None``: anonymous posts)."""
+    return Post.author_id == author_id if author_id is not None else Post.author_id.is_(None)
+
+
+def derived_columns(content_json: Optional[dict], digest: Optional[str]) -> dict:
+    """Column values computed from ``content_json`` (one tree walk)."""
+    stats = analyze(content_json)
+    return {
+        "excerpt": stats.excerpt,
+        "word_count": stats.word_count,
+        "char_count": stats.char_count,
+        "reading_minutes": stats.reading_minutes,
+        "outline": stats.outline,
+        "content_hash": digest,
+    }
+
+
+class VersionConflict(Exception):
+    """The post changed since the client read it (``If-Match`` mismatch)."""
+
+    def __init__(self, current_version: int):
+        super().__init__(f"Post is at version {current_version}")
+        self.current_version = current_version
 
 
 async def create_post(db: AsyncSession, data: PostCreate, author_id: Optional[str] = None) -> Post:
     post = Post(
         title=data.title,
         content_json=data.content_json,
-        content_html=data.content_html,
         author_id=author_id,
+        **derived_columns(data.content_json, content_hash(data.content_json)),
     )
     db.add(post)
+    await db.flush()  # assigns the id
+    await search_service.index_post(db, post.id, post.title, post.content_json)
+    await revision_service.record_revision(
+        db, post.id, post.version, post.title, post.content_json, post.content_hash
+    )
+    await counter_service.adjust(db, author_id, {post.status: 1})
     await db.commit()
     await db.refresh(post)
     return post
 
 
-async def get_post(db: AsyncSession, post_id: str) -> Optional[Post]:
-    result = await db.execute(select(Post).where(Post.id == post_id))
+def _buffered_state(post_id: str, author_id: Optional[str]) -> Optional[dict]:
+    """The post's write-behind state if it has one and belongs to ``author_id``."""
+    state = write_buffer.peek(post_id)
+    return state if state is not None and state["author_id"] == author_id else None
+
+
+async def get_post(db: AsyncSession, post_id: str, author_id: Optional[str] = None) -> Optional[Post]:
+    """One of ``author_id``'s posts (None if missing or someone else's)."""
+    if _buffered_state(post_id, author_id) is not None:
+        return write_buffer.materialize(post_id)
+    return await _load_post(db, post_id, author_id)
+
+
+async def get_post_cached(db: AsyncSession, post_id: str, author_id: Optional[str] = None) -> Optional[CachedPost]:
+    """Read-through cache in front of :func:`get_post`, holding the serialized response."""
+    cached = post_cache.get(post_id)
+    if cached is not None:
+        return cached if cached.author_id == author_id else None
+
+    epoch = _cache_epoch
+    post = await get_post(db, post_id, author_id)
+    if not post:
+        return None
+    entry = CachedPost(post.version, post.author_id, RenderedPostResponse.model_validate(post).model_dump_json().encode())
+    if epoch == _cache_epoch:
+        post_cache.set(post_id, entry)
+    return entry
+
+
+async def _load_post(db: AsyncSession, post_id: str, author_id: Optional[str]) -> Optional[Post]:
+    """Session-attached row straight from the database, bypassing the write buffer."""
+    result = await db.execute(select(Post).where(Post.id == post_id, _scope(author_id)))
     return result.scalar_one_or_none()
 
 
@@ -32,53 +141,447 @@ async def list_posts(
     status: Optional[str] = None,
     skip: int = 0,
     limit: int = 50,
-) -> tuple[list[Post], int]:
-    query = select(Post)
-    count_query = select(func.count()).select_from(Post)
+    after: Optional[str] = None,
+    include_total: bool = True,
+    projection: str = "full",
+    author_id: Optional[str] = None,
+) -> tuple[list[Post], Optional[int], Optional[str]]:
+    """
+    List one author's posts newest-first (``author_id=None``: anonymous posts).
 
+    Pages either by ``skip``/``limit`` (legacy) or, when ``after`` is given, by
+    seeking past the ``(updated_at, id)`` encoded in the cursor. One extra row
+    is fetched to decide whether a next cursor exists. ``include_total`` adds
+    the total, read from the maintained post counters rather than a COUNT.
+    ``projection`` ("full", "summary" or "keys") picks the columns to load;
+    only "full" reads the content columns.
+
+    Returns:
+        (posts, total or None, next_cursor or None)
+
+    Raises:
+        InvalidCursor: if ``after`` is not a cursor issued by this endpoint.
+    """
+    query = select(Post).where(_scope(author_id))
+    if projection in PROJECTIONS:
+        query = query.options(load_only(*PROJECTIONS[projection]))
     if status:
         query = query.where(Post.status == status)
-        count_query = count_query.where(Post.status == status)
 
-    query = query.order_by(Post.updated_at.desc()).offset(skip).limit(limit)
+    if after:
+        updated_at, post_id = decode_cursor(after, datetime, str)
+        query = query.where(tuple_(Post.updated_at, Post.id) < (updated_at, post_id))
+    elif skip:
+        query = query.offset(skip)
+
+    query = query.order_by(Post.updated_at.desc(), Post.id.desc()).limit(limit + 1)
 
     result = await db.execute(query)
-    posts = list(result.scalars().all())
+    posts = write_buffer.overlay(list(result.scalars().all()))
 
-    count_result = await db.execute(count_query)
-    total = count_result.scalar() or 0
+    next_cursor = None
+    if len(posts) > limit:
+        posts = posts[:limit]
+        next_cursor = encode_cursor(posts[-1].updated_at, posts[-1].id)
 
-    return posts, total
+    total = await counter_service.count_posts(db, author_id, status) if include_total else None
 
+    return posts, total, next_cursor
 
-async def update_post(db: AsyncSession, post_id: str, data: PostUpdate) -> Optional[Post]:
-    post = await get_post(db, post_id)
-    if not post:
-        return None
 
-    update_data = data.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(post, key, value)
+def page_fingerprint(posts: list[Post], total: Optional[int]) -> str:
+    """Identity of a list page: its rows' (id, version), newest update and total."""
+    newest = max((p.updated_at for p in posts if p.updated_at), default=None)
+    return f"{newest}|{total}|" + ",".join(f"{p.id}:{p.version}" for p in posts)
+
+
+async def get_post_version(db: AsyncSession, post_id: str, author_id: Optional[str] = None) -> Optional[int]:
+    """Current version of one of ``author_id``'s posts without loading its content (for conditional GETs)."""
+    cached = post_cache.get(post_id, count=False)
+    if cached is not None:
+        return cached.version if cached.author_id == author_id else None
+    buffered = write_buffer.peek(post_id)
+    if buffered is not None:
+        return buffered["version"] if buffered["author_id"] == author_id else None
+    return (await db.execute(select(Post.version).where(Post.id == post_id, _scope(author_id)))).scalar()
+
+
+async def update_post(
+    db: AsyncSession,
+    post_id: str,
+    data: PostUpdate,
+    expected_version: Optional[int] = None,
+    author_id: Optional[str] = None,
+) -> Optional[Post]:
+    """
+    Apply a full or JSON-Patch update in a single ``UPDATE ... RETURNING``.
+
+    Only ``author_id``'s posts can be updated; None is returned for anyone
+    else's, as for a missing post.
+
+    When ``expected_version`` is given (the client's ``If-Match``) the write
+    only succeeds if the stored version still matches. Patch mode reads the
+    current ``content_json`` first and then writes with a compare-and-swap on
+    the version it read, so a concurrent writer can never be overwritten.
+
+    Raises:
+        VersionConflict: if the stored version differs from the expected one.
+        JsonPatchError: if ``content_patch`` cannot be applied.
+    """
+    try:
+        if write_buffer.enabled:
+            return await _buffered_update(db, post_id, data, expected_version, author_id)
+        return await _direct_update(db, post_id, data, expected_version, author_id)
+    finally:
+        invalidate_cached_posts(post_id)
+
+
+async def _direct_update(
+    db: AsyncSession,
+    post_id: str,
+    data: PostUpdate,
+    expected_version: Optional[int],
+    author_id: Optional[str],
+) -> Optional[Post]:
+    owned = (Post.id == post_id, _scope(author_id))
+    update_data = data.model_dump(exclude_unset=True, exclude={"content_patch", "content_html"})
+    stored_hash = None
+
+    if data.content_patch is not None:
+        row = (
+            await db.execute(
+                select(Post.content_json, Post.content_hash, Post.version).where(*owned)
+            )
+        ).one_or_none()
+        if row is None:
+            return None
+        if expected_version is not None and row.version != expected_version:
+            raise VersionConflict(row.version)
+        update_data["content_json"] = _apply_content_patch(row.content_json, data)
+        stored_hash = row.content_hash
+        expected_version = row.version
+    elif "content_json" in update_data:
+        stored_hash = (await db.execute(select(Post.content_hash).where(*owned))).scalar()
+
+    if "content_json" in update_data:
+        _apply_content_change(update_data, stored_hash)
 
+    if not update_data:
+        post = await get_post(db, post_id, author_id)
+        if post and expected_version is not None and post.version != expected_version:
+            raise VersionConflict(post.version)
+        return post
+
+    stmt = (
+        update(Post)
+        .where(*owned)
+        .values(**update_data, version=Post.version + 1, updated_at=datetime.now(timezone.utc))
+        .returning(Post)
+    )
+    if expected_version is not None:
+        stmt = stmt.where(Post.version == expected_version)
+
+    post = (await db.execute(stmt)).scalar_one_or_none()
+    if post is not None and ("title" in update_data or "content_json" in update_data):
+        await search_service.index_post(db, post.id, post.title, post.content_json)
+        await revision_service.record_revision(
+            db, post.id, post.version, post.title, post.content_json, post.content_hash
+        )
     await db.commit()
-    await db.refresh(post)
+
+    if post is None and expected_version is not None:
+        current = (await db.execute(select(Post.version).where(*owned))).scalar()
+        if current is not None:
+            raise VersionConflict(current)
     return post
 
 
-async def publish_post(db: AsyncSession, post_id: str) -> Optional[Post]:
-    post = await get_post(db, post_id)
+async def _buffered_update(
+    db: AsyncSession,
+    post_id: str,
+    data: PostUpdate,
+    expected_version: Optional[int],
+    author_id: Optional[str],
+) -> Optional[Post]:
+    """Write-behind variant of :func:`update_post` — stages the change in memory."""
+    if write_buffer.peek(post_id) is not None:
+        state = _buffered_state(post_id, author_id)
+        if state is None:
+            return None
+    else:
+        post = await _load_post(db, post_id, author_id)
+        if not post:
+            return None
+        state = {col: getattr(post, col) for col in POST_COLUMNS}
+
+    if expected_version is not None and state["version"] != expected_version:
+        raise VersionConflict(state["version"])
+
+    changes = data.model_dump(exclude_unset=True, exclude={"content_patch", "content_html"})
+    if data.content_patch is not None:
+        changes["content_json"] = _apply_content_patch(state["content_json"], data)
+    if not changes:
+        return write_buffer.materialize(post_id) or Post(**state)
+
+    if "content_json" in changes:
+        _apply_content_change(changes, state.get("content_hash"))
+    if not changes:
+        return write_buffer.materialize(post_id) or Post(**state)
+
+    changes["version"] = state["version"] + 1
+    changes["updated_at"] = datetime.now(timezone.utc)
+
+    write_buffer.stage(post_id, state, changes)
+    return write_buffer.materialize(post_id)
+
+
+def _apply_content_change(changes: dict, stored_hash: Optional[str]) -> None:
+    """Drop an unchanged ``content_json`` from ``changes``, else add its derived columns."""
+    digest = content_hash(changes["content_json"])
+    if digest is not None and digest == stored_hash:
+        del changes["content_json"]  # autosave of identical content: nothing to recompute
+        return
+    changes.update(derived_columns(changes["content_json"], digest))
+    changes["content_html"] = None  # stale; re-rendered on publish / read
+
+
+def _apply_content_patch(content_json: Optional[dict], data: PostUpdate) -> dict:
+    operations = [op.model_dump(by_alias=True, exclude_unset=True) for op in data.content_patch]
+    return apply_patch(content_json or {}, operations)
+
+
+async def restore_revision(
+    db: AsyncSession,
+    post_id: str,
+    revision_id: int,
+    expected_version: Optional[int] = None,
+    author_id: Optional[str] = None,
+) -> Optional[Post]:
+    """
+    Bring back a revision's title and content as a new update (recorded as a revision itself).
+
+    Returns None if the post or revision does not exist.
+
+    Raises:
+        VersionConflict: if the stored version differs from ``expected_version``.
+    """
+    found = await revision_service.get_revision(db, post_id, revision_id)
+    if found is None:
+        return None
+    revision, content_json = found
+    data = PostUpdate(title=revision.title, content_json=content_json)
+    return await update_post(db, post_id, data, expected_version=expected_version, author_id=author_id)
+
+
+async def publish_post(db: AsyncSession, post_id: str, author_id: Optional[str] = None) -> Optional[Post]:
+    if _buffered_state(post_id, author_id) is not None:
+        await write_buffer.flush([post_id])
+    post = await _load_post(db, post_id, author_id)
     if not post:
         return None
+    if post.status != "published":
+        await counter_service.adjust(db, post.author_id, {post.status: -1, "published": 1})
     post.status = "published"
+    post.content_html = render_html(post.content_json)
+    post.version += 1
     await db.commit()
+    invalidate_cached_posts(post_id)
     await db.refresh(post)
     return post
 
 
-async def delete_post(db: AsyncSession, post_id: str) -> bool:
-    post = await get_post(db, post_id)
+async def delete_post(db: AsyncSession, post_id: str, author_id: Optional[str] = None) -> bool:
+    post = await _load_post(db, post_id, author_id)
     if not post:
         return False
+    write_buffer.discard(post_id)
+    await revision_service.delete_history(db, post_id)  # before the post's cascade removes the rows
     await db.delete(post)
+    await search_service.unindex_post(db, post_id)
+    await counter_service.adjust(db, post.author_id, {post.status: -1})
     await db.commit()
+    invalidate_cached_posts(post_id)
     return True
+
+
+async def bulk_update(
+    db: AsyncSession,
+    post_ids: list[str],
+    operation: str,
+    author_id: Optional[str] = None,
+) -> dict[str, Optional[int]]:
+    """
+    Publish, unpublish or delete many of one author's posts in one transaction.
+
+    Each operation is a set-based ``UPDATE`` / ``DELETE ... WHERE id IN (...)``
+    (publish adds one executemany to store the rendered HTML; unpublish
+    clears it). Posts already in the target status are left alone. The
+    search index, revision history, post counters and post cache are
+    updated in one batch each.
+
+    Returns:
+        {post_id: current version} for the posts found (None for deletes);
+        ids missing or owned by someone else are left out.
+    """
+    ids = list(dict.fromkeys(post_ids))
+    target = Post.id.in_(ids) & _scope(author_id)
+
+    # The buffer knows each pending post's author, so the scope is applied without a query;
+    # someone else's pending writes are none of this request's business
+    buffered = [pid for pid in ids if _buffered_state(pid, author_id) is not None]
+    if operation == "delete":
+        for pid in buffered:
+            write_buffer.discard(pid)
+    elif buffered:
+        # Before ``db`` checks out the writer: the flush needs a writer connection of its own.
+        # The UPDATE below bumps versions the buffer would otherwise reuse.
+        await write_buffer.flush(buffered)
+
+    try:
+        found = (await db.execute(select(Post.id, Post.status).where(target))).all()
+        found_ids = [row.id for row in found]
+        if operation == "delete":
+            if found_ids:
+                await revision_service.delete_history(db, *found_ids)
+                await db.execute(delete(Post).where(Post.id.in_(found_ids)))
+                await search_service.unindex_posts(db, found_ids)
+                removed = Counter(row.status for row in found)
+                await counter_service.adjust(db, author_id, {status: -n for status, n in removed.items()})
+            await db.commit()
+            return dict.fromkeys(found_ids)
+
+        new_status = "published" if operation == "publish" else "draft"
+        deltas: Counter[str] = Counter()
+        for row in found:
+            if row.status != new_status:
+                deltas[row.status] -= 1
+                deltas[new_status] += 1
+        await counter_service.adjust(db, author_id, deltas)
+        rows = (await db.execute(
+            update(Post)
+            .where(Post.id.in_(found_ids), Post.status != new_status)  # exactly the rows counted above
+            .values(
+                status=new_status,
+                version=Post.version + 1,
+                updated_at=datetime.now(timezone.utc),
+                **({} if operation == "publish" else {"content_html": None}),
+            )
+            .returning(Post.id, Post.version, Post.content_json)
+        )).all()
+        versions = {row.id: row.version for row in rows}
+        unchanged = [pid for pid in found_ids if pid not in versions]
+        if unchanged:
+            versions.update((await db.execute(select(Post.id, Post.version).where(Post.id.in_(unchanged)))).all())
+        if operation == "publish" and rows:
+            await db.execute(
+                update(Post.__table__)
+                .where(Post.__table__.c.id == bindparam("post_id"))
+                .values(content_html=bindparam("html")),
+                [{"post_id": row.id, "html": render_html(row.content_json)} for row in rows],
+            )
+        await db.commit()
+        return versions
+    finally:
+        invalidate_cached_posts(*ids)
+
+
+async def compress_legacy_content(db: AsyncSession, batch_size: int = 500) -> int:
+    """
+    Rewrite posts whose content columns are still plain TEXT as compressed BLOBs.
+
+    Works in committed batches and skips rows already converted, so it can be
+    interrupted and re-run. ``version`` and ``updated_at`` are left alone.
+    Returns the number of rows rewritten.
+    """
+    rewritten = 0
+    while True:
+        rows = (await db.execute(
+            text(
+                "SELECT id, content_json, content_html FROM posts "
+                "WHERE typeof(content_json) = 'text' OR typeof(content_html) = 'text' LIMIT :limit"
+            ),
+            {"limit": batch_size},
+        )).all()
+        if not rows:
+            return rewritten
+
+        await db.execute(
+            text("UPDATE posts SET content_json = :content_json, content_html = :content_html WHERE id = :id"),
+            [
+                {
+                    "id": row.id,
+                    "content_json": (
+                        encode_json(json.loads(row.content_json))
+                        if isinstance(row.content_json, str) else row.content_json
+                    ),
+                    "content_html": (
+                        encode_text(row.content_html)
+                        if isinstance(row.content_html, str) else row.content_html
+                    ),
+                }
+                for row in rows
+            ],
+        )
+        await db.commit()
+        invalidate_cached_posts(*(row.id for row in rows))
+        rewritten += len(rows)
+
+
+async def backfill_derived_columns(db: AsyncSession, batch_size: int = 500) -> int:
+    """
+    Compute the derived columns of posts stored before they existed (called on startup).
+
+    Those rows have content but no ``content_hash``. Works in committed
+    batches in id order, so it can be interrupted and re-run; ``version``
+    and ``updated_at`` are left alone. Returns the number of rows filled in.
+    """
+    filled = 0
+    after = ""
+    while True:
+        rows = (await db.execute(
+            select(Post.id, Post.content_json)
+            .where(Post.content_hash.is_(None), Post.content_json.is_not(None), Post.id > after)
+            .order_by(Post.id)
+            .limit(batch_size)
+        )).all()
+        if not rows:
+            return filled
+
+        await db.execute(
+            update(Post.__table__)
+            .where(Post.__table__.c.id == bindparam("post_id"))
+            .values({name: bindparam(name) for name in derived_columns(None, None)}),
+            [
+                {"post_id": row.id, **derived_columns(row.content_json, content_hash(row.content_json))}
+                for row in rows
+            ],
+        )
+        await db.commit()
+        invalidate_cached_posts(*(row.id for row in rows))
+        filled += len(rows)
+        after = rows[-1].id
+
+
+async def claim_anonymous_posts(db: AsyncSession, author_id: str) -> int:
+    """
+    Give every post without an author to ``author_id``.
+
+    Posts written before accounts existed (or while logged out) have no
+    author and are only listed for anonymous callers; claiming moves them,
+    and their counts, to one user. Versions are bumped so cached copies and
+    ETags reflect the new owner. Returns the number of posts claimed.
+    """
+    await write_buffer.flush()  # pending rows would otherwise be staged under the old owner
+    rows = (await db.execute(
+        update(Post)
+        .where(Post.author_id.is_(None))
+        .values(author_id=author_id, version=Post.version + 1)
+        .returning(Post.id, Post.status)
+        .execution_options(synchronize_session=False)
+    )).all()
+    statuses = Counter(row.status for row in rows)
+    await counter_service.adjust(db, None, {status: -n for status, n in statuses.items()})
+    await counter_service.adjust(db, author_id, statuses)
+    await db.commit()
+    invalidate_cached_posts(*(row.id for row in rows))
+    return len(rows)
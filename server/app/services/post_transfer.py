@@ -0,0 +1,210 @@
+"""Bulk NDJSON export and import of posts.
+
+Export streams one JSON object per line from a server-side cursor
+(``stream_scalars`` with ``yield_per``), so memory use stays flat however
+many posts there are. Import reads the request body incrementally, validates
+each line on its own and inserts the valid ones in batches of
+``TRANSFER_BATCH_SIZE``: one ``executemany`` INSERT into ``posts`` and one
+into the search index per transaction.
+
+Both open their own sessions. A streaming response outlives the request's
+dependencies. An import should only hold the single writer connection while
+it writes a batch, not for as long as the client takes to upload the body.
+"""
+
+import logging
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import AsyncIterator, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import load_only
+
+from app.config import settings
+from app.database import async_session, read_session
+from app.models.post import Post
+from app.schemas.post import PostExport, PostImport, PostImportError, PostImportResponse
+from app.services import counter_service, search_service
+from app.services.post_service import derived_columns
+from app.services.write_buffer import write_buffer
+from app.utils.lexical import content_hash
+from app.utils.lexical_html import render_html
+
+logger = logging.getLogger(__name__)
+
+EXPORT_COLUMNS = (
+    Post.id, Post.title, Post.content_json, Post.status,
+    Post.author_id, Post.version, Post.created_at, Post.updated_at,
+)
+
+
+# ---------- Export ----------
+
+async def export_posts(author_id: Optional[str], session_factory=read_session) -> AsyncIterator[str]:
+    """
+    One author's posts (``author_id=None``: anonymous posts) as NDJSON, oldest first.
+
+    Yields one chunk of lines per ``TRANSFER_BATCH_SIZE`` rows. Posts with
+    pending write-behind changes are exported in their buffered state.
+    """
+    scope = Post.author_id == author_id if author_id is not None else Post.author_id.is_(None)
+    async with session_factory() as db:
+        result = await db.stream_scalars(
+            select(Post)
+            .options(load_only(*EXPORT_COLUMNS))
+            .where(scope)
+            .order_by(Post.created_at, Post.id)
+            .execution_options(yield_per=settings.TRANSFER_BATCH_SIZE)
+        )
+        async for posts in result.partitions():
+            yield "".join(
+                PostExport.model_validate(write_buffer.materialize(post.id) or post).model_dump_json() + "\n"
+                for post in posts
+            )
+
+
+# ---------- Import ----------
+
+async def _lines(chunks: AsyncIterator[bytes], max_bytes: int) -> AsyncIterator[tuple[int, Optional[bytes]]]:
+    """Split a byte stream into ``(line_number, line)``; ``line`` is None if it exceeded ``max_bytes``."""
+    pending = bytearray()
+    oversized = False
+    number = 0
+    async for chunk in chunks:
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            if end < 0:
+                if not oversized:
+                    pending += chunk[start:]
+                    if len(pending) > max_bytes:
+                        oversized = True  # drop the rest of this line instead of buffering it
+                        pending.clear()
+                break
+            number += 1
+            if not oversized:
+                pending += chunk[start:end]
+            yield number, None if oversized or len(pending) > max_bytes else bytes(pending)
+            pending.clear()
+            oversized = False
+            start = end + 1
+    if pending or oversized:
+        yield number + 1, None if oversized else bytes(pending)
+
+
+def _describe(error: ValidationError) -> str:
+    first = error.errors()[0]
+    where = ".".join(str(part) for part in first["loc"])
+    return f"{where}: {first['msg']}" if where else first["msg"]
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    return value.astimezone(timezone.utc) if value is not None and value.tzinfo else value
+
+
+def _row(item: PostImport, author_id: Optional[str]) -> dict:
+    """Column values for an imported post, derived columns included."""
+    created_at = _as_utc(item.created_at) or datetime.now(timezone.utc)
+    return {
+        "id": item.id or str(uuid.uuid4()),
+        "title": item.title,
+        "content_json": item.content_json,
+        "content_html": render_html(item.content_json) if item.status == "published" else None,
+        "status": item.status,
+        "author_id": author_id,
+        "version": 1,
+        "created_at": created_at,
+        "updated_at": _as_utc(item.updated_at) or created_at,
+        **derived_columns(item.content_json, content_hash(item.content_json)),
+    }
+
+
+async def _insert_batch(batch: list[tuple[int, dict]], session_factory) -> tuple[int, list[PostImportError]]:
+    """Insert one batch in its own transaction; existing ids fail per line, the rest go in."""
+    failures: list[PostImportError] = []
+    async with session_factory() as db:
+        ids = [row["id"] for _, row in batch]
+        taken = set((await db.execute(select(Post.id).where(Post.id.in_(ids)))).scalars())
+        accepted = []
+        for number, row in batch:
+            if row["id"] in taken:
+                failures.append(PostImportError(line=number, error=f"Post {row['id']} already exists"))
+            else:
+                taken.add(row["id"])  # also catches a repeated id within the batch
+                accepted.append((number, row))
+        if not accepted:
+            return 0, failures
+
+        rows = [row for _, row in accepted]
+        try:
+            await db.execute(insert(Post), rows)
+            await search_service.index_posts(db, ((r["id"], r["title"], r["content_json"]) for r in rows))
+            author_id = rows[0]["author_id"]  # one importer owns the whole batch
+            await counter_service.adjust(db, author_id, Counter(r["status"] for r in rows))
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            failures += [PostImportError(line=number, error="Could not be stored") for number, _ in accepted]
+            return 0, failures
+    return len(rows), failures
+
+
+async def import_posts(
+    chunks: AsyncIterator[bytes],
+    author_id: Optional[str],
+    session_factory=async_session,
+) -> PostImportResponse:
+    """
+    Create posts owned by ``author_id`` from an NDJSON byte stream.
+
+    Each non-blank line is a :class:`PostImport`. A line that fails to parse
+    or validate, or reuses an existing post id, is reported with its line
+    number and skipped. Batches already written stay committed if a later
+    one fails. Derived columns and the search index are filled in. Published
+    posts get their HTML rendered. Revision history starts at a post's first
+    edit after the import.
+    """
+    imported = failed = 0
+    errors: list[PostImportError] = []
+    batch: list[tuple[int, dict]] = []
+
+    def _fail(failures: list[PostImportError]) -> None:
+        nonlocal failed
+        failed += len(failures)
+        errors.extend(failures[: max(0, settings.IMPORT_MAX_ERRORS - len(errors))])
+
+    async for number, line in _lines(chunks, settings.IMPORT_MAX_LINE_BYTES):
+        if line is None:
+            _fail([PostImportError(line=number, error=f"Line exceeds {settings.IMPORT_MAX_LINE_BYTES} bytes")])
+            continue
+        if not line.strip():
+            continue
+        try:
+            item = PostImport.model_validate_json(line)
+        except ValidationError as e:
+            _fail([PostImportError(line=number, error=_describe(e))])
+            continue
+
+        try:
+            row = _row(item, author_id)
+        except Exception as e:  # content that validates but cannot be rendered / analyzed
+            logger.warning(f"Import line {number} could not be processed: {e}")
+            _fail([PostImportError(line=number, error="Content could not be processed")])
+            continue
+        batch.append((number, row))
+        if len(batch) >= settings.TRANSFER_BATCH_SIZE:
+            count, failures = await _insert_batch(batch, session_factory)
+            imported += count
+            _fail(failures)
+            batch = []
+
+    if batch:
+        count, failures = await _insert_batch(batch, session_factory)
+        imported += count
+        _fail(failures)
+
+    errors.sort(key=lambda e: e.line)
+    return PostImportResponse(imported=imported, failed=failed, errors=errors)
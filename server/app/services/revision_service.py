@@ -0,0 +1,277 @@
+"""Post revision history — delta-compressed, content-addressed snapshots.
+
+Writers call :func:`record_revision` inside the transaction that changes a
+post's title or content. Each distinct content state is stored once in
+``revision_blobs`` under its ``content_hash``, either as a full snapshot or
+as a JSON Patch against the snapshot the post's previous state was built on.
+Once a patch grows past ``REVISION_SNAPSHOT_RATIO`` of the full state, the
+next state starts a new snapshot, so reconstructing any revision takes at
+most one patch application regardless of history length.
+
+Old autosaves are thinned with age (:func:`thin_revisions`): everything from
+the last ``REVISION_KEEP_ALL_HOURS`` is kept, then the last revision of each
+hour, and past ``REVISION_HOURLY_DAYS`` the last of each day. States no
+revision needs any more are garbage-collected.
+"""
+
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import case, delete, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.config import settings
+from app.models.revision import PostRevision, RevisionBlob
+from app.utils.json_patch import apply_patch, make_patch
+from app.utils.lexical import content_hash
+from app.utils.pagination import decode_cursor, encode_cursor
+
+DELETE_BATCH = 500
+
+_KIND = case(
+    (RevisionBlob.hash.is_(None), None),
+    (RevisionBlob.base_hash.is_(None), "snapshot"),
+    else_="diff",
+).label("kind")
+_COLUMNS = (
+    PostRevision.id, PostRevision.version, PostRevision.title,
+    PostRevision.content_hash, PostRevision.created_at, _KIND,
+)
+
+
+def _size(value: Any) -> int:
+    return len(json.dumps(value, separators=(",", ":"), ensure_ascii=False))
+
+
+# ---------- Writing ----------
+
+async def record_revision(
+    db: AsyncSession,
+    post_id: str,
+    version: int,
+    title: str,
+    content_json: Optional[dict[str, Any]],
+    digest: Optional[str] = None,
+) -> Optional[PostRevision]:
+    """
+    Add a revision for the post's new state (the caller commits).
+
+    Nothing is recorded when the title and content equal the latest
+    revision's. Returns the new revision, or None if it was a duplicate.
+    """
+    if digest is None:
+        digest = content_hash(content_json)
+    latest = (await db.execute(
+        select(PostRevision.title, PostRevision.content_hash)
+        .where(PostRevision.post_id == post_id)
+        .order_by(PostRevision.id.desc())
+        .limit(1)
+    )).one_or_none()
+    if latest is not None and latest.title == title and latest.content_hash == digest:
+        return None
+
+    if digest is not None:
+        await _store_state(db, digest, content_json, latest.content_hash if latest else None)
+
+    revision = PostRevision(post_id=post_id, version=version, title=title, content_hash=digest)
+    db.add(revision)
+    await db.flush()
+
+    if settings.REVISION_THIN_EVERY and version % settings.REVISION_THIN_EVERY == 0:
+        await thin_revisions(db, post_id)
+    return revision
+
+
+async def _store_state(
+    db: AsyncSession,
+    digest: str,
+    content_json: dict[str, Any],
+    previous_hash: Optional[str],
+) -> None:
+    """Store ``content_json`` under ``digest`` unless some revision already did."""
+    exists = (await db.execute(select(RevisionBlob.hash).where(RevisionBlob.hash == digest))).scalar()
+    if exists is not None:
+        return
+
+    data, base_hash = content_json, None
+    if previous_hash is not None:
+        previous = (await db.execute(
+            select(RevisionBlob.hash, RevisionBlob.base_hash).where(RevisionBlob.hash == previous_hash)
+        )).one_or_none()
+        if previous is not None:
+            snapshot_hash = previous.base_hash or previous.hash
+            snapshot = (await db.execute(
+                select(RevisionBlob.data).where(RevisionBlob.hash == snapshot_hash)
+            )).scalar()
+            patch = make_patch(snapshot, content_json)
+            # The hash check also catches what == cannot see (1 vs 1.0 vs true)
+            if (
+                _size(patch) <= settings.REVISION_SNAPSHOT_RATIO * _size(content_json)
+                and content_hash(apply_patch(snapshot, patch)) == digest
+            ):
+                data, base_hash = patch, snapshot_hash
+
+    await db.execute(
+        insert(RevisionBlob)
+        .values(hash=digest, base_hash=base_hash, data=data)
+        .on_conflict_do_nothing(index_elements=["hash"])
+    )
+
+
+# ---------- Reading ----------
+
+async def list_revisions(
+    db: AsyncSession,
+    post_id: str,
+    limit: int = 50,
+    after: Optional[str] = None,
+) -> tuple[list[Row], Optional[str]]:
+    """
+    A post's revisions newest-first, without their content.
+
+    Returns:
+        (revisions, next_cursor or None)
+
+    Raises:
+        InvalidCursor: if ``after`` is not a cursor issued by this endpoint.
+    """
+    query = (
+        select(*_COLUMNS)
+        .outerjoin(RevisionBlob, RevisionBlob.hash == PostRevision.content_hash)
+        .where(PostRevision.post_id == post_id)
+    )
+    if after:
+        (revision_id,) = decode_cursor(after, int)
+        query = query.where(PostRevision.id < revision_id)
+    rows = (await db.execute(query.order_by(PostRevision.id.desc()).limit(limit + 1))).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].id)
+    return rows, next_cursor
+
+
+async def get_revision(
+    db: AsyncSession, post_id: str, revision_id: int
+) -> Optional[tuple[Row, Optional[dict[str, Any]]]]:
+    """One revision and its reconstructed ``content_json``, or None if the post has no such revision."""
+    row = (await db.execute(
+        select(*_COLUMNS)
+        .outerjoin(RevisionBlob, RevisionBlob.hash == PostRevision.content_hash)
+        .where(PostRevision.post_id == post_id, PostRevision.id == revision_id)
+    )).one_or_none()
+    if row is None:
+        return None
+    content = await load_state(db, row.content_hash) if row.content_hash is not None else None
+    return row, content
+
+
+async def load_state(db: AsyncSession, digest: str) -> Optional[dict[str, Any]]:
+    """Rebuild a stored state: its snapshot, plus at most one patch."""
+    blob = (await db.execute(
+        select(RevisionBlob.base_hash, RevisionBlob.data).where(RevisionBlob.hash == digest)
+    )).one_or_none()
+    if blob is None:
+        return None
+    if blob.base_hash is None:
+        return blob.data
+    snapshot = (await db.execute(
+        select(RevisionBlob.data).where(RevisionBlob.hash == blob.base_hash)
+    )).scalar()
+    return apply_patch(snapshot, blob.data)
+
+
+# ---------- Thinning / cleanup ----------
+
+async def thin_revisions(
+    db: AsyncSession,
+    post_id: Optional[str] = None,
+    now: Optional[datetime] = None,
+) -> int:
+    """
+    Drop old revisions of one post (or all posts) down to hourly / daily checkpoints.
+
+    The newest revision of each bucket survives. Runs inside the caller's
+    transaction; returns the number of revisions deleted.
+    """
+    now = (now or datetime.now(timezone.utc)).replace(tzinfo=None)  # stored as naive UTC
+    keep_all_after = now - timedelta(hours=settings.REVISION_KEEP_ALL_HOURS)
+    hourly_after = now - timedelta(days=settings.REVISION_HOURLY_DAYS)
+
+    query = select(
+        PostRevision.id, PostRevision.post_id, PostRevision.content_hash, PostRevision.created_at
+    ).where(PostRevision.created_at < keep_all_after)
+    if post_id is not None:
+        query = query.where(PostRevision.post_id == post_id)
+    rows = (await db.execute(
+        query.order_by(PostRevision.post_id, PostRevision.created_at.desc(), PostRevision.id.desc())
+    )).all()
+
+    kept: set[tuple] = set()
+    doomed: list[int] = []
+    hashes: set[str] = set()
+    for row in rows:
+        created = row.created_at.replace(tzinfo=None)
+        if created >= hourly_after:
+            bucket = created.replace(minute=0, second=0, microsecond=0)
+        else:
+            bucket = created.date()
+        if (row.post_id, bucket) in kept:
+            doomed.append(row.id)
+            if row.content_hash is not None:
+                hashes.add(row.content_hash)
+        else:
+            kept.add((row.post_id, bucket))
+
+    for start in range(0, len(doomed), DELETE_BATCH):
+        await db.execute(delete(PostRevision).where(PostRevision.id.in_(doomed[start:start + DELETE_BATCH])))
+    if hashes:
+        await collect_garbage(db, hashes)
+    return len(doomed)
+
+
+async def delete_history(db: AsyncSession, *post_ids: str) -> None:
+    """Remove the posts' revisions and the states only they used (the caller commits)."""
+    hashes = (await db.execute(
+        select(PostRevision.content_hash)
+        .where(PostRevision.post_id.in_(post_ids), PostRevision.content_hash.is_not(None))
+        .distinct()
+    )).scalars().all()
+    await db.execute(delete(PostRevision).where(PostRevision.post_id.in_(post_ids)))
+    if hashes:
+        await collect_garbage(db, hashes)
+
+
+async def collect_garbage(db: AsyncSession, candidates: Optional[Iterable[str]] = None) -> int:
+    """
+    Delete stored states no revision needs — neither its own state nor the
+    snapshot its state is patched from.
+
+    ``candidates`` limits the check to those hashes (and their snapshots);
+    None checks every state. Returns the number of states deleted.
+    """
+    live = select(PostRevision.content_hash).where(PostRevision.content_hash.is_not(None))
+    diff = aliased(RevisionBlob)
+    bases = select(diff.base_hash).where(diff.base_hash.is_not(None), diff.hash.in_(live))
+    stmt = delete(RevisionBlob).where(RevisionBlob.hash.not_in(live), RevisionBlob.hash.not_in(bases))
+
+    if candidates is None:
+        return (await db.execute(stmt)).rowcount
+
+    candidates = list(candidates)
+    deleted = 0
+    for start in range(0, len(candidates), DELETE_BATCH):
+        batch = candidates[start:start + DELETE_BATCH]
+        snapshots = (await db.execute(
+            select(RevisionBlob.base_hash).where(RevisionBlob.hash.in_(batch), RevisionBlob.base_hash.is_not(None))
+        )).scalars().all()
+        # Diffs first, so a snapshot whose last diff goes in this pass can go too
+        deleted += (await db.execute(stmt.where(RevisionBlob.hash.in_(batch)))).rowcount
+        if snapshots:
+            deleted += (await db.execute(stmt.where(RevisionBlob.hash.in_(set(snapshots))))).rowcount
+    return deleted
@@ -0,0 +1,158 @@
+"""Full-text search over posts (SQLite FTS5, BM25 ranking).
+
+Titles and the plain text of ``content_json`` are indexed. Writers call
+:func:`index_post` / :func:`unindex_post` inside their own transaction, so the
+index commits (or rolls back) together with the post; :func:`rebuild_index`
+back-fills databases created before search existed.
+"""
+
+import hashlib
+import re
+from datetime import datetime
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import bindparam, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.post import Post
+from app.models.post_search import POSTS_FTS_DDL
+from app.utils.lexical import extract_text
+from app.utils.pagination import decode_cursor, encode_cursor
+
+SNIPPET_TOKENS = 16
+HIGHLIGHT_OPEN, HIGHLIGHT_CLOSE = "<mark>", "</mark>"
+REBUILD_BATCH = 500
+
+# BM25 with title matches weighted 10x body matches (post_id column unweighted)
+_SCORE = "bm25(posts_fts, 0.0, 10.0, 1.0)"
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def fts_rowid(post_id: str) -> int:
+    """Stable 63-bit FTS rowid for a post id."""
+    return int.from_bytes(hashlib.blake2b(post_id.encode(), digest_size=8).digest(), "big") >> 1
+
+
+def build_match_query(q: str) -> Optional[str]:
+    """Turn free text into a safe FTS5 query: all terms required, last one as a prefix."""
+    terms = _TOKEN.findall(q)
+    if not terms:
+        return None
+    phrases = [f'"{t}"' for t in terms]
+    if not q[-1].isspace():
+        phrases[-1] += "*"  # search-as-you-type
+    return " ".join(phrases)
+
+
+async def index_post(db: AsyncSession, post_id: str, title: str, content_json: Optional[dict]) -> None:
+    """Insert or replace a post's index entry (caller commits)."""
+    rowid = fts_rowid(post_id)
+    await db.execute(text("DELETE FROM posts_fts WHERE rowid = :rowid"), {"rowid": rowid})
+    await db.execute(
+        text("INSERT INTO posts_fts (rowid, post_id, title, body) VALUES (:rowid, :post_id, :title, :body)"),
+        {"rowid": rowid, "post_id": post_id, "title": title or "", "body": extract_text(content_json)},
+    )
+
+
+async def index_posts(db: AsyncSession, posts: Iterable[tuple[str, str, Optional[dict]]]) -> None:
+    """Index ``(post_id, title, content_json)`` rows not indexed yet, in one executemany (caller commits)."""
+    await db.execute(
+        text("INSERT INTO posts_fts (rowid, post_id, title, body) VALUES (:rowid, :post_id, :title, :body)"),
+        [
+            {"rowid": fts_rowid(post_id), "post_id": post_id, "title": title or "", "body": extract_text(content_json)}
+            for post_id, title, content_json in posts
+        ],
+    )
+
+
+async def unindex_post(db: AsyncSession, post_id: str) -> None:
+    await db.execute(text("DELETE FROM posts_fts WHERE rowid = :rowid"), {"rowid": fts_rowid(post_id)})
+
+
+async def unindex_posts(db: AsyncSession, post_ids: Iterable[str]) -> None:
+    rowids = [fts_rowid(post_id) for post_id in post_ids]
+    if rowids:
+        await db.execute(
+            text("DELETE FROM posts_fts WHERE rowid IN :rowids").bindparams(bindparam("rowids", expanding=True)),
+            {"rowids": rowids},
+        )
+
+
+async def search_posts(
+    db: AsyncSession,
+    q: str,
+    author_id: Optional[str] = None,
+    limit: int = 20,
+    after: Optional[str] = None,
+) -> tuple[list[dict[str, Any]], Optional[str]]:
+    """
+    BM25-ranked matches among one author's posts (``author_id=None``: anonymous posts).
+
+    Each hit carries the highlighted title and a body snippet. Pages are
+    keyset-paginated on ``(score, rowid)``.
+
+    Returns:
+        (hits, next_cursor or None)
+
+    Raises:
+        InvalidCursor: if ``after`` is not a cursor issued by this endpoint.
+    """
+    match = build_match_query(q)
+    if match is None:
+        return [], None
+
+    params: dict[str, Any] = {
+        "match": match, "open": HIGHLIGHT_OPEN, "close": HIGHLIGHT_CLOSE,
+        "tokens": SNIPPET_TOKENS, "limit": limit + 1,
+    }
+    where = ["posts_fts MATCH :match"]
+    if author_id is not None:
+        where.append("p.author_id = :author_id")
+        params["author_id"] = author_id
+    else:
+        where.append("p.author_id IS NULL")
+    if after:
+        params["score"], params["rowid"] = decode_cursor(after, float, int)
+        where.append(f"({_SCORE} > :score OR ({_SCORE} = :score AND posts_fts.rowid > :rowid))")
+
+    rows = (await db.execute(text(f"""
+        SELECT p.id, p.status, p.updated_at,
+               highlight(posts_fts, 1, :open, :close) AS title,
+               snippet(posts_fts, 2, :open, :close, '…', :tokens) AS snippet,
+               {_SCORE} AS score, posts_fts.rowid AS fts_rowid
+        FROM posts_fts JOIN posts AS p ON p.id = posts_fts.post_id
+        WHERE {" AND ".join(where)}
+        ORDER BY score, fts_rowid
+        LIMIT :limit
+    """), params)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].score, rows[-1].fts_rowid)
+
+    hits = [
+        {
+            "id": row.id, "title": row.title, "snippet": row.snippet, "status": row.status,
+            "updated_at": datetime.fromisoformat(row.updated_at) if isinstance(row.updated_at, str) else row.updated_at,
+            "score": -row.score,  # bm25() is negative; higher = better for clients
+        }
+        for row in rows
+    ]
+    return hits, next_cursor
+
+
+async def rebuild_index(db: AsyncSession) -> int:
+    """Recreate the index from the posts table; returns the number of posts indexed."""
+    await db.execute(text(POSTS_FTS_DDL))
+    await db.execute(text("DELETE FROM posts_fts"))
+
+    count = 0
+    rows = await db.stream(select(Post.id, Post.title, Post.content_json).execution_options(yield_per=REBUILD_BATCH))
+    async for batch in rows.partitions():
+        await index_posts(db, batch)
+        count += len(batch)
+
+    await db.execute(text("INSERT INTO posts_fts (posts_fts) VALUES ('optimize')"))
+    await db.commit()
+    return count
@@ -0,0 +1,174 @@
+"""Write-behind buffer — coalesces autosave bursts into batched transactions.
+
+Opt-in via ``WRITE_BEHIND_ENABLED``. While a post is dirty its latest state
+lives here and is served to readers; a background task flushes every dirty
+post in one transaction every ``WRITE_BEHIND_FLUSH_INTERVAL_MS`` or as soon as
+``WRITE_BEHIND_MAX_PENDING`` posts are waiting. State is per process, so only
+enable it when a single worker owns the database.
+"""
+
+import asyncio
+import logging
+from typing import Any, Optional
+
+from sqlalchemy import update
+
+from app.config import settings
+from app.database import async_session
+from app.models.post import Post
+from app.services import revision_service, search_service
+
+logger = logging.getLogger(__name__)
+
+POST_COLUMNS = tuple(c.key for c in Post.__table__.columns)
+
+
+class WriteBehindBuffer:
+    def __init__(self, session_factory, enabled: bool, interval_ms: int, max_pending: int):
+        self._session_factory = session_factory
+        self.enabled = enabled
+        self.interval = interval_ms / 1000
+        self.max_pending = max_pending
+
+        self._states: dict[str, dict[str, Any]] = {}  # post_id -> full column state
+        self._dirty: dict[str, set[str]] = {}          # post_id -> columns not yet written
+        self._flush_lock = asyncio.Lock()
+        self._wakeup: Optional[asyncio.Event] = None  # created by start() on the running loop
+        self._task: Optional[asyncio.Task] = None
+
+        self.writes_received = 0
+        self.writes_coalesced = 0
+        self.flushes = 0
+        self.rows_flushed = 0
+        self.flush_errors = 0
+
+    # ---------- Reads ----------
+
+    def peek(self, post_id: str) -> Optional[dict[str, Any]]:
+        """Latest buffered state for a post, or None if it has no pending writes."""
+        return self._states.get(post_id)
+
+    def materialize(self, post_id: str) -> Optional[Post]:
+        """Detached ``Post`` built from the buffered state (never attached to a session)."""
+        state = self._states.get(post_id)
+        return Post(**state) if state is not None else None
+
+    def overlay(self, posts: list[Post]) -> list[Post]:
+        """Swap rows read from the DB for their buffered versions where dirty."""
+        if not self._states:
+            return posts
+        return [self.materialize(p.id) or p for p in posts]
+
+    # ---------- Writes ----------
+
+    def stage(self, post_id: str, base: dict[str, Any], changes: dict[str, Any]) -> dict[str, Any]:
+        """Merge ``changes`` into the post's pending state and schedule a flush."""
+        self.writes_received += 1
+        if post_id in self._dirty:
+            self.writes_coalesced += 1
+
+        state = self._states.setdefault(post_id, dict(base))
+        state.update(changes)
+        self._dirty.setdefault(post_id, set()).update(changes)
+
+        if self._wakeup is not None and len(self._dirty) >= self.max_pending:
+            self._wakeup.set()
+        return state
+
+    def discard(self, post_id: str) -> None:
+        """Drop pending writes for a post (e.g. it is being deleted)."""
+        self._states.pop(post_id, None)
+        self._dirty.pop(post_id, None)
+
+    async def flush(self, post_ids: Optional[list[str]] = None) -> int:
+        """Write pending posts (all, or just ``post_ids``) in one transaction."""
+        async with self._flush_lock:
+            candidates = list(self._dirty) if post_ids is None else post_ids
+            targets = [pid for pid in candidates if pid in self._dirty]
+            if not targets:
+                return 0
+
+            batch = {
+                pid: {col: self._states[pid][col] for col in self._dirty.pop(pid)}
+                for pid in targets
+            }
+            try:
+                async with self._session_factory() as db:
+                    for pid, values in batch.items():
+                        await db.execute(
+                            update(Post)
+                            .where(Post.id == pid)
+                            .values(**values)
+                            .execution_options(synchronize_session=False)
+                        )
+                        state = self._states.get(pid)  # None if deleted mid-flush
+                        if state is not None and ("title" in values or "content_json" in values):
+                            await search_service.index_post(db, pid, state["title"], state["content_json"])
+                            await revision_service.record_revision(
+                                db, pid, state["version"], state["title"],
+                                state["content_json"], state.get("content_hash"),
+                            )
+                    await db.commit()
+            except Exception:
+                # Put the columns back so the next flush retries them
+                self.flush_errors += 1
+                for pid, values in batch.items():
+                    if pid in self._states:
+                        self._dirty.setdefault(pid, set()).update(values)
+                raise
+
+            for pid in batch:
+                if pid not in self._dirty:  # no newer write arrived mid-flush
+                    self._states.pop(pid, None)
+            self.flushes += 1
+            self.rows_flushed += len(batch)
+            return len(batch)
+
+    # ---------- Lifecycle ----------
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Write-behind flush failed: {e}")
+
+    def start(self) -> None:
+        if self.enabled and self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flusher and write everything still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "pending": len(self._dirty),
+            "writes_received": self.writes_received,
+            "writes_coalesced": self.writes_coalesced,
+            "flushes": self.flushes,
+            "rows_flushed": self.rows_flushed,
+            "flush_errors": self.flush_errors,
+        }
+
+
+write_buffer = WriteBehindBuffer(
+    async_session,
+    enabled=settings.WRITE_BEHIND_ENABLED,
+    interval_ms=settings.WRITE_BEHIND_FLUSH_INTERVAL_MS,
+    max_pending=settings.WRITE_BEHIND_MAX_PENDING,
+)
@@ -1,16 +1,34 @@
 """JWT helper utilities for auth — uses bcrypt directly (passlib has Python 3.13 compat issues)."""
 
+import time
 from datetime import datetime, timedelta, timezone
+from typing import NamedTuple, Optional
 
 import bcrypt
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
 
 from app.config import settings
+from app.utils.cache import LRUCache
 
 
-def hash_password(plain: str) -> str:
-    """Hash a password using bcrypt."""
-    return bcrypt.hashpw(plain.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+class CurrentUser(NamedTuple):
+    """Identity taken from verified token claims (no database lookup)."""
+    id: str
+    email: Optional[str]
+
+
+# Verified token -> its claims; each entry lives no longer than the token is valid
+token_cache: LRUCache[str, CurrentUser] = LRUCache(max_entries=settings.AUTH_TOKEN_CACHE_MAX_ENTRIES)
+
+_bearer = HTTPBearer(auto_error=False)
+
+
+def hash_password(plain: str, rounds: int | None = None) -> str:
+    """Hash a password using bcrypt (CPU-heavy — call via services.password_hasher from handlers)."""
+    salt = bcrypt.gensalt(rounds or settings.BCRYPT_ROUNDS)
+    return bcrypt.hashpw(plain.encode("utf-8"), salt).decode("utf-8")
 
 
 def verify_password(plain: str, hashed: str) -> bool:
@@ -18,6 +36,11 @@ def verify_password(plain: str, hashed: str) -> bool:
     return bcrypt.checkpw(plain.encode("utf-8"), hashed.encode("utf-8"))
 
 
+def hash_rounds(hashed: str) -> int:
+    """Work factor encoded in a bcrypt hash (``$2b$<rounds>$...``)."""
+    return int(hashed.split("$")[2])
+
+
 def create_access_token(data: dict, expires_minutes: int | None = None) -> str:
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(
@@ -33,3 +56,53 @@ def decode_access_token(token: str) -> dict | None:
         return jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
     except JWTError:
         return None
+
+
+def verify_token(token: str) -> Optional[CurrentUser]:
+    """Claims of a valid token, served from ``token_cache`` after the first full decode."""
+    user = token_cache.get(token)
+    if user is not None:
+        return user
+
+    payload = decode_access_token(token)
+    if not payload or not payload.get("sub"):
+        return None
+    user = CurrentUser(id=payload["sub"], email=payload.get("email"))
+    ttl = payload["exp"] - time.time()
+    if ttl > 0:
+        token_cache.set(token, user, ttl=ttl)
+    return user
+
+
+async def get_current_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(_bearer),
+) -> Optional[CurrentUser]:
+    """
+    FastAPI dependency — the caller's identity from ``Authorization: Bearer``.
+
+    Returns None for anonymous requests; an invalid or expired token is a 401
+    so the client can drop it.
+    """
+    if credentials is None:
+        return None
+    user = verify_token(credentials.credentials)
+    if user is None:
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid or expired token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
+
+
+async def require_user(
+    user: Optional[CurrentUser] = Depends(get_current_user),
+) -> CurrentUser:
+    """FastAPI dependency — like ``get_current_user``, but anonymous is a 401 too."""
+    if user is None:
+        raise HTTPException(
+            status_code=401,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
@@ -0,0 +1,97 @@
+"""Bounded in-process LRU cache with optional TTL and byte budget."""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Generic, Hashable, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """
+    Least-recently-used cache bounded by entry count and (optionally) total size.
+
+    ``sizeof`` reports the cost of a value in bytes; entries larger than the
+    whole budget are never stored. Expired entries are dropped lazily on read.
+    Not thread-safe — intended for use from a single event loop.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+        sizeof: Callable[[V], int] = lambda v: 0,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._sizeof = sizeof
+        self._data: OrderedDict[K, tuple[V, float, int]] = OrderedDict()
+        self.total_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: K, count: bool = True) -> Optional[V]:
+        entry = self._data.get(key)
+        if entry is not None and entry[1] <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            entry = None
+        if entry is None:
+            if count:
+                self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        if count:
+            self.hits += 1
+        return entry[0]
+
+    def set(self, key: K, value: V, ttl: Optional[float] = None) -> None:
+        size = self._sizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        if key in self._data:
+            self._remove(key)
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.monotonic() + ttl if ttl is not None else float("inf")
+        self._data[key] = (value, expires, size)
+        self.total_bytes += size
+        while len(self._data) > self.max_entries or (
+            self.max_bytes is not None and self.total_bytes > self.max_bytes
+        ):
+            oldest = next(iter(self._data))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def pop(self, key: K) -> Optional[V]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        self._remove(key)
+        return entry[0]
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.total_bytes = 0
+
+    def _remove(self, key: K) -> None:
+        _, _, size = self._data.pop(key)
+        self.total_bytes -= size
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "entries": len(self._data),
+            "bytes": self.total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
@@ -0,0 +1,25 @@
+"""HTTP entity-tag helpers for conditional requests."""
+
+import hashlib
+from typing import Any, Optional
+
+
+def version_etag(version: int) -> str:
+    """Strong ETag for a single post — its write version (also accepted by ``If-Match``)."""
+    return f'"{version}"'
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag over an arbitrary tuple of values (e.g. query params + page keys)."""
+    digest = hashlib.sha1("\x1f".join(map(str, parts)).encode("utf-8")).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of ``If-None-Match`` against ``etag`` (RFC 9110 §13.1.2)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag.removeprefix("W/") in candidates
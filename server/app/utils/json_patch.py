@@ -0,0 +1,207 @@
+"""Minimal RFC 6902 JSON Patch implementation for Lexical state updates (apply and diff)."""
+
+import copy
+from typing import Any
+
+
+class JsonPatchError(ValueError):
+    """Raised when a patch is malformed or cannot be applied to the document."""
+
+
+class JsonPatchTestFailed(JsonPatchError):
+    """Raised when a ``test`` operation does not match the document."""
+
+
+def _parse_pointer(pointer: str) -> list[str]:
+    """Split an RFC 6901 JSON Pointer into unescaped reference tokens."""
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise JsonPatchError(f"Invalid JSON pointer: {pointer!r}")
+    return [t.replace("~1", "/").replace("~0", "~") for t in pointer[1:].split("/")]
+
+
+def _array_index(container: list, token: str, allow_end: bool) -> int:
+    if token == "-" and allow_end:
+        return len(container)
+    if not token.isdigit() or (token != "0" and token.startswith("0")):
+        raise JsonPatchError(f"Invalid array index: {token!r}")
+    index = int(token)
+    limit = len(container) + (1 if allow_end else 0)
+    if index >= limit:
+        raise JsonPatchError(f"Array index out of range: {index}")
+    return index
+
+
+def _resolve_parent(doc: Any, tokens: list[str]) -> Any:
+    node = doc
+    for token in tokens[:-1]:
+        if isinstance(node, dict):
+            if token not in node:
+                raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+            node = node[token]
+        elif isinstance(node, list):
+            node = node[_array_index(node, token, allow_end=False)]
+        else:
+            raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+    return node
+
+
+def _get(doc: Any, tokens: list[str]) -> Any:
+    if not tokens:
+        return doc
+    parent = _resolve_parent(doc, tokens)
+    token = tokens[-1]
+    if isinstance(parent, dict):
+        if token not in parent:
+            raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+        return parent[token]
+    if isinstance(parent, list):
+        return parent[_array_index(parent, token, allow_end=False)]
+    raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+
+
+def _add(doc: Any, tokens: list[str], value: Any) -> Any:
+    if not tokens:
+        return value
+    parent = _resolve_parent(doc, tokens)
+    token = tokens[-1]
+    if isinstance(parent, dict):
+        parent[token] = value
+    elif isinstance(parent, list):
+        parent.insert(_array_index(parent, token, allow_end=True), value)
+    else:
+        raise JsonPatchError(f"Cannot add to non-container at /{'/'.join(tokens)}")
+    return doc
+
+
+def _remove(doc: Any, tokens: list[str]) -> tuple[Any, Any]:
+    if not tokens:
+        raise JsonPatchError("Cannot remove the document root")
+    parent = _resolve_parent(doc, tokens)
+    token = tokens[-1]
+    if isinstance(parent, dict):
+        if token not in parent:
+            raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+        return doc, parent.pop(token)
+    if isinstance(parent, list):
+        return doc, parent.pop(_array_index(parent, token, allow_end=False))
+    raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+
+
+def _replace(doc: Any, tokens: list[str], value: Any) -> Any:
+    if not tokens:
+        return value
+    parent = _resolve_parent(doc, tokens)
+    token = tokens[-1]
+    if isinstance(parent, dict):
+        if token not in parent:
+            raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+        parent[token] = value
+    elif isinstance(parent, list):
+        parent[_array_index(parent, token, allow_end=False)] = value
+    else:
+        raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+    return doc
+
+
+def apply_patch(doc: Any, operations: list[dict[str, Any]]) -> Any:
+    """
+    Apply a JSON Patch to ``doc`` and return the patched document.
+
+    The input is never mutated; the patch is applied atomically to a deep
+    copy, so a failing operation leaves the caller's document untouched.
+
+    Raises:
+        JsonPatchTestFailed: if a ``test`` operation does not match.
+        JsonPatchError: for any other malformed or inapplicable operation.
+    """
+    result = copy.deepcopy(doc)
+    for operation in operations:
+        op = operation.get("op")
+        if "path" not in operation:
+            raise JsonPatchError(f"Operation {op!r} is missing 'path'")
+        path = _parse_pointer(operation["path"])
+
+        if op in ("add", "replace", "test") and "value" not in operation:
+            raise JsonPatchError(f"Operation {op!r} is missing 'value'")
+        if op in ("move", "copy") and "from" not in operation:
+            raise JsonPatchError(f"Operation {op!r} is missing 'from'")
+
+        if op == "add":
+            result = _add(result, path, copy.deepcopy(operation["value"]))
+        elif op == "remove":
+            result, _ = _remove(result, path)
+        elif op == "replace":
+            result = _replace(result, path, copy.deepcopy(operation["value"]))
+        elif op == "move":
+            source = _parse_pointer(operation["from"])
+            if path[: len(source)] == source and path != source:
+                raise JsonPatchError("Cannot move a value into one of its children")
+            result, value = _remove(result, source)
+            result = _add(result, path, value)
+        elif op == "copy":
+            value = copy.deepcopy(_get(result, _parse_pointer(operation["from"])))
+            result = _add(result, path, value)
+        elif op == "test":
+            if _get(result, path) != operation["value"]:
+                raise JsonPatchTestFailed(f"Test failed at {operation['path']}")
+        else:
+            raise JsonPatchError(f"Unknown patch operation: {op!r}")
+    return result
+
+
+def _escape(token: Any) -> str:
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def make_patch(src: Any, dst: Any) -> list[dict[str, Any]]:
+    """
+    Operations that turn ``src`` into ``dst`` (the inverse of :func:`apply_patch`).
+
+    Both documents are walked together, so an edit inside one Lexical node
+    becomes a single ``replace`` at that node's path. Lists are compared after
+    trimming their common prefix and suffix, which turns an inserted or deleted
+    block into one ``add`` / ``remove``. Only ``add``, ``remove`` and
+    ``replace`` are emitted.
+    """
+    operations: list[dict[str, Any]] = []
+    _diff(src, dst, "", operations)
+    return operations
+
+
+def _diff(src: Any, dst: Any, path: str, out: list[dict[str, Any]]) -> None:
+    if type(src) is type(dst) and src == dst:
+        return
+    if isinstance(src, dict) and isinstance(dst, dict):
+        for key, value in src.items():
+            if key in dst:
+                _diff(value, dst[key], f"{path}/{_escape(key)}", out)
+            else:
+                out.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+        for key, value in dst.items():
+            if key not in src:
+                out.append({"op": "add", "path": f"{path}/{_escape(key)}", "value": value})
+    elif isinstance(src, list) and isinstance(dst, list):
+        _diff_list(src, dst, path, out)
+    else:
+        out.append({"op": "replace", "path": path, "value": dst})
+
+
+def _diff_list(src: list, dst: list, path: str, out: list[dict[str, Any]]) -> None:
+    shared = min(len(src), len(dst))
+    start = 0
+    while start < shared and src[start] == dst[start]:
+        start += 1
+    end = 0
+    while end < shared - start and src[-1 - end] == dst[-1 - end]:
+        end += 1
+
+    old, new = src[start:len(src) - end], dst[start:len(dst) - end]
+    paired = min(len(old), len(new))
+    for i in range(paired):
+        _diff(old[i], new[i], f"{path}/{start + i}", out)
+    for _ in range(len(old) - paired):
+        out.append({"op": "remove", "path": f"{path}/{start + paired}"})
+    for i in range(paired, len(new)):
+        out.append({"op": "add", "path": f"{path}/{start + i}", "value": new[i]})
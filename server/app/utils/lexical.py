@@ -0,0 +1,148 @@
+"""Helpers for reading Lexical editor state (``content_json``) on the server."""
+
+import hashlib
+import json
+import math
+from typing import Any, NamedTuple, Optional
+
+EXCERPT_LENGTH = 200
+READING_WPM = 230  # average adult silent-reading speed
+
+# Lexical node types that start a new line of text when flattened
+_BLOCK_TYPES = {"paragraph", "heading", "quote", "listitem", "list", "code", "root"}
+
+
+# content_json is only validated as a dict: tolerate nodes of the wrong shape
+
+def _text(node: dict[str, Any]) -> str:
+    text = node.get("text")
+    return text if isinstance(text, str) else ""
+
+
+def _children(node: dict[str, Any]) -> list:
+    children = node.get("children")
+    return children if isinstance(children, list) else []
+
+
+def extract_text(content_json: Optional[dict[str, Any]]) -> str:
+    """Flatten a Lexical state into plain text, one line per block node."""
+    if not content_json:
+        return ""
+
+    lines: list[str] = []
+    current: list[str] = []
+    stack = [content_json.get("root", content_json)]
+    while stack:
+        node = stack.pop()
+        if node is None:
+            # Sentinel pushed after a block's children: close the line
+            if current:
+                lines.append("".join(current))
+                current = []
+            continue
+        if not isinstance(node, dict):
+            continue
+
+        node_type = node.get("type")
+        if node_type == "text":
+            current.append(_text(node))
+        elif node_type == "linebreak":
+            current.append("\n")
+
+        if node_type in _BLOCK_TYPES:
+            stack.append(None)
+        stack.extend(reversed(_children(node)))
+
+    if current:
+        lines.append("".join(current))
+    return "\n".join(line for line in lines if line.strip())
+
+
+def make_excerpt(content_json: Optional[dict[str, Any]], length: int = EXCERPT_LENGTH) -> Optional[str]:
+    """Short single-line preview of the post body, cut on a word boundary."""
+    return _excerpt(" ".join(extract_text(content_json).split()), length)
+
+
+def _excerpt(text: str, length: int) -> Optional[str]:
+    if not text:
+        return None
+    if len(text) <= length:
+        return text
+    cut = text[:length].rsplit(" ", 1)[0] or text[:length]
+    return f"{cut}…"
+
+
+def content_hash(content_json: Optional[dict[str, Any]]) -> Optional[str]:
+    """Stable digest of a Lexical state (canonical JSON), used to skip no-op rewrites."""
+    if content_json is None:
+        return None
+    canonical = json.dumps(content_json, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class ContentStats(NamedTuple):
+    excerpt: Optional[str]
+    word_count: int
+    char_count: int                   # characters of body text, whitespace included
+    reading_minutes: int
+    outline: list[dict[str, Any]]     # [{"level": 2, "text": "..."}] in document order
+
+
+def analyze(content_json: Optional[dict[str, Any]], excerpt_length: int = EXCERPT_LENGTH) -> ContentStats:
+    """Excerpt, counts, reading time and heading outline from one walk of the tree."""
+    if not content_json:
+        return ContentStats(None, 0, 0, 0, [])
+
+    words = 0
+    chars = 0
+    preview: list[str] = []   # text collected until the excerpt is long enough
+    preview_len = 0
+    outline: list[dict[str, Any]] = []
+    heading: Optional[list[str]] = None
+    glued = False  # previous text ended mid-word, in the same block
+
+    stack = [content_json.get("root", content_json)]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, tuple):
+            # Sentinel pushed after a heading's children: close the outline entry
+            title = " ".join("".join(heading).split())
+            if title:
+                outline.append({"level": node[1], "text": title})
+            heading = None
+            continue
+        if not isinstance(node, dict):
+            continue
+
+        node_type = node.get("type")
+        if node_type == "text":
+            text = _text(node)
+            chars += len(text)
+            words += len(text.split())
+            if glued and text and not text[0].isspace():
+                words -= 1  # formatting split one word across text nodes ("bo" + "ld")
+            glued = bool(text) and not text[-1].isspace()
+            if heading is not None:
+                heading.append(text)
+            if preview_len <= excerpt_length:
+                preview.append(text)
+                preview_len += len(text)
+        elif node_type == "linebreak" or node_type in _BLOCK_TYPES or node_type == "heading":
+            glued = False
+            if preview_len <= excerpt_length:
+                preview.append(" ")  # blocks and line breaks separate words
+
+        if node_type == "heading":
+            tag = node.get("tag")
+            heading = []
+            level = int(tag[1:]) if isinstance(tag, str) and tag[1:].isdigit() else 2
+            stack.append(("heading", level))
+        stack.extend(reversed(_children(node)))
+
+    return ContentStats(
+        excerpt=_excerpt(" ".join("".join(preview).split()), excerpt_length),
+        word_count=words,
+        char_count=chars,
+        reading_minutes=math.ceil(words / READING_WPM) if words else 0,
+        outline=outline,
+    )
@@ -0,0 +1,102 @@
+"""Lexical editor state (``content_json``) → HTML, cached per top-level block.
+
+Each block is keyed by a hash of its JSON, so rendering a post again after a
+small edit only renders the blocks that changed; unchanged blocks — in this
+post or any other — come from ``render_cache``.
+"""
+
+import hashlib
+import marshal
+import re
+from html import escape
+from typing import Any, Optional
+
+from app.config import settings
+from app.utils.cache import LRUCache
+
+# Lexical TextNode ``format`` bitmask, outermost tag first
+_TEXT_FORMATS = ((1, "strong"), (2, "em"), (8, "u"), (4, "s"), (16, "code"), (32, "sub"), (64, "sup"))
+_ALIGNMENTS = {"left", "center", "right", "justify", "start", "end"}
+_HEADINGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+_SAFE_URL = re.compile(r"^(?:https?:|mailto:|/|#)", re.IGNORECASE)
+
+render_cache: LRUCache[bytes, str] = LRUCache(
+    max_entries=settings.HTML_RENDER_CACHE_MAX_ENTRIES,
+    max_bytes=settings.HTML_RENDER_CACHE_MAX_BYTES,
+    sizeof=len,
+)
+
+
+def render_html(content_json: Optional[dict[str, Any]]) -> Optional[str]:
+    """Render a Lexical state to HTML (None for empty or malformed content)."""
+    if not content_json:
+        return None
+    root = content_json.get("root", content_json)
+    # content_json is only validated as a dict; anything else is not a document to render
+    if not isinstance(root, dict) or not isinstance(root.get("children", []), list):
+        return None
+
+    parts: list[str] = []
+    for block in root.get("children") or []:
+        if not isinstance(block, dict):
+            continue
+        # marshal is ~8x faster than json.dumps and lossless for JSON values; equal
+        # bytes imply equal content, so at worst an unusual encoding costs a miss
+        key = hashlib.blake2b(marshal.dumps(block), digest_size=16).digest()
+        html = render_cache.get(key)
+        if html is None:
+            html = _render_node(block)
+            render_cache.set(key, html)
+        parts.append(html)
+    return "".join(parts)
+
+
+def _render_node(node: dict[str, Any]) -> str:
+    node_type = node.get("type")
+    if node_type == "text":
+        return _render_text(node)
+    if node_type == "linebreak":
+        return "<br>"
+    if node_type == "tab":
+        return "\t"
+
+    children = node.get("children")
+    if not isinstance(children, list):
+        children = []
+    inner = "".join(_render_node(child) for child in children if isinstance(child, dict))
+
+    if node_type == "paragraph":
+        tag = "p"
+        inner = inner or "<br>"  # keep empty lines visible
+    elif node_type == "heading":
+        tag = node.get("tag")
+        tag = tag if isinstance(tag, str) and tag in _HEADINGS else "h2"
+    elif node_type == "quote":
+        tag = "blockquote"
+    elif node_type == "list":
+        tag = "ol" if node.get("listType") == "number" else "ul"
+    elif node_type == "listitem":
+        tag = "li"
+    elif node_type == "code":
+        return f"<pre><code>{inner}</code></pre>"
+    elif node_type in ("link", "autolink"):
+        url = str(node.get("url") or "")
+        href = f' href="{escape(url)}"' if _SAFE_URL.match(url) else ""
+        return f'<a{href} rel="noopener noreferrer">{inner}</a>'
+    else:
+        return inner  # unknown element: keep its content
+
+    align = node.get("format")
+    style = f' style="text-align: {align}"' if isinstance(align, str) and align in _ALIGNMENTS else ""
+    return f"<{tag}{style}>{inner}</{tag}>"
+
+
+def _render_text(node: dict[str, Any]) -> str:
+    text = node.get("text")
+    html = escape(text, quote=False) if isinstance(text, str) else ""
+    fmt = node.get("format")
+    if isinstance(fmt, int) and fmt:
+        for bit, tag in reversed(_TEXT_FORMATS):
+            if fmt & bit:
+                html = f"<{tag}>{html}</{tag}>"
+    return html
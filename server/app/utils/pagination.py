@@ -0,0 +1,39 @@
+"""Opaque keyset-pagination cursors.
+
+A cursor encodes the sort key of the last row on a page so the next page can
+be fetched with a ``WHERE (sort_key, id) < (:sort_key, :id)`` seek instead of
+an ``OFFSET`` scan.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client-supplied cursor cannot be decoded."""
+
+
+def encode_cursor(*values: Any) -> str:
+    """Encode sort-key values (datetimes, strings, numbers) into an opaque token."""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str, *types: type) -> tuple:
+    """Decode a token produced by :func:`encode_cursor`, coercing each value to ``types``."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(payload, list) or len(payload) != len(types):
+            raise InvalidCursor("Malformed cursor")
+        return tuple(
+            datetime.fromisoformat(v) if t is datetime else t(v)
+            for v, t in zip(payload, types)
+        )
+    except InvalidCursor:
+        raise
+    except (ValueError, TypeError, UnicodeError) as e:
+        raise InvalidCursor("Malformed cursor") from e
@@ -0,0 +1,67 @@
+"""Single-flight: concurrent callers asking for the same key share one in-flight call."""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Deduplicate identical in-flight coroutines.
+
+    The first caller for a key (the leader) starts ``fn()`` as a task; callers
+    arriving while it runs await the same task. Every waiter sees the leader's
+    result or exception. A waiter that is cancelled only detaches itself — the
+    shared task is cancelled once the last waiter has gone.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, _Call] = {}
+        self.leaders = 0
+        self.followers = 0
+        self.abandoned = 0
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _t: self._forget(key, call))
+            self.leaders += 1
+        else:
+            self.followers += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Everyone who wanted this result is gone
+                self._forget(key, call)
+                call.task.cancel()
+                self.abandoned += 1
+
+    def _forget(self, key: Hashable, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "followers": self.followers,
+            "abandoned": self.abandoned,
+        }
@@ -0,0 +1,117 @@
+"""Storage size and read/write latency of plain vs compressed post content.
+
+Writes the same synthetic posts (Lexical JSON in the shape the editor
+serializes, plus rendered HTML) into three throwaway SQLite files — plain
+TEXT, zlib without a dictionary, and zlib with the preset dictionaries — and
+reports file size, insert time and read-and-decode time.
+
+Run from ``server/``::
+
+    python -m benchmarks.bench_compression
+"""
+
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from app.models import types
+from app.utils.lexical_html import render_html
+
+POSTS = 2_000
+SIZES = (10, 60)  # paragraphs per post, min/max
+
+_WORDS = (
+    "the a of to and in that is for it with as on editor post draft save server cache write read "
+    "query index latency sqlite python async request response user content block paragraph"
+).split()
+
+
+def _text(rng: random.Random) -> dict:
+    return {
+        "detail": 0, "format": rng.choice((0, 0, 0, 1, 2)), "mode": "normal", "style": "",
+        "text": " ".join(rng.choices(_WORDS, k=rng.randint(6, 30))) + ".", "type": "text", "version": 1,
+    }
+
+
+def make_post(rng: random.Random) -> dict:
+    blocks = []
+    for i in range(rng.randint(*SIZES)):
+        block = {
+            "children": [_text(rng) for _ in range(rng.randint(1, 3))],
+            "direction": "ltr", "format": "", "indent": 0, "type": "paragraph", "version": 1,
+            "textFormat": 0, "textStyle": "",
+        }
+        if i % 8 == 0:
+            block.update(type="heading", tag="h2")
+            del block["textFormat"], block["textStyle"]
+        blocks.append(block)
+    return {"root": {"children": blocks, "direction": "ltr", "format": "", "indent": 0, "type": "root", "version": 1}}
+
+
+def _plain(value):
+    return value
+
+
+VARIANTS = {
+    "plain TEXT": (lambda j: json.dumps(j), _plain, json.loads, _plain),
+    "zlib": (
+        lambda j: types.compress(json.dumps(j, separators=(",", ":")).encode()),
+        lambda h: types.compress(h.encode()),
+        lambda b: json.loads(types.decompress(b)),
+        lambda b: types.decompress(b).decode(),
+    ),
+    "zlib + dictionary": (
+        types.encode_json, types.encode_text,
+        lambda b: json.loads(types.decompress(b)),
+        lambda b: types.decompress(b).decode(),
+    ),
+}
+
+
+def run(name: str, posts: list[tuple[dict, str]], directory: str) -> None:
+    encode_json, encode_html, decode_json, decode_html = VARIANTS[name]
+    path = os.path.join(directory, name.replace(" ", "_") + ".db")
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE posts (id INTEGER PRIMARY KEY, content_json, content_html)")
+
+    start = time.perf_counter()
+    for i, (content, html) in enumerate(posts):
+        db.execute("INSERT INTO posts VALUES (?, ?, ?)", (i, encode_json(content), encode_html(html)))
+    db.commit()
+    write_ms = (time.perf_counter() - start) * 1000 / len(posts)
+
+    start = time.perf_counter()
+    for i in range(len(posts)):
+        content_json, content_html = db.execute(
+            "SELECT content_json, content_html FROM posts WHERE id = ?", (i,)
+        ).fetchone()
+        decode_json(content_json)
+        decode_html(content_html)
+    read_ms = (time.perf_counter() - start) * 1000 / len(posts)
+
+    db.execute("VACUUM")
+    db.close()
+    size_mb = os.path.getsize(path) / 1024 / 1024
+    print(f"{name:>18} {size_mb:>8.1f}MB {write_ms:>9.3f}ms {read_ms:>9.3f}ms")
+
+
+def main() -> None:
+    rng = random.Random(0)
+    posts = []
+    for _ in range(POSTS):
+        content = make_post(rng)
+        posts.append((content, render_html(content)))
+    raw_mb = sum(len(json.dumps(c)) + len(h) for c, h in posts) / 1024 / 1024
+
+    print(f"{POSTS} posts, {raw_mb:.1f}MB of JSON + HTML")
+    print(f"{'storage':>18} {'db size':>10} {'write/post':>11} {'read/post':>11}")
+    with tempfile.TemporaryDirectory() as directory:
+        for name in VARIANTS:
+            run(name, posts, directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Latency of the local "fast" AI engine on synthetic posts.
+
+Run from ``server/``::
+
+    python -m benchmarks.bench_local_ai
+"""
+
+import random
+import statistics
+import time
+
+from app.services import local_ai
+
+SIZES = (1_000, 5_000, 20_000, 50_000)
+RUNS = 20
+
+_TOPICS = ["database", "cache", "latency", "python", "index", "query", "server", "editor"]
+_WORDS = "the a fast slow write read post page user request response system layer disk".split()
+
+
+def make_post(chars: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    sentences: list[str] = []
+    size = 0
+    while size < chars:
+        words = rng.choices(_WORDS + _TOPICS * 2, k=rng.randint(8, 20))
+        sentence = " ".join(words).capitalize() + "."
+        sentences.append(sentence)
+        size += len(sentence) + 1
+    return " ".join(sentences)
+
+
+def _time(fn, text: str) -> tuple[float, float]:
+    samples = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        fn(text)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main() -> None:
+    print(f"{'chars':>8} {'summarize p50':>14} {'p95':>8} {'titles p50':>11} {'p95':>8}")
+    for size in SIZES:
+        text = make_post(size)
+        s50, s95 = _time(local_ai.summarize, text)
+        t50, t95 = _time(local_ai.suggest_titles, text)
+        print(f"{size:>8} {s50:>12.2f}ms {s95:>6.2f}ms {t50:>9.2f}ms {t95:>6.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Throughput of the Lexical → HTML renderer on large documents.
+
+Times a cold render (empty cache), a warm re-render, and a re-render after a
+one-block edit — the autosave-then-read pattern the per-block cache targets.
+
+Run from ``server/``::
+
+    python -m benchmarks.bench_render_html
+"""
+
+import copy
+import json
+import random
+import time
+
+from app.utils.lexical_html import render_cache, render_html
+
+BLOCKS = (100, 1_000, 10_000)
+RUNS = 5
+
+
+def make_document(blocks: int, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    words = "the quick brown fox jumps over lazy dogs while editors autosave drafts".split()
+
+    def text(n: int) -> list[dict]:
+        return [
+            {"type": "text", "text": " ".join(rng.choices(words, k=rng.randint(4, 12))) + " ",
+             "format": rng.choice((0, 0, 0, 1, 2, 8, 3))}
+            for _ in range(n)
+        ]
+
+    children = []
+    for i in range(blocks):
+        kind = i % 10
+        if kind == 0:
+            children.append({"type": "heading", "tag": "h2", "children": text(1)})
+        elif kind == 5:
+            children.append({"type": "list", "listType": "bullet", "children": [
+                {"type": "listitem", "children": text(2)} for _ in range(3)
+            ]})
+        elif kind == 8:
+            children.append({"type": "quote", "children": text(2)})
+        else:
+            children.append({"type": "paragraph", "children": text(rng.randint(2, 6))})
+    return {"root": {"type": "root", "children": children}}
+
+
+def _best(fn) -> float:
+    best = float("inf")
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> None:
+    print(f"{'blocks':>7} {'json KB':>8} {'cold':>9} {'warm':>9} {'1 edit':>9} {'cold MB/s':>10}")
+    for blocks in BLOCKS:
+        doc = make_document(blocks)
+        size_kb = len(json.dumps(doc)) / 1024
+
+        def cold():
+            render_cache.clear()
+            render_html(doc)
+
+        cold_ms = _best(cold)
+        render_html(doc)
+        warm_ms = _best(lambda: render_html(doc))
+
+        edited = copy.deepcopy(doc)
+        paragraph = edited["root"]["children"][blocks // 2]
+        edit_ms = _best(lambda: (paragraph["children"][0].update(text=str(time.perf_counter_ns())), render_html(edited)))
+
+        print(
+            f"{blocks:>7} {size_kb:>8.0f} {cold_ms:>7.1f}ms {warm_ms:>7.1f}ms {edit_ms:>7.1f}ms"
+            f" {size_kb / 1024 / (cold_ms / 1000):>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Bulk NDJSON import/export vs. the one-post-at-a-time API paths.
+
+Imports ``POSTS`` synthetic posts through :func:`post_transfer.import_posts`
+(batched executemany transactions) into a throwaway SQLite file, and times
+the per-post ``create_post`` path on a sample for comparison. Then exports
+everything through the streaming cursor and, for comparison, by paging
+``list_posts`` 50 at a time like a client of ``GET /api/posts/`` would.
+Peak Python heap during each export is measured with tracemalloc in a
+separate pass, so the timings are not skewed by it.
+
+Run from ``server/``::
+
+    python -m benchmarks.bench_transfer
+"""
+
+import asyncio
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+_DIRECTORY = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_DIRECTORY}/bench_transfer.db"
+
+from app.database import async_session, close_db, init_db, read_session  # noqa: E402
+from app.schemas.post import PostCreate, PostExport  # noqa: E402
+from app.services import post_service, post_transfer  # noqa: E402
+
+POSTS = 100_000
+SAMPLE = 2_000          # posts created one by one for the baseline
+PAGE = 50
+CHUNK = 64 * 1024       # request body chunk size, as an ASGI server would deliver it
+
+_WORDS = "the a of to and in editor post draft save server cache write read query index sqlite".split()
+
+
+def make_line(rng: random.Random, i: int) -> bytes:
+    content = {"root": {"type": "root", "children": [
+        {"type": "paragraph", "children": [
+            {"type": "text", "text": " ".join(rng.choices(_WORDS, k=rng.randint(10, 40))) + "."},
+        ]}
+        for _ in range(rng.randint(2, 8))
+    ]}}
+    return json.dumps({"title": f"Post {i}", "content_json": content}).encode() + b"\n"
+
+
+async def _chunks(body: bytes):
+    for start in range(0, len(body), CHUNK):
+        yield body[start:start + CHUNK]
+
+
+async def _export_stream() -> int:
+    size = 0
+    async for chunk in post_transfer.export_posts(None):
+        size += len(chunk)
+    return size
+
+
+async def _export_pages() -> int:
+    size, after = 0, None
+    while True:
+        async with read_session() as db:
+            posts, _, after = await post_service.list_posts(db, limit=PAGE, after=after, include_total=False)
+        size += sum(len(PostExport.model_validate(p).model_dump_json()) + 1 for p in posts)
+        if after is None:
+            return size
+
+
+async def _peak(export) -> float:
+    tracemalloc.start()
+    await export()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024 / 1024
+
+
+async def main() -> None:
+    await init_db()
+    rng = random.Random(0)
+    body = b"".join(make_line(rng, i) for i in range(POSTS))
+    print(f"{POSTS} posts, {len(body) / 1024 / 1024:.1f}MB of NDJSON")
+
+    start = time.perf_counter()
+    result = await post_transfer.import_posts(_chunks(body), author_id=None)
+    bulk = time.perf_counter() - start
+    assert result.imported == POSTS, result.errors[:3]
+
+    sample = [json.loads(line) for line in body.splitlines()[:SAMPLE]]
+    start = time.perf_counter()
+    for item in sample:
+        async with async_session() as db:
+            await post_service.create_post(db, PostCreate(**item))
+    single = time.perf_counter() - start
+
+    print(f"{'import':>22} {'per post':>10} {'posts/s':>10}")
+    print(f"{'NDJSON, batched':>22} {bulk / POSTS * 1e6:>8.0f}us {POSTS / bulk:>10.0f}")
+    print(f"{'create_post, one each':>22} {single / SAMPLE * 1e6:>8.0f}us {SAMPLE / single:>10.0f}")
+
+    print(f"{'export':>22} {'total':>10} {'peak heap':>10}")
+    for name, export in (("NDJSON stream", _export_stream), (f"list_posts x{PAGE}", _export_pages)):
+        start = time.perf_counter()
+        size = await export()
+        elapsed = time.perf_counter() - start
+        peak = await _peak(export)
+        print(f"{name:>22} {elapsed:>9.2f}s {peak:>8.1f}MB  ({size / 1024 / 1024:.0f}MB)")
+    await close_db()
+    shutil.rmtree(_DIRECTORY, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
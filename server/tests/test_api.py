@@ -1,11 +1,33 @@
 """Backend tests — Posts CRUD, Auth, and AI endpoints."""
 
+import asyncio
+import json
+import threading
+from datetime import datetime, timedelta
+
 import pytest
 import pytest_asyncio
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select, text
 
-from app.database import Base, engine
+from app import manage
+from app.config import settings
+from app.database import Base, async_session, engine, get_db, get_read_db, init_db, read_engine
 from app.main import app
+from app.models.post import Post
+from app.models.user import User
+from app.services import (
+    ai_service, counter_service, post_service, post_transfer, revision_service, search_service,
+)
+from app.services.ai_cache import ai_cache
+from app.services.ai_client import AiClient
+from app.services.ai_jobs import AiJobQueue, job_queue
+from app.services.password_hasher import password_hasher
+from app.services.write_buffer import write_buffer
+from app.utils.auth import token_cache
+from app.utils.lexical_html import render_cache, render_html
 
 
 @pytest_asyncio.fixture(autouse=True)
@@ -16,6 +38,12 @@ async def setup_db():
     yield
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
+    # In-process caches outlive the tables; start every test cold
+    post_service.post_cache.clear()
+    ai_cache.memory.clear()
+    token_cache.clear()
+    render_cache.clear()
+    await job_queue.stop()
 
 
 @pytest_asyncio.fixture
@@ -71,6 +99,55 @@ async def test_list_posts_filter_by_status(client: AsyncClient):
     assert data["posts"][0]["status"] == "published"
 
 
+@pytest.mark.asyncio
+async def test_list_posts_cursor_pagination(client: AsyncClient):
+    for i in range(5):
+        await client.post("/api/posts/", json={"title": f"Post {i}"})
+
+    seen = []
+    resp = await client.get("/api/posts/?limit=2")
+    data = resp.json()
+    assert data["total"] == 5  # offset mode keeps the legacy total
+    seen += [p["title"] for p in data["posts"]]
+
+    while data["next_cursor"]:
+        resp = await client.get(f"/api/posts/?limit=2&after={data['next_cursor']}")
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["total"] is None  # no COUNT in cursor mode unless asked for
+        seen += [p["title"] for p in data["posts"]]
+
+    assert seen == [f"Post {i}" for i in reversed(range(5))]
+
+
+@pytest.mark.asyncio
+async def test_list_posts_invalid_cursor(client: AsyncClient):
+    resp = await client.get("/api/posts/?after=not-a-cursor")
+    assert resp.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_list_posts_summary_projection(client: AsyncClient):
+    content = {
+        "root": {
+            "type": "root",
+            "children": [
+                {"type": "heading", "children": [{"type": "text", "text": "Intro"}]},
+                {"type": "paragraph", "children": [{"type": "text", "text": "Body text here."}]},
+            ],
+        }
+    }
+    await client.post("/api/posts/", json={"title": "Summarised", "content_json": content})
+
+    resp = await client.get("/api/posts/?fields=summary")
+    assert resp.status_code == 200
+    post = resp.json()["posts"][0]
+    assert post["title"] == "Summarised"
+    assert post["excerpt"] == "Intro Body text here."
+    assert "content_json" not in post
+    assert "content_html" not in post
+
+
 @pytest.mark.asyncio
 async def test_get_post(client: AsyncClient):
     create_resp = await client.post("/api/posts/", json={"title": "My Post"})
@@ -102,6 +179,138 @@ async def test_update_post(client: AsyncClient):
     assert data["content_json"] == {"root": {"children": []}}
 
 
+@pytest.mark.asyncio
+async def test_update_post_json_patch(client: AsyncClient):
+    content = {"root": {"children": [{"type": "text", "text": "Hello"}]}}
+    create_resp = await client.post("/api/posts/", json={"content_json": content})
+    post = create_resp.json()
+    assert post["version"] == 1
+
+    resp = await client.patch(
+        f"/api/posts/{post['id']}",
+        json={"content_patch": [
+            {"op": "test", "path": "/root/children/0/text", "value": "Hello"},
+            {"op": "replace", "path": "/root/children/0/text", "value": "Hello, world"},
+            {"op": "add", "path": "/root/children/-", "value": {"type": "text", "text": "!"}},
+        ]},
+        headers={"If-Match": '"1"'},
+    )
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["version"] == 2
+    assert data["content_json"]["root"]["children"] == [
+        {"type": "text", "text": "Hello, world"},
+        {"type": "text", "text": "!"},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_update_post_stale_version_conflict(client: AsyncClient):
+    create_resp = await client.post("/api/posts/", json={"title": "v1"})
+    post_id = create_resp.json()["id"]
+
+    await client.patch(f"/api/posts/{post_id}", json={"title": "v2"}, headers={"If-Match": "1"})
+    resp = await client.patch(f"/api/posts/{post_id}", json={"title": "stale"}, headers={"If-Match": "1"})
+    assert resp.status_code == 409
+
+    get_resp = await client.get(f"/api/posts/{post_id}")
+    assert get_resp.json()["title"] == "v2"
+
+
+@pytest.mark.asyncio
+async def test_update_post_invalid_patch(client: AsyncClient):
+    create_resp = await client.post("/api/posts/", json={"content_json": {"root": {}}})
+    post_id = create_resp.json()["id"]
+
+    resp = await client.patch(
+        f"/api/posts/{post_id}",
+        json={"content_patch": [{"op": "remove", "path": "/root/missing"}]},
+    )
+    assert resp.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_write_behind_coalesces_autosaves(client: AsyncClient, monkeypatch):
+    monkeypatch.setattr(write_buffer, "enabled", True)
+    create_resp = await client.post("/api/posts/", json={"title": "Draft"})
+    post_id = create_resp.json()["id"]
+
+    for i in range(3):
+        resp = await client.patch(f"/api/posts/{post_id}", json={"title": f"Edit {i}"})
+        assert resp.status_code == 200
+        assert resp.json()["version"] == i + 2
+
+    # Reads are served from the buffer before anything reaches SQLite
+    assert (await client.get(f"/api/posts/{post_id}")).json()["title"] == "Edit 2"
+    async with async_session() as db:
+        assert (await db.get(Post, post_id)).title == "Draft"
+
+    assert await write_buffer.flush() == 1
+    async with async_session() as db:
+        stored = await db.get(Post, post_id)
+        assert (stored.title, stored.version) == ("Edit 2", 4)
+
+    stats = (await client.get("/metrics")).json()["write_behind"]
+    assert stats["writes_coalesced"] >= 2
+    assert stats["pending"] == 0
+
+
+@pytest.mark.asyncio
+async def test_get_post_cache_invalidation(client: AsyncClient):
+    create_resp = await client.post("/api/posts/", json={"title": "Cached"})
+    post_id = create_resp.json()["id"]
+
+    before = (await client.get("/metrics")).json()["post_cache"]
+    await client.get(f"/api/posts/{post_id}")
+    await client.get(f"/api/posts/{post_id}")
+    after = (await client.get("/metrics")).json()["post_cache"]
+    assert after["misses"] - before["misses"] == 1
+    assert after["hits"] - before["hits"] == 1
+
+    await client.patch(f"/api/posts/{post_id}", json={"title": "Edited"})
+    assert (await client.get(f"/api/posts/{post_id}")).json()["title"] == "Edited"
+
+    await client.post(f"/api/posts/{post_id}/publish")
+    assert (await client.get(f"/api/posts/{post_id}")).json()["status"] == "published"
+
+    await client.delete(f"/api/posts/{post_id}")
+    assert (await client.get(f"/api/posts/{post_id}")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_get_post_conditional_etag(client: AsyncClient):
+    create_resp = await client.post("/api/posts/", json={"title": "Tagged"})
+    post_id = create_resp.json()["id"]
+
+    resp = await client.get(f"/api/posts/{post_id}")
+    etag = resp.headers["etag"]
+    resp = await client.get(f"/api/posts/{post_id}", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+
+    await client.patch(f"/api/posts/{post_id}", json={"title": "Changed"})
+    resp = await client.get(f"/api/posts/{post_id}", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.headers["etag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_list_posts_conditional_etag(client: AsyncClient):
+    await client.post("/api/posts/", json={"title": "One"})
+
+    resp = await client.get("/api/posts/?fields=summary")
+    etag = resp.headers["etag"]
+    resp = await client.get("/api/posts/?fields=summary", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+
+    # Same rows, different query parameters -> different representation
+    resp = await client.get("/api/posts/", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+
+    await client.post("/api/posts/", json={"title": "Two"})
+    resp = await client.get("/api/posts/?fields=summary", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+
+
 @pytest.mark.asyncio
 async def test_content_json_round_trip(client: AsyncClient):
     """Critical test: Lexical JSON state must round-trip losslessly."""
@@ -134,6 +343,372 @@ async def test_content_json_round_trip(client: AsyncClient):
     assert get_resp.json()["content_json"] == lexical_state
 
 
+def _lexical(body: str) -> dict:
+    return {"root": {"type": "root", "children": [
+        {"type": "paragraph", "children": [{"type": "text", "text": body}]},
+    ]}}
+
+
+@pytest.mark.asyncio
+async def test_search_posts(client: AsyncClient):
+    ids = {}
+    for title, body in [
+        ("Tuning SQLite", "Write-ahead logging lets readers run alongside a writer."),
+        ("Weekend notes", "We tried tuning the sqlite cache size and it helped."),
+        ("Gardening", "Tomatoes need sun."),
+    ]:
+        resp = await client.post("/api/posts/", json={"title": title, "content_json": _lexical(body)})
+        ids[title] = resp.json()["id"]
+
+    resp = await client.get("/api/posts/search", params={"q": "sqlite tuning"})
+    hits = resp.json()["hits"]
+    assert [h["id"] for h in hits] == [ids["Tuning SQLite"], ids["Weekend notes"]]  # title match ranks first
+    assert hits[0]["title"] == "<mark>Tuning</mark> <mark>SQLite</mark>"
+    assert "<mark>sqlite</mark>" in hits[1]["snippet"]
+
+    # Keyset pages, prefix matching on the last term
+    resp = await client.get("/api/posts/search", params={"q": "sqli", "limit": 1})
+    first = resp.json()
+    resp = await client.get("/api/posts/search", params={"q": "sqli", "limit": 1, "after": first["next_cursor"]})
+    assert [h["id"] for h in first["hits"] + resp.json()["hits"]] == [ids["Tuning SQLite"], ids["Weekend notes"]]
+    assert resp.json()["next_cursor"] is None
+
+    # Kept in sync on update and delete
+    await client.patch(f"/api/posts/{ids['Gardening']}", json={"title": "SQLite in the garden"})
+    await client.delete(f"/api/posts/{ids['Weekend notes']}")
+    resp = await client.get("/api/posts/search", params={"q": "sqlite"})
+    assert {h["id"] for h in resp.json()["hits"]} == {ids["Tuning SQLite"], ids["Gardening"]}
+
+    # Back-fill from scratch gives the same results
+    async with async_session() as db:
+        await db.execute(text("DELETE FROM posts_fts"))
+        await db.commit()
+        assert await search_service.rebuild_index(db) == 2
+    resp = await client.get("/api/posts/search", params={"q": "sqlite"})
+    assert len(resp.json()["hits"]) == 2
+
+    assert (await client.get("/api/posts/search", params={"q": "!!"})).json()["hits"] == []
+
+
+@pytest.mark.asyncio
+async def test_content_html_rendered_server_side(client: AsyncClient):
+    content = {"root": {"type": "root", "children": [
+        {"type": "heading", "tag": "h2", "children": [{"type": "text", "text": "Intro", "format": 0}]},
+        {"type": "paragraph", "children": [
+            {"type": "text", "text": "Bold <b>", "format": 1},
+            {"type": "text", "text": " and ", "format": 0},
+            {"type": "text", "text": "both", "format": 2 | 8},
+        ]},
+        {"type": "quote", "children": [{"type": "text", "text": "Quoted"}]},
+        {"type": "list", "listType": "number", "children": [
+            {"type": "listitem", "children": [{"type": "text", "text": "One"}]},
+        ]},
+    ]}}
+    expected = (
+        "<h2>Intro</h2>"
+        "<p><strong>Bold &lt;b&gt;</strong> and <em><u>both</u></em></p>"
+        "<blockquote>Quoted</blockquote>"
+        "<ol><li>One</li></ol>"
+    )
+
+    # Client-sent HTML is ignored; drafts render on read, not on write
+    resp = await client.post("/api/posts/", json={"content_json": content, "content_html": "<p>stale</p>"})
+    post_id = resp.json()["id"]
+    assert resp.json()["content_html"] is None
+    async with async_session() as db:
+        assert (await db.get(Post, post_id)).content_html is None
+    assert (await client.get(f"/api/posts/{post_id}")).json()["content_html"] == expected
+    assert (await client.get("/api/posts/")).json()["posts"][0]["content_html"] == expected
+
+    misses = render_cache.stats()["misses"]
+    for i in range(3):  # autosaves
+        edit = {"op": "replace", "path": "/root/children/2/children/0/text", "value": f"Quoted {i}"}
+        resp = await client.patch(f"/api/posts/{post_id}", json={"content_patch": [edit]})
+        assert resp.json()["content_html"] is None
+    assert render_cache.stats()["misses"] == misses
+
+    # Publishing stores the rendered HTML
+    await client.patch(f"/api/posts/{post_id}", json={"content_json": content})
+    await client.post(f"/api/posts/{post_id}/publish")
+    async with async_session() as db:
+        assert (await db.get(Post, post_id)).content_html == expected
+
+    # Editing one block re-renders only that block
+    render_cache.clear()
+    render_html(content)
+    content["root"]["children"][2]["children"][0]["text"] = "Requoted"
+    misses = render_cache.stats()["misses"]
+    assert "<blockquote>Requoted</blockquote>" in render_html(content)
+    assert render_cache.stats()["misses"] == misses + 1
+
+
+@pytest.mark.asyncio
+async def test_malformed_content_json_is_not_rendered(client: AsyncClient):
+    odd_heading = {"type": "heading", "tag": "h9", "format": {}, "children": [{"type": "text", "text": "Hi"}]}
+    for content in (
+        {"root": None},
+        {"root": []},
+        {"root": {"children": "text"}},
+        {"root": {"children": [odd_heading, {"type": "paragraph", "children": {"text": "x"}}]}},
+    ):
+        resp = await client.post("/api/posts/", json={"title": "Odd", "content_json": content})
+        assert resp.status_code == 201
+        resp = await client.post(f"/api/posts/{resp.json()['id']}/publish")
+        assert resp.status_code == 200
+    assert render_html({"root": {"children": [odd_heading]}}) == "<h2>Hi</h2>"
+
+    resp = await client.get("/api/posts/")
+    assert resp.status_code == 200 and resp.json()["total"] == 4
+
+
+@pytest.mark.asyncio
+async def test_derived_post_stats(client: AsyncClient):
+    content = {"root": {"type": "root", "children": [
+        {"type": "heading", "tag": "h1", "children": [{"type": "text", "text": "Getting started"}]},
+        {"type": "paragraph", "children": [
+            {"type": "text", "text": "Bo", "format": 1}, {"type": "text", "text": "ld words here."},
+        ]},
+        {"type": "heading", "tag": "h2", "children": [{"type": "text", "text": "Next"}]},
+    ]}}
+    resp = await client.post("/api/posts/", json={"content_json": content})
+    post = resp.json()
+    assert post["word_count"] == 6  # "Bo" + "ld" is one word
+    assert post["char_count"] == len("Getting started" + "Bold words here." + "Next")
+    assert post["reading_minutes"] == 1
+    assert post["outline"] == [{"level": 1, "text": "Getting started"}, {"level": 2, "text": "Next"}]
+
+    summary = (await client.get("/api/posts/", params={"fields": "summary"})).json()["posts"][0]
+    assert summary["word_count"] == 6 and "content_json" not in summary
+
+    # Re-sending identical content is a no-op; a real change recomputes
+    resp = await client.patch(f"/api/posts/{post['id']}", json={"content_json": content})
+    assert resp.json()["version"] == post["version"]
+    resp = await client.patch(f"/api/posts/{post['id']}", json={"content_json": _lexical("One two " * 300)})
+    assert resp.json()["word_count"] == 600 and resp.json()["reading_minutes"] == 3
+    assert resp.json()["outline"] == []
+
+    # Nodes of the wrong shape are skipped rather than failing the write
+    odd = {"root": {"children": [
+        {"type": "heading", "tag": 3, "children": [{"type": "text", "text": "Numbered"}]},
+        {"type": "paragraph", "children": [{"type": "text", "text": 42}, {"type": "text", "text": "kept"}]},
+        {"type": "quote", "children": 7},
+    ]}}
+    resp = await client.patch(f"/api/posts/{post['id']}", json={"content_json": odd})
+    assert resp.status_code == 200
+    assert resp.json()["outline"] == [{"level": 2, "text": "Numbered"}] and resp.json()["word_count"] == 2
+    resp = await client.post("/api/posts/", json={"content_json": odd})
+    assert resp.status_code == 201
+    assert (await client.get("/api/posts/search", params={"q": "kept"})).json()["hits"]
+
+
+@pytest.mark.asyncio
+async def test_database_from_before_new_columns(client: AsyncClient):
+    # posts as the original schema created it: no excerpt, version or derived columns
+    async with engine.begin() as conn:
+        await conn.execute(text("DROP TABLE posts"))
+        await conn.execute(text(
+            "CREATE TABLE posts (id VARCHAR PRIMARY KEY, title VARCHAR NOT NULL, content_json JSON, "
+            "content_html TEXT, status VARCHAR NOT NULL, author_id VARCHAR REFERENCES users (id), "
+            "created_at DATETIME, updated_at DATETIME)"
+        ))
+        await conn.execute(
+            text("INSERT INTO posts (id, title, content_json, status) VALUES ('old', 'Old post', :content, 'draft')"),
+            {"content": json.dumps(_lexical("Written before the upgrade"))},
+        )
+
+    await init_db()
+    async with async_session() as db:
+        assert await post_service.backfill_derived_columns(db, batch_size=1) == 1
+        assert await post_service.backfill_derived_columns(db) == 0
+    post = (await client.get("/api/posts/")).json()["posts"][0]
+    assert (post["excerpt"], post["word_count"], post["version"]) == ("Written before the upgrade", 4, 1)
+    resp = await client.patch("/api/posts/old", json={"title": "Edited"}, headers={"If-Match": '"1"'})
+    assert resp.json()["version"] == 2
+@pytest.mark.asyncio
+async def test_content_stored_compressed(client: AsyncClient):
+    content = _lexical("Repetitive words. " * 200)
+    post_id = (await client.post("/api/posts/", json={"content_json": content})).json()["id"]
+
+    async with async_session() as db:
+        blob = (await db.execute(text("SELECT content_json FROM posts WHERE id = :id"), {"id": post_id})).scalar()
+    assert blob[:2] == b"\x01\x01" and len(blob) < len(json.dumps(content)) / 10
+
+    # Rows written before compression stay readable and can be migrated in place
+    async with async_session() as db:
+        await db.execute(
+            text("UPDATE posts SET content_json = :json, content_html = '<p>old</p>' WHERE id = :id"),
+            {"json": json.dumps(content), "id": post_id},
+        )
+        await db.commit()
+    post_service.post_cache.clear()
+    assert (await client.get(f"/api/posts/{post_id}")).json()["content_json"] == content
+
+    async with async_session() as db:
+        assert await post_service.compress_legacy_content(db) == 1
+        assert await post_service.compress_legacy_content(db) == 0
+        types = (await db.execute(
+            text("SELECT typeof(content_json), typeof(content_html) FROM posts WHERE id = :id"), {"id": post_id}
+        )).one()
+    assert tuple(types) == ("blob", "blob")
+    resp = (await client.get(f"/api/posts/{post_id}")).json()
+    assert resp["content_json"] == content and resp["content_html"] == "<p>old</p>"
+
+
+def _paragraphs(*bodies: str) -> dict:
+    return {"root": {"type": "root", "children": [
+        {"type": "paragraph", "children": [{"type": "text", "text": body}]} for body in bodies
+    ]}}
+
+
+@pytest.mark.asyncio
+async def test_post_revisions(client: AsyncClient):
+    first = _paragraphs(*(f"Paragraph {i} of the draft." for i in range(20)))
+    post = (await client.post("/api/posts/", json={"title": "Draft", "content_json": first})).json()
+    second = _paragraphs(*(f"Paragraph {i} of the draft." for i in range(19)), "A new ending.")
+    await client.patch(f"/api/posts/{post['id']}", json={"content_json": second})
+    await client.patch(f"/api/posts/{post['id']}", json={"title": "Renamed"})
+    await client.patch(f"/api/posts/{post['id']}", json={"content_json": first})  # back to a stored state
+
+    revisions = (await client.get(f"/api/posts/{post['id']}/revisions")).json()["revisions"]
+    assert [(r["version"], r["title"], r["kind"]) for r in revisions] == [
+        (4, "Renamed", "snapshot"), (3, "Renamed", "diff"), (2, "Draft", "diff"), (1, "Draft", "snapshot"),
+    ]
+    assert revisions[0]["content_hash"] == revisions[3]["content_hash"]
+    async with async_session() as db:
+        assert (await db.execute(text("SELECT count(*) FROM revision_blobs"))).scalar() == 2
+
+    page = (await client.get(f"/api/posts/{post['id']}/revisions", params={"limit": 3})).json()
+    rest = (await client.get(
+        f"/api/posts/{post['id']}/revisions", params={"after": page["next_cursor"]}
+    )).json()
+    assert [r["id"] for r in page["revisions"] + rest["revisions"]] == [r["id"] for r in revisions]
+
+    revision = (await client.get(f"/api/posts/{post['id']}/revisions/{revisions[2]['id']}")).json()
+    assert revision["content_json"] == second
+
+    resp = await client.post(
+        f"/api/posts/{post['id']}/revisions/{revisions[2]['id']}/restore", headers={"If-Match": '"3"'}
+    )
+    assert resp.status_code == 409
+    resp = await client.post(f"/api/posts/{post['id']}/revisions/{revisions[2]['id']}/restore")
+    assert resp.json()["title"] == "Draft" and resp.json()["content_json"] == second
+    assert resp.json()["version"] == 5
+
+    assert (await client.get("/api/posts/missing/revisions")).status_code == 404
+
+    # History is the post owner's alone: anyone else's lookups miss like a missing post
+    creds = {"email": "other@example.com", "password": "secret123"}
+    await client.post("/api/auth/signup", json=creds)
+    token = (await client.post("/api/auth/login", json=creds)).json()["access_token"]
+    other = {"Authorization": f"Bearer {token}"}
+    revision_url = f"/api/posts/{post['id']}/revisions/{revisions[3]['id']}"
+    assert (await client.get(f"/api/posts/{post['id']}/revisions", headers=other)).status_code == 404
+    assert (await client.get(revision_url, headers=other)).status_code == 404
+    assert (await client.post(f"{revision_url}/restore", headers=other)).status_code == 404
+    assert (await client.get(f"/api/posts/{post['id']}")).json()["version"] == 5
+    assert (await client.post(f"/api/posts/{post['id']}/revisions/999/restore")).status_code == 404
+
+    await client.delete(f"/api/posts/{post['id']}")
+    async with async_session() as db:
+        assert (await db.execute(text("SELECT count(*) FROM revision_blobs"))).scalar() == 0
+
+
+@pytest.mark.asyncio
+async def test_revision_thinning(client: AsyncClient):
+    post_id = (await client.post("/api/posts/", json={"title": "Autosaved"})).json()["id"]
+    now = datetime(2026, 3, 31, 12, 0)
+    ages = [  # minutes before now
+        5, 10,                        # recent: all kept
+        25 * 60 + 10, 25 * 60 + 40,   # same hour a day ago: one kept
+        40 * 24 * 60, 40 * 24 * 60 + 30, 40 * 24 * 60 + 120,  # same day 40 days ago: one kept
+    ]
+    async with async_session() as db:
+        for i, minutes in enumerate(ages):
+            await revision_service.record_revision(db, post_id, 10 + i, "Autosaved", _lexical(f"Save {i}"))
+            await db.execute(
+                text("UPDATE post_revisions SET created_at = :at WHERE version = :version"),
+                {"at": now - timedelta(minutes=minutes), "version": 10 + i},
+            )
+        await db.commit()
+
+        assert await revision_service.thin_revisions(db, post_id, now=now) == 3
+        await db.commit()
+        versions = (await db.execute(
+            text("SELECT version FROM post_revisions WHERE version >= 10 ORDER BY version")
+        )).scalars().all()
+        blobs = (await db.execute(text("SELECT count(*) FROM revision_blobs"))).scalar()
+    assert versions == [10, 11, 12, 14]
+    assert blobs == 4  # the dropped revisions' states are gone too
+
+
+@pytest.mark.asyncio
+async def test_export_import_ndjson(client: AsyncClient, monkeypatch):
+    monkeypatch.setattr(settings, "TRANSFER_BATCH_SIZE", 2)
+    lines = [
+        json.dumps({"id": "imported-1", "title": "First", "content_json": _lexical("Hello import world")}),
+        "{not json",
+        json.dumps({"title": "x" * 501}),
+        "",
+        json.dumps({"title": "Second", "status": "published", "content_json": _lexical("Published body"),
+                    "created_at": "2024-01-02T03:04:05+02:00"}),
+        json.dumps({"id": "imported-1", "title": "Duplicate"}),
+        json.dumps({"title": "Third"}),
+    ]
+    body = "\n".join(lines).encode()
+
+    async def chunks():  # split mid-line to exercise incremental parsing
+        for i in range(0, len(body), 7):
+            yield body[i:i + 7]
+
+    resp = await client.post("/api/posts/import", content=chunks())
+    result = resp.json()
+    assert result["imported"] == 3 and result["failed"] == 3
+    assert [e["line"] for e in result["errors"]] == [2, 3, 6]
+    assert result["errors"][1]["error"].startswith("title:")
+    assert "already exists" in result["errors"][2]["error"]
+
+    resp = await client.get("/api/posts/export")
+    assert resp.headers["content-type"] == "application/x-ndjson"
+    exported = [json.loads(line) for line in resp.text.splitlines()]
+    assert [p["title"] for p in exported] == ["Second", "First", "Third"]  # oldest first
+    assert exported[0]["created_at"] == "2024-01-02T01:04:05"  # normalized to UTC
+    assert exported[1]["content_json"] == _lexical("Hello import world")
+
+    post = (await client.get("/api/posts/imported-1")).json()
+    assert post["word_count"] == 3 and post["excerpt"] == "Hello import world"
+    hits = (await client.get("/api/posts/search", params={"q": "published"})).json()["hits"]
+    assert [h["title"] for h in hits] == ["Second"]
+
+    # Exported lines round-trip into another account
+    creds = {"email": "ndjson@example.com", "password": "secret123"}
+    await client.post("/api/auth/signup", json=creds)
+    token = (await client.post("/api/auth/login", json=creds)).json()["access_token"]
+    fresh = "\n".join(json.dumps({k: v for k, v in p.items() if k != "id"}) for p in exported)
+    resp = await client.post("/api/posts/import", content=fresh, headers={"Authorization": f"Bearer {token}"})
+    assert resp.json() == {"imported": 3, "failed": 0, "errors": []}
+
+
+@pytest.mark.asyncio
+async def test_import_reports_unprocessable_lines(client: AsyncClient, monkeypatch):
+    def render(content_json):
+        if "Broken" in json.dumps(content_json):
+            raise RecursionError("maximum recursion depth exceeded")
+        return render_html(content_json)
+
+    monkeypatch.setattr(post_transfer, "render_html", render)
+    lines = [
+        {"title": "Before", "content_json": _lexical("Fine")},
+        {"title": "Bad", "status": "published", "content_json": _lexical("Broken")},
+        {"title": "After", "status": "published", "content_json": _lexical("Also fine")},
+    ]
+    resp = await client.post("/api/posts/import", content="\n".join(json.dumps(line) for line in lines))
+    assert resp.status_code == 200
+    assert resp.json() == {
+        "imported": 2, "failed": 1, "errors": [{"line": 2, "error": "Content could not be processed"}],
+    }
+    assert sorted(p["title"] for p in (await client.get("/api/posts/")).json()["posts"]) == ["After", "Before"]
+
+
 @pytest.mark.asyncio
 async def test_publish_post(client: AsyncClient):
     create_resp = await client.post("/api/posts/", json={"title": "To Publish"})
@@ -144,6 +719,138 @@ async def test_publish_post(client: AsyncClient):
     assert resp.json()["status"] == "published"
 
 
+@pytest.mark.asyncio
+async def test_bulk_post_operations(client: AsyncClient):
+    ids = [
+        (await client.post("/api/posts/", json={"title": f"Bulk {i}", "content_json": _lexical(f"Bulk body {i}")})).json()["id"]
+        for i in range(3)
+    ]
+    await client.get(f"/api/posts/{ids[0]}")  # warm the cache
+
+    creds = {"email": "bulk@example.com", "password": "secret123"}
+    await client.post("/api/auth/signup", json=creds)
+    token = (await client.post("/api/auth/login", json=creds)).json()["access_token"]
+    foreign = (await client.post(
+        "/api/posts/", json={"title": "Not yours"}, headers={"Authorization": f"Bearer {token}"}
+    )).json()["id"]
+
+    resp = await client.post("/api/posts/bulk", json={"ids": [*ids, ids[0], foreign, "missing"], "operation": "publish"})
+    assert resp.json()["results"] == [
+        {"id": ids[0], "status": "ok", "version": 2},
+        {"id": ids[1], "status": "ok", "version": 2},
+        {"id": ids[2], "status": "ok", "version": 2},
+        {"id": foreign, "status": "not_found", "version": None},
+        {"id": "missing", "status": "not_found", "version": None},
+    ]
+    post = (await client.get(f"/api/posts/{ids[0]}")).json()
+    assert post["status"] == "published" and post["version"] == 2
+    async with async_session() as db:
+        stored = (await db.execute(select(Post.content_html).where(Post.id == ids[1]))).scalar()
+    assert stored == "<p>Bulk body 1</p>"
+
+    resp = await client.post("/api/posts/bulk", json={"ids": ids[:1], "operation": "unpublish"})
+    assert resp.json()["results"][0]["version"] == 3
+    assert (await client.get(f"/api/posts/{ids[0]}")).json()["status"] == "draft"
+    async with async_session() as db:
+        assert (await db.execute(select(Post.content_html).where(Post.id == ids[0]))).scalar() is None
+
+    # Posts already in the target status are reported as-is, without a new version
+    resp = await client.post("/api/posts/bulk", json={"ids": ids[:2], "operation": "unpublish"})
+    assert resp.json()["results"] == [
+        {"id": ids[0], "status": "ok", "version": 3},
+        {"id": ids[1], "status": "ok", "version": 3},
+    ]
+    resp = await client.post("/api/posts/bulk", json={"ids": ids[1:2], "operation": "unpublish"})
+    assert resp.json()["results"] == [{"id": ids[1], "status": "ok", "version": 3}]
+
+    resp = await client.post("/api/posts/bulk", json={"ids": ids[1:], "operation": "delete"})
+    assert [r["status"] for r in resp.json()["results"]] == ["ok", "ok"]
+    assert (await client.get(f"/api/posts/{ids[1]}")).status_code == 404
+    assert (await client.get("/api/posts/")).json()["total"] == 1
+    hits = (await client.get("/api/posts/search", params={"q": "bulk"})).json()["hits"]
+    assert [h["id"] for h in hits] == [ids[0]]
+
+    resp = await client.post("/api/posts/bulk", json={"ids": [], "operation": "delete"})
+    assert resp.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_bulk_delete_keeps_foreign_buffered_writes(client: AsyncClient, monkeypatch):
+    monkeypatch.setattr(write_buffer, "enabled", True)
+    creds = {"email": "bulk@example.com", "password": "secret123"}
+    await client.post("/api/auth/signup", json=creds)
+    token = (await client.post("/api/auth/login", json=creds)).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    foreign = (await client.post("/api/posts/", json={"title": "Not yours"}, headers=headers)).json()["id"]
+    await client.patch(f"/api/posts/{foreign}", json={"title": "Unsaved edit"}, headers=headers)
+    own = (await client.post("/api/posts/", json={"title": "Mine"})).json()["id"]
+    await client.patch(f"/api/posts/{own}", json={"title": "Doomed edit"})
+
+    resp = await client.post("/api/posts/bulk", json={"ids": [own, foreign], "operation": "delete"})
+    assert [r["status"] for r in resp.json()["results"]] == ["ok", "not_found"]
+    assert write_buffer.peek(own) is None
+    assert write_buffer.peek(foreign)["title"] == "Unsaved edit"
+
+    assert await write_buffer.flush() == 1
+    resp = await client.get(f"/api/posts/{foreign}", headers=headers)
+    assert (resp.json()["title"], resp.json()["version"]) == ("Unsaved edit", 2)
+
+
+@pytest.mark.asyncio
+async def test_bulk_publish_flushes_buffered_writes(client: AsyncClient, monkeypatch):
+    monkeypatch.setattr(write_buffer, "enabled", True)
+    creds = {"email": "bulk@example.com", "password": "secret123"}
+    await client.post("/api/auth/signup", json=creds)
+    token = (await client.post("/api/auth/login", json=creds)).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    foreign = (await client.post("/api/posts/", json={"title": "Not yours"}, headers=headers)).json()["id"]
+    await client.patch(f"/api/posts/{foreign}", json={"title": "Unsaved edit"}, headers=headers)
+    own = (await client.post("/api/posts/", json={"title": "Mine"})).json()["id"]
+    await client.patch(f"/api/posts/{own}", json={"content_json": _lexical("Pending body")})
+
+    # The pending edit is written first (not deadlocked behind the request's own session)
+    resp = await asyncio.wait_for(
+        client.post("/api/posts/bulk", json={"ids": [own, foreign], "operation": "publish"}), timeout=10
+    )
+    assert resp.json()["results"] == [
+        {"id": own, "status": "ok", "version": 3},
+        {"id": foreign, "status": "not_found", "version": None},
+    ]
+    assert write_buffer.peek(own) is None
+    assert write_buffer.peek(foreign)["title"] == "Unsaved edit"
+    async with async_session() as db:
+        stored = (await db.execute(select(Post.content_html).where(Post.id == own))).scalar()
+    assert stored == "<p>Pending body</p>"
+    write_buffer.discard(foreign)
+@pytest.mark.asyncio
+async def test_post_counters(client: AsyncClient):
+    ids = [(await client.post("/api/posts/", json={"title": f"Counted {i}"})).json()["id"] for i in range(4)]
+    await client.post(f"/api/posts/{ids[0]}/publish")
+    await client.post(f"/api/posts/{ids[0]}/publish")  # already published: no double count
+    await client.post("/api/posts/bulk", json={"ids": ids[1:3], "operation": "publish"})
+    await client.post("/api/posts/bulk", json={"ids": ids[2:], "operation": "unpublish"})
+    await client.delete(f"/api/posts/{ids[1]}")
+    await client.post("/api/posts/import", content=json.dumps({"title": "Imported", "status": "published"}))
+
+    async def totals():
+        return [
+            (await client.get("/api/posts/", params={"status": status} if status else {})).json()["total"]
+            for status in (None, "draft", "published")
+        ]
+
+    assert await totals() == [4, 2, 2]
+
+    # Drift (e.g. rows changed behind the app's back) is reported and repaired
+    async with async_session() as db:
+        await db.execute(text("UPDATE post_counters SET total = 7 WHERE status = 'draft'"))
+        await db.commit()
+    assert await totals() == [9, 7, 2]
+    async with async_session() as db:
+        drift = await counter_service.reconcile(db)
+    assert [(d.author_id, d.status, d.stored, d.actual) for d in drift] == [(None, "draft", 7, 2)]
+    assert await totals() == [4, 2, 2]
+
+
 @pytest.mark.asyncio
 async def test_delete_post(client: AsyncClient):
     create_resp = await client.post("/api/posts/", json={"title": "To Delete"})
@@ -215,6 +922,129 @@ async def test_login_wrong_password(client: AsyncClient):
     assert resp.status_code == 401
 
 
+@pytest.mark.asyncio
+async def test_login_rehashes_on_rounds_change(client: AsyncClient, monkeypatch):
+    monkeypatch.setattr(password_hasher, "rounds", 4)
+    creds = {"email": "rehash@example.com", "password": "secret123"}
+    await client.post("/api/auth/signup", json=creds)
+
+    monkeypatch.setattr(password_hasher, "rounds", 5)
+    resp = await client.post("/api/auth/login", json=creds)
+    assert resp.status_code == 200
+
+    async with async_session() as db:
+        user = (await db.execute(select(User).where(User.email == creds["email"]))).scalar_one()
+    assert user.password_hash.startswith("$2b$05$")
+    assert (await client.post("/api/auth/login", json=creds)).status_code == 200
+    assert password_hasher.stats()["hashes"] >= 2
+
+
+@pytest.mark.asyncio
+async def test_auth_with_reads_on_the_writer_pool(client: AsyncClient, monkeypatch):
+    # DB_READ_POOL_SIZE=0: the read session draws from the single writer connection
+    app.dependency_overrides[get_read_db] = get_db
+    try:
+        monkeypatch.setattr(password_hasher, "rounds", 4)
+        creds = {"email": "shared@example.com", "password": "secret123"}
+        resp = await asyncio.wait_for(client.post("/api/auth/signup", json=creds), timeout=10)
+        assert resp.status_code == 201
+        monkeypatch.setattr(password_hasher, "rounds", 5)  # login rehashes and writes
+        resp = await asyncio.wait_for(client.post("/api/auth/login", json=creds), timeout=10)
+        assert resp.status_code == 200
+    finally:
+        app.dependency_overrides.pop(get_read_db)
+
+
+@pytest.mark.asyncio
+async def test_posts_scoped_to_token_owner(client: AsyncClient):
+    headers = {}
+    for email in ("owner@example.com", "other@example.com"):
+        creds = {"email": email, "password": "secret123"}
+        await client.post("/api/auth/signup", json=creds)
+        token = (await client.post("/api/auth/login", json=creds)).json()["access_token"]
+        headers[email] = {"Authorization": f"Bearer {token}"}
+
+    await client.post("/api/posts/", json={"title": "Mine"}, headers=headers["owner@example.com"])
+    await client.post("/api/posts/", json={"title": "Anonymous"})
+
+    owner = (await client.get("/api/posts/", headers=headers["owner@example.com"])).json()
+    assert [p["title"] for p in owner["posts"]] == ["Mine"] and owner["total"] == 1
+    assert owner["posts"][0]["author_id"] is not None
+    other = (await client.get("/api/posts/", headers=headers["other@example.com"])).json()
+    assert other["posts"] == []
+    anonymous = (await client.get("/api/posts/")).json()
+    assert [p["title"] for p in anonymous["posts"]] == ["Anonymous"]
+
+    # Verified tokens are reused from the cache; bad tokens are rejected
+    assert token_cache.stats()["hits"] >= 1
+    resp = await client.get("/api/posts/", headers={"Authorization": "Bearer not-a-jwt"})
+    assert resp.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_claim_anonymous_posts(client: AsyncClient, capsys):
+    # Logged-in users only see their own posts; anonymous ones stay hidden until claimed
+    creds = {"email": "owner@example.com", "password": "secret123"}
+    await client.post("/api/auth/signup", json=creds)
+    token = (await client.post("/api/auth/login", json=creds)).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    legacy = (await client.post("/api/posts/", json={"title": "Legacy"})).json()
+    await client.post(f"/api/posts/{legacy['id']}/publish")
+    await client.post("/api/posts/", json={"title": "Draft"})
+    assert (await client.get("/api/posts/", headers=headers)).json()["total"] == 0
+
+    await manage.claim_posts("owner@example.com")
+    assert "Assigned 2 posts" in capsys.readouterr().out
+
+    owner = (await client.get("/api/posts/", headers=headers)).json()
+    assert sorted(p["title"] for p in owner["posts"]) == ["Draft", "Legacy"] and owner["total"] == 2
+    resp = await client.get(f"/api/posts/{legacy['id']}", headers=headers)
+    assert resp.status_code == 200 and resp.json()["version"] == legacy["version"] + 2
+    assert (await client.get("/api/posts/")).json()["total"] == 0
+    async with async_session() as db:
+        assert await counter_service.reconcile(db) == []
+
+    with pytest.raises(SystemExit):
+        await manage.claim_posts("nobody@example.com")
+@pytest.mark.asyncio
+async def test_post_by_id_scoped_to_owner(client: AsyncClient):
+    headers = {}
+    for email in ("owner@example.com", "other@example.com"):
+        creds = {"email": email, "password": "secret123"}
+        await client.post("/api/auth/signup", json=creds)
+        token = (await client.post("/api/auth/login", json=creds)).json()["access_token"]
+        headers[email] = {"Authorization": f"Bearer {token}"}
+    owner, other = headers["owner@example.com"], headers["other@example.com"]
+
+    post_id = (await client.post("/api/posts/", json={"title": "Mine"}, headers=owner)).json()["id"]
+    assert (await client.get(f"/api/posts/{post_id}", headers=owner)).status_code == 200  # now cached
+
+    # Someone else's post looks missing, cache hit or not, and is left untouched
+    for caller in (other, {}):
+        assert (await client.get(f"/api/posts/{post_id}", headers=caller)).status_code == 404
+        resp = await client.get(f"/api/posts/{post_id}", headers={**caller, "If-None-Match": '"1"'})
+        assert resp.status_code == 404
+        resp = await client.patch(f"/api/posts/{post_id}", json={"title": "Hijacked"}, headers=caller)
+        assert resp.status_code == 404
+        assert (await client.post(f"/api/posts/{post_id}/publish", headers=caller)).status_code == 404
+        assert (await client.delete(f"/api/posts/{post_id}", headers=caller)).status_code == 404
+
+    resp = await client.get(f"/api/posts/{post_id}", headers=owner)
+    assert resp.json()["title"] == "Mine" and resp.json()["status"] == "draft"
+    assert (await client.delete(f"/api/posts/{post_id}", headers=owner)).status_code == 204
+
+
+@pytest.mark.asyncio
+async def test_auth_sheds_load_when_hasher_is_full(client: AsyncClient, monkeypatch):
+    monkeypatch.setattr(password_hasher, "max_queue", 0)
+    monkeypatch.setattr(password_hasher, "in_flight", password_hasher.workers)
+    resp = await client.post(
+        "/api/auth/signup", json={"email": "busy@example.com", "password": "secret123"}
+    )
+    assert resp.status_code == 503
+    assert resp.headers["retry-after"] == "1"
+
+
 # ──────────────────────────────────────────────
 # AI
 # ──────────────────────────────────────────────
@@ -241,6 +1071,378 @@ async def test_ai_generate_fix_grammar(client: AsyncClient):
     assert resp.json()["action"] == "fix_grammar"
 
 
+@pytest.mark.asyncio
+async def test_ai_generate_cached(client: AsyncClient, monkeypatch):
+    calls = []
+
+    async def fake_generate(_client, prompt):
+        calls.append(prompt)
+        return f"result {len(calls)}"
+
+    monkeypatch.setattr(ai_service, "_get_client", lambda: object())
+    monkeypatch.setattr(ai_service, "_async_generate", fake_generate)
+    body = {"text": "A post about caching AI output.", "action": "summarize"}
+
+    first = await client.post("/api/ai/generate", json=body)
+    second = await client.post("/api/ai/generate", json=body)
+    assert first.json()["result"] == second.json()["result"] == "result 1"
+    assert len(calls) == 1
+
+    forced = await client.post("/api/ai/generate", json={**body, "force": True})
+    assert forced.json()["result"] == "result 2"
+    assert len(calls) == 2
+
+
+def _sse_events(body: str) -> list[tuple[str, dict]]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def _groq_stub(words: list[str], fail_first: int = 0) -> FastAPI:
+    """Local stand-in for the Groq chat-completions API (JSON and SSE modes)."""
+    stub = FastAPI()
+    stub.state.calls = 0
+
+    @stub.post("/openai/v1/chat/completions")
+    async def completions(request: Request):
+        stub.state.calls += 1
+        if stub.state.calls <= fail_first:
+            return JSONResponse({"error": {"message": "overloaded"}}, status_code=503)
+        body = await request.json()
+        base = {"id": "stub", "created": 0, "model": body["model"]}
+        if not body.get("stream"):
+            message = {"role": "assistant", "content": "".join(words)}
+            return {**base, "object": "chat.completion",
+                    "choices": [{"index": 0, "message": message, "finish_reason": "stop"}]}
+
+        async def chunks():
+            for word in words:
+                choice = {"index": 0, "delta": {"content": word}, "finish_reason": None}
+                yield f"data: {json.dumps({**base, 'object': 'chat.completion.chunk', 'choices': [choice]})}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+    return stub
+
+
+def _stub_client(stub: FastAPI, **kwargs) -> AiClient:
+    http = AsyncClient(transport=ASGITransport(app=stub), base_url="http://groq.stub")
+    return AiClient(api_key="test-key", base_url="http://groq.stub", http_client=http, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_ai_generate_stream(client: AsyncClient, monkeypatch):
+    stub = _groq_stub(["Short ", "streamed ", "summary."])
+    monkeypatch.setattr(ai_service, "_client", _stub_client(stub))
+    body = {"text": "Stream me please.", "action": "summarize"}
+
+    resp = await client.post("/api/ai/generate/stream", json=body)
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    events = _sse_events(resp.text)
+    assert [e for e, _ in events] == ["delta", "delta", "delta", "done"]
+    assert "".join(d["text"] for e, d in events if e == "delta") == "Short streamed summary."
+
+    # The joined stream was cached for the non-streaming endpoint too
+    resp = await client.post("/api/ai/generate", json=body)
+    assert resp.json()["result"] == "Short streamed summary."
+    assert stub.state.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_ai_client_retries_and_metrics(client: AsyncClient, monkeypatch):
+    stub = _groq_stub(["Recovered."], fail_first=2)
+    ai_client = _stub_client(stub, max_retries=2, backoff=0.001)
+    monkeypatch.setattr(ai_service, "_client", ai_client)
+
+    resp = await client.post("/api/ai/generate", json={"text": "Retry me.", "action": "title"})
+    assert resp.json()["result"] == "Recovered."
+    assert stub.state.calls == 3
+
+    stats = (await client.get("/metrics")).json()["ai_client"]
+    assert stats["calls"] == 1
+    assert stats["retries"] == 2
+    assert stats["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_ai_generate_stream_offline(client: AsyncClient):
+    resp = await client.post(
+        "/api/ai/generate/stream",
+        json={"text": "No API key configured here.", "action": "summarize"},
+    )
+    events = _sse_events(resp.text)
+    assert events[0][0] == "delta" and events[0][1]["text"].startswith("Summary (offline)")
+    assert events[-1] == ("done", {"action": "summarize"})
+
+
+@pytest.mark.asyncio
+async def test_ai_generate_single_flight(client: AsyncClient, monkeypatch):
+    release = asyncio.Event()
+    calls = []
+
+    async def slow_generate(_client, prompt):
+        calls.append(prompt)
+        await release.wait()
+        return "shared result"
+
+    monkeypatch.setattr(ai_service, "_get_client", lambda: object())
+    monkeypatch.setattr(ai_service, "_async_generate", slow_generate)
+    body = {"text": "Everyone summarizes this at once.", "action": "summarize"}
+
+    requests = [asyncio.create_task(client.post("/api/ai/generate", json=body)) for _ in range(3)]
+    while not calls:
+        await asyncio.sleep(0)
+    release.set()
+    responses = await asyncio.gather(*requests)
+
+    assert [r.json()["result"] for r in responses] == ["shared result"] * 3
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_ai_single_flight_error_and_cancellation(monkeypatch):
+    started = asyncio.Event()
+    upstream_cancelled = asyncio.Event()
+
+    async def failing_generate(_client, prompt):
+        raise RuntimeError("upstream down")
+
+    async def hanging_generate(_client, prompt):
+        started.set()
+        try:
+            await asyncio.sleep(3600)
+        except asyncio.CancelledError:
+            upstream_cancelled.set()
+            raise
+
+    monkeypatch.setattr(ai_service, "_get_client", lambda: object())
+
+    # A failing leader: every waiter gets the error and falls back independently
+    monkeypatch.setattr(ai_service, "_async_generate", failing_generate)
+    results = await asyncio.gather(
+        *(ai_service.generate_ai_content("Leader fails.", "title") for _ in range(2))
+    )
+    assert all(r == ai_service._fallback_response("Leader fails.", "title") for r in results)
+
+    # Once every waiter is cancelled, the shared upstream call is cancelled too
+    monkeypatch.setattr(ai_service, "_async_generate", hanging_generate)
+    waiters = [
+        asyncio.create_task(ai_service.generate_ai_content("Nobody waits.", "title"))
+        for _ in range(2)
+    ]
+    await started.wait()
+    waiters[0].cancel()
+    await asyncio.sleep(0)
+    assert not upstream_cancelled.is_set()  # one waiter is still interested
+    waiters[1].cancel()
+    await asyncio.wait_for(upstream_cancelled.wait(), timeout=1)
+    assert ai_service.inflight_stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_ai_batch(client: AsyncClient, monkeypatch):
+    async def fake_generate(text, action, force=False, engine="llm"):
+        if action == "expand":
+            raise RuntimeError("boom")
+        await asyncio.sleep(0.01 if action == "summarize" else 0)
+        return f"{action}:{text}"
+
+    monkeypatch.setattr(ai_service, "generate_ai_content", fake_generate)
+    items = [
+        {"text": "draft", "action": "summarize"},
+        {"text": "draft", "action": "title"},
+        {"text": "draft", "action": "expand"},
+    ]
+
+    resp = await client.post("/api/ai/batch", json={"items": items})
+    assert resp.status_code == 200
+    results = resp.json()["results"]
+    assert [r["index"] for r in results] == [0, 1, 2]
+    assert results[0]["result"] == "summarize:draft"
+    assert results[1]["result"] == "title:draft"
+    assert results[2]["result"] is None and results[2]["error"]
+
+    # Streamed: one NDJSON line per item, in completion order
+    resp = await client.post("/api/ai/batch?stream=true", json={"items": items})
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert sorted(line["index"] for line in lines) == [0, 1, 2]
+    assert lines[-1]["index"] == 0  # the slow summarize finishes last
+
+
+@pytest.mark.asyncio
+async def test_ai_batch_validation(client: AsyncClient):
+    resp = await client.post("/api/ai/batch", json={"items": []})
+    assert resp.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_ai_chunked_map_reduce(monkeypatch):
+    calls = []
+
+    async def fake_generate(_client, prompt):
+        instruction, text = prompt.split(":\n\n", 1)
+        calls.append(instruction)
+        if "Fix the grammar" in instruction:
+            return text.upper()
+        return f"<{len(text)}>"
+
+    monkeypatch.setattr(ai_service, "_get_client", lambda: object())
+    monkeypatch.setattr(ai_service, "_async_generate", fake_generate)
+    monkeypatch.setattr(ai_service.settings, "AI_CHUNK_TOKENS", 100)
+    paragraphs = [f"Paragraph {i} " + "has some words in it. " * (5 + i % 4) for i in range(12)]
+    text = "\n\n".join(paragraphs)
+
+    fixed = await ai_service.generate_ai_content(text, "fix_grammar")
+    assert fixed == text.upper()  # chunks corrected independently, reassembled in order
+    first_run = len(calls)
+    assert first_run > 1
+
+    # A one-paragraph edit only re-processes the chunk(s) around it
+    edited = text.replace("Paragraph 7 ", "Paragraph seven ")
+    assert await ai_service.generate_ai_content(edited, "fix_grammar") == edited.upper()
+    assert len(calls) - first_run < first_run / 2
+
+    calls.clear()
+    summary = await ai_service.generate_ai_content(text, "summarize")
+    assert summary.startswith("<")
+    assert sum("section of a longer" in c for c in calls) == first_run
+    assert "summaries of consecutive" in calls[-1]  # final reduce step
+
+    # Section summaries still too long for one prompt: map again, then reduce exactly once
+    async def verbose_generate(_client, prompt):
+        instruction, text = prompt.split(":\n\n", 1)
+        calls.append(instruction)
+        return text[: len(text) // 2] if "section of a longer" in instruction else "<summary>"
+
+    monkeypatch.setattr(ai_service, "_async_generate", verbose_generate)
+    calls.clear()
+    assert await ai_service.generate_ai_content(text, "summarize", force=True) == "<summary>"
+    assert sum("section of a longer" in c for c in calls) > first_run  # a second map pass ran
+    assert sum("summaries of consecutive" in c for c in calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_ai_generate_fast_engine(client: AsyncClient, monkeypatch):
+    monkeypatch.setattr(ai_service, "_get_client", lambda: pytest.fail("fast tier must not call Groq"))
+    text = (
+        "SQLite is an embedded database engine. Write-ahead logging lets readers and writers "
+        "work concurrently. Many blog engines store posts in SQLite. WAL mode improves "
+        "concurrency for SQLite databases under load. The weather was pleasant yesterday."
+    )
+
+    resp = await client.post("/api/ai/generate", json={"text": text, "action": "summarize", "engine": "fast"})
+    summary = resp.json()["result"]
+    assert 0 < len(summary) < len(text)
+    assert "weather" not in summary  # the off-topic sentence ranks lowest
+
+    resp = await client.post("/api/ai/generate", json={"text": text, "action": "title", "engine": "fast"})
+    titles = resp.json()["result"].splitlines()
+    assert titles[0].startswith("1. ") and "Sqlite" in titles[0]
+
+    # The engine runs in its thread pool, not on the event loop
+    threads = []
+    summarize = ai_service.local_ai.summarize
+    monkeypatch.setattr(ai_service.local_ai, "summarize", lambda t: threads.append(threading.get_ident()) or summarize(t))
+    await client.post("/api/ai/generate", json={"text": text, "action": "summarize", "engine": "fast"})
+    assert threads and threads[0] != threading.get_ident()
+
+    # Rewriting needs the LLM: rejected up front rather than answered with a fallback
+    creds = {"email": "fast-engine@example.com", "password": "secret123"}
+    await client.post("/api/auth/signup", json=creds)
+    token = (await client.post("/api/auth/login", json=creds)).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    for action in ("fix_grammar", "expand"):
+        request = {"text": text, "action": action, "engine": "fast"}
+        for url in ("/api/ai/generate", "/api/ai/generate/stream", "/api/ai/jobs"):
+            resp = await client.post(url, json=request, headers=headers)
+            assert resp.status_code == 400 and resp.json()["detail"] == "fast engine supports summarize/title only"
+        resp = await client.post("/api/ai/batch", json={"items": [{"text": text, "action": "title"}, request]})
+        assert resp.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_ai_jobs_priority_and_fair_scheduling():
+    queue = AiJobQueue(async_session, workers=1, max_pending_per_owner=10, retention_hours=1)
+    for owner, action in [
+        ("bulk", "expand"), ("bulk", "expand"), ("bulk", "expand"), ("bulk", "title"),
+        ("bulk", "title"), ("alice", "expand"), ("alice", "title"),
+    ]:
+        await queue.submit(owner, "Some text.", action)
+
+    order = [(job.owner, job.action) for job in (queue._next() for _ in range(7))]
+    # Cheap titles first; within a class owners alternate instead of FIFO
+    assert order == [
+        ("bulk", "title"), ("alice", "title"), ("bulk", "title"),
+        ("bulk", "expand"), ("alice", "expand"), ("bulk", "expand"), ("bulk", "expand"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_ai_jobs_watchers_are_independent():
+    queue = AiJobQueue(async_session, workers=1, max_pending_per_owner=10, retention_hours=1)
+    job = await queue.submit("alice", "Hello world.", "title")
+    gone, waiting = queue.watch(job.id), queue.watch(job.id)
+    queue.unwatch(job.id, gone)  # e.g. one of two SSE clients disconnected
+
+    await queue.start()
+    try:
+        await asyncio.wait_for(waiting.wait(), timeout=5)
+    finally:
+        await queue.stop()
+    assert not gone.is_set()
+    assert job.id not in queue._watchers
+@pytest.mark.asyncio
+async def test_ai_jobs_endpoints(client: AsyncClient, monkeypatch):
+    # Jobs need a valid login; a bad token is rejected, not treated as anonymous
+    payload = {"text": "Hello world.", "action": "expand"}
+    assert (await client.post("/api/ai/jobs", json=payload)).status_code == 401
+    bad = {"Authorization": "Bearer not-a-token"}
+    assert (await client.post("/api/ai/jobs", json=payload, headers=bad)).status_code == 401
+
+    creds = {"email": "jobs-owner@example.com", "password": "secret123"}
+    await client.post("/api/auth/signup", json=creds)
+    token = (await client.post("/api/auth/login", json=creds)).json()["access_token"]
+    mine = {"Authorization": f"Bearer {token}"}
+
+    # Submitted while no workers run: persisted, then picked up on start
+    resp = await client.post("/api/ai/jobs", json=payload, headers=mine)
+    assert resp.status_code == 202
+    job = resp.json()
+    assert job["status"] == "queued" and job["priority"] == 2
+
+    await job_queue.start()
+    assert (await client.get(f"/api/ai/jobs/{job['id']}")).status_code == 401
+    resp = await client.get(f"/api/ai/jobs/{job['id']}/events", headers=mine)
+    events = _sse_events(resp.text)
+    assert events[-1][0] == "done" and events[-1][1]["status"] == "done"
+
+    resp = await client.get(f"/api/ai/jobs/{job['id']}", headers=mine)
+    assert resp.json()["result"].startswith("Hello world.")
+    assert job_queue.stats()["completed"] >= 1
+
+    assert (await client.get("/api/ai/jobs/nope", headers=mine)).status_code == 404
+
+    # Jobs belong to whoever submitted them
+    creds = {"email": "jobs@example.com", "password": "secret123"}
+    await client.post("/api/auth/signup", json=creds)
+    token = (await client.post("/api/auth/login", json=creds)).json()["access_token"]
+    other = {"Authorization": f"Bearer {token}"}
+    assert (await client.get(f"/api/ai/jobs/{job['id']}", headers=other)).status_code == 404
+    assert (await client.get(f"/api/ai/jobs/{job['id']}/events", headers=other)).status_code == 404
+
+    await job_queue.stop()
+    monkeypatch.setattr(job_queue, "max_pending_per_owner", 1)
+    await client.post("/api/ai/jobs", json={"text": "One", "action": "title"}, headers=mine)
+    resp = await client.post("/api/ai/jobs", json={"text": "Two", "action": "title"}, headers=mine)
+    assert resp.status_code == 429
+
+
 @pytest.mark.asyncio
 async def test_ai_generate_invalid_action(client: AsyncClient):
     resp = await client.post(
@@ -254,6 +1456,18 @@ async def test_ai_generate_invalid_action(client: AsyncClient):
 # Health
 # ──────────────────────────────────────────────
 
+@pytest.mark.asyncio
+async def test_sqlite_engine_profile():
+    async with engine.connect() as conn:
+        assert (await conn.execute(text("PRAGMA journal_mode"))).scalar() == "wal"
+        assert (await conn.execute(text("PRAGMA foreign_keys"))).scalar() == 1
+        assert (await conn.execute(text("PRAGMA query_only"))).scalar() == 0
+    # Reads use their own pool, which refuses writes
+    assert read_engine is not engine
+    async with read_engine.connect() as conn:
+        assert (await conn.execute(text("PRAGMA query_only"))).scalar() == 1
+
+
 @pytest.mark.asyncio
 async def test_health(client: AsyncClient):
     resp = await client.get("/health")